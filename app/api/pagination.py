@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+import base64
+import json
+from datetime import date, datetime
+from typing import Any, Sequence
+
+from fastapi import HTTPException, Query, Response, status
+from sqlalchemy import Select, and_, or_
+from sqlalchemy.orm import InstrumentedAttribute
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+# (columna, descendente): el ultimo elemento debe ser unico (el id) para desempatar.
+SortKey = Sequence[tuple[InstrumentedAttribute, bool]]
+
+
+def page_limit(limit: int = Query(default=DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE)) -> int:
+    return limit
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    raw = json.dumps([value.isoformat() if isinstance(value, (date, datetime)) else value for value in values])
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor_values(cursor: str, size: int) -> list[Any]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        raw_values = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except (ValueError, TypeError) as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Cursor no valido.") from exc
+    if not isinstance(raw_values, list) or len(raw_values) != size:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Cursor no valido.")
+    return raw_values
+
+
+def decode_cursor(cursor: str, sort_key: SortKey) -> list[Any]:
+    raw_values = decode_cursor_values(cursor, len(sort_key))
+    try:
+        return [_parse_value(column, value) for (column, _), value in zip(sort_key, raw_values)]
+    except (ValueError, TypeError) as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Cursor no valido.") from exc
+
+
+def _parse_value(column: InstrumentedAttribute, value: Any) -> Any:
+    python_type = column.type.python_type
+    if python_type is datetime:
+        return datetime.fromisoformat(value)
+    if python_type is date:
+        return date.fromisoformat(value)
+    return python_type(value)
+
+
+def _after(sort_key: SortKey, values: list[Any]):
+    """Keyset predicate: rows strictly after ``values`` in ``sort_key`` order."""
+    clauses = []
+    for index, (column, descending) in enumerate(sort_key):
+        value = values[index]
+        equal_prefix = [prev_column == values[prev] for prev, (prev_column, _) in enumerate(sort_key[:index])]
+        clauses.append(and_(*equal_prefix, column < value if descending else column > value))
+    # Cota redundante sobre la primera columna: con solo el OR, SQLite recorre el indice desde el principio.
+    first_column, first_descending = sort_key[0]
+    bound = first_column <= values[0] if first_descending else first_column >= values[0]
+    return and_(bound, or_(*clauses))
+
+
+def paginate(query: Select, sort_key: SortKey, cursor: str | None, limit: int) -> Select:
+    if cursor:
+        query = query.where(_after(sort_key, decode_cursor(cursor, sort_key)))
+    order_by = [column.desc() if descending else column.asc() for column, descending in sort_key]
+    # Una fila de mas indica si hay pagina siguiente.
+    return query.order_by(*order_by).limit(limit + 1)
+
+
+def finish_page(rows: list[Any], sort_key: SortKey, limit: int, response: Response) -> list[Any]:
+    if len(rows) <= limit:
+        return rows
+    page = rows[:limit]
+    last = page[-1]
+    response.headers[NEXT_CURSOR_HEADER] = encode_cursor([getattr(last, column.key) for column, _ in sort_key])
+    return page
@@ -6,6 +6,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
 from app.api.deps import get_db_session
+from app.api.pagination import finish_page, page_limit, paginate
 from app.models.alert import Alert
 from app.models.client import Client
 from app.models.document import Document
@@ -14,6 +15,8 @@ from app.services.audit_log_service import log_event
 
 router = APIRouter(prefix="/alerts", tags=["alerts"])
 
+ALERT_SORT_KEY = ((Alert.alert_date, False), (Alert.id, True))
+
 
 @router.post("", response_model=AlertRead, status_code=status.HTTP_201_CREATED)
 async def create_alert(payload: AlertCreate, session: AsyncSession = Depends(get_db_session)) -> Alert:
@@ -36,10 +39,13 @@ async def create_alert(payload: AlertCreate, session: AsyncSession = Depends(get
 
 @router.get("", response_model=list[AlertRead])
 async def list_alerts(
+    response: Response,
     window_days: int | None = Query(default=None, description="30|60|90"),
     urgent_only: bool = Query(default=False),
     missing_documents: bool = Query(default=False),
     client_id: int | None = Query(default=None),
+    cursor: str | None = Query(default=None),
+    limit: int = Depends(page_limit),
     session: AsyncSession = Depends(get_db_session),
 ) -> list[Alert]:
     query = select(Alert).options(selectinload(Alert.document))
@@ -59,8 +65,8 @@ async def list_alerts(
             Document.pdf_path.is_(None)
         )
 
-    result = await session.scalars(query.order_by(Alert.alert_date.asc(), Alert.created_at.desc()))
-    return list(result)
+    result = await session.scalars(paginate(query, ALERT_SORT_KEY, cursor, limit))
+    return finish_page(list(result), ALERT_SORT_KEY, limit, response)
 
 
 @router.get("/{alert_id}", response_model=AlertRead)
@@ -98,7 +104,7 @@ async def update_alert(
 
     await session.commit()
     await session.refresh(alert, attribute_names=["document"])
-    log_event("update_alert", f"alert_id={alert.id}")
+    log_event("update_alert", f"alert_id={alert.id}, client_id={alert.client_id}")
     return alert
 
 
@@ -108,7 +114,8 @@ async def delete_alert(alert_id: int, session: AsyncSession = Depends(get_db_ses
     if alert is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Alerta no encontrada.")
 
+    client_id = alert.client_id
     await session.delete(alert)
     await session.commit()
-    log_event("delete_alert", f"alert_id={alert_id}")
+    log_event("delete_alert", f"alert_id={alert_id}, client_id={client_id}")
     return Response(status_code=status.HTTP_204_NO_CONTENT)
@@ -1,20 +1,25 @@
+import asyncio
 from datetime import date
 from pathlib import Path
 
 from fastapi import APIRouter, Depends, File, HTTPException, Query, Response, UploadFile, status
-from sqlalchemy import and_, exists, not_, or_, select
+from sqlalchemy import exists, or_, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.api.deps import get_db_session
-from app.models.alert import Alert
+from app.api.pagination import finish_page, page_limit, paginate
+from app.db.search_index import matching_client_ids, search_enabled
 from app.models.client import Client
 from app.models.document import Document, DocumentType
+from app.pdf_generator.thumbnails import warm_client_photo
 from app.schemas.client import ClientCreate, ClientRead, ClientUpdate
 from app.services.audit_log_service import log_event
-from app.services.storage_service import save_client_photo
+from app.services.storage_service import UploadTooLargeError, save_client_photo
 
 router = APIRouter(prefix="/clients", tags=["clients"])
 
+CLIENT_SORT_KEY = ((Client.created_at, True), (Client.id, True))
+
 
 @router.post("", response_model=ClientRead, status_code=status.HTTP_201_CREATED)
 async def create_client(
@@ -35,6 +40,7 @@ async def create_client(
 
 @router.get("", response_model=list[ClientRead])
 async def list_clients(
+    response: Response,
     q: str | None = Query(default=None),
     full_name: str | None = Query(default=None),
     nif: str | None = Query(default=None),
@@ -42,11 +48,15 @@ async def list_clients(
     phone: str | None = Query(default=None),
     course_number: str | None = Query(default=None),
     status_color: str | None = Query(default=None, description="green|yellow|red"),
+    cursor: str | None = Query(default=None),
+    limit: int = Depends(page_limit),
     session: AsyncSession = Depends(get_db_session),
 ) -> list[Client]:
     query = select(Client)
 
-    if q:
+    if q and search_enabled(session, q):
+        query = query.where(Client.id.in_(matching_client_ids(q)))
+    elif q:
         like = f"%{q}%"
         query = query.where(
             or_(
@@ -85,19 +95,17 @@ async def list_clients(
             )
         )
 
+    # Columnas resumen indexadas: mismo criterio que "tiene alguna alerta vencida / futura / ninguna".
     today = date.today()
     if status_color == "red":
-        query = query.where(exists(select(Alert.id).where(and_(Alert.client_id == Client.id, Alert.alert_date <= today))))
+        query = query.where(Client.earliest_alert_date <= today)
     elif status_color == "yellow":
-        query = query.where(
-            exists(select(Alert.id).where(and_(Alert.client_id == Client.id, Alert.alert_date > today)))
-        )
+        query = query.where(Client.latest_alert_date > today)
     elif status_color == "green":
-        query = query.where(not_(exists(select(Alert.id).where(Alert.client_id == Client.id))))
+        query = query.where(Client.alert_count == 0)
 
-    query = query.order_by(Client.created_at.desc())
-    result = await session.scalars(query)
-    return list(result)
+    result = await session.scalars(paginate(query, CLIENT_SORT_KEY, cursor, limit))
+    return finish_page(list(result), CLIENT_SORT_KEY, limit, response)
 
 
 @router.get("/{client_id}", response_model=ClientRead)
@@ -153,12 +161,17 @@ async def upload_client_photo(
     if not (is_image or is_pdf):
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Solo se permiten archivos de imagen o PDF.")
 
-    stored_path = save_client_photo(client.nif, photo)
-    client.photo_path = stored_path
+    try:
+        stored = await save_client_photo(photo)
+    except UploadTooLargeError as exc:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=str(exc)) from exc
+    client.photo_path = stored.path
 
     await session.commit()
     await session.refresh(client)
-    log_event("upload_client_photo", f"client_id={client.id}, file={stored_path}")
+    log_event("upload_client_photo", f"client_id={client.id}, file={stored.path}, sha256={stored.sha256}")
+    if is_image:
+        await asyncio.to_thread(warm_client_photo, stored.path)
     return client
 
 
@@ -5,16 +5,20 @@ from sqlalchemy import String, cast, or_, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.api.deps import get_db_session
+from app.api.pagination import finish_page, page_limit, paginate
+from app.db.search_index import matching_client_ids, matching_document_ids, search_enabled
 from app.models.alert import Alert
 from app.models.client import Client
 from app.models.document import Document, DocumentType, PaymentMethod
 from app.schemas.document import DocumentCreate, DocumentRead, DocumentUpdate
 from app.services.alert_service import calculate_alert_date
 from app.services.audit_log_service import log_event
-from app.services.storage_service import save_document_pdf
+from app.services.storage_service import UploadTooLargeError, save_document_pdf
 
 router = APIRouter(prefix="/documents", tags=["documents"])
 
+DOCUMENT_SORT_KEY = ((Document.created_at, True), (Document.id, True))
+
 DOC_TYPE_LABELS = {
     DocumentType.DNI: "DNI",
     DocumentType.DRIVING_LICENSE: "carnet de conducir",
@@ -212,12 +216,15 @@ async def create_document(payload: DocumentCreate, session: AsyncSession = Depen
 
 @router.get("", response_model=list[DocumentRead])
 async def list_documents(
+    response: Response,
     client_id: int | None = Query(default=None),
     doc_type: DocumentType | None = Query(default=None),
     expiration_status: str | None = Query(default=None, description="expired|expiring|ok"),
     expires_within_days: int | None = Query(default=None),
     missing_pdf: bool = Query(default=False),
     q: str | None = Query(default=None),
+    cursor: str | None = Query(default=None),
+    limit: int = Depends(page_limit),
     session: AsyncSession = Depends(get_db_session),
 ) -> list[Document]:
     query = select(Document)
@@ -240,7 +247,14 @@ async def list_documents(
     if expires_within_days is not None and expires_within_days > 0:
         query = query.where(Document.expiry_date.is_not(None), Document.expiry_date >= today, Document.expiry_date <= today + timedelta(days=expires_within_days))
 
-    if q:
+    if q and search_enabled(session, q):
+        query = query.where(
+            or_(
+                Document.client_id.in_(matching_client_ids(q, ("full_name", "nif"))),
+                Document.id.in_(matching_document_ids(q)),
+            )
+        )
+    elif q:
         like = f"%{q}%"
         query = query.join(Client, Client.id == Document.client_id).where(
             or_(
@@ -251,8 +265,8 @@ async def list_documents(
             )
         )
 
-    result = await session.scalars(query.order_by(Document.created_at.desc()))
-    return list(result)
+    result = await session.scalars(paginate(query, DOCUMENT_SORT_KEY, cursor, limit))
+    return finish_page(list(result), DOCUMENT_SORT_KEY, limit, response)
 
 
 @router.get("/{document_id}", response_model=DocumentRead)
@@ -297,7 +311,7 @@ async def update_document(
 
     await session.commit()
     await session.refresh(document)
-    log_event("update_document", f"document_id={document.id}")
+    log_event("update_document", f"document_id={document.id}, client_id={document.client_id}")
     return document
 
 
@@ -320,12 +334,15 @@ async def upload_document_file(
     if not document_file.filename.lower().endswith(".pdf"):
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Solo se permiten archivos PDF.")
 
-    stored_path = save_document_pdf(client.nif, document.doc_type.value, document_file)
-    document.pdf_path = stored_path
+    try:
+        stored = await save_document_pdf(document_file)
+    except UploadTooLargeError as exc:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=str(exc)) from exc
+    document.pdf_path = stored.path
 
     await session.commit()
     await session.refresh(document)
-    log_event("upload_document_pdf", f"document_id={document.id}, file={stored_path}")
+    log_event("upload_document_pdf", f"document_id={document.id}, client_id={document.client_id}, file={stored.path}, sha256={stored.sha256}")
     return document
 
 
@@ -335,7 +352,8 @@ async def delete_document(document_id: int, session: AsyncSession = Depends(get_
     if document is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Documento no encontrado.")
 
+    client_id = document.client_id
     await session.delete(document)
     await session.commit()
-    log_event("delete_document", f"document_id={document_id}")
+    log_event("delete_document", f"document_id={document_id}, client_id={client_id}")
     return Response(status_code=status.HTTP_204_NO_CONTENT)
@@ -1,111 +1,43 @@
 from __future__ import annotations
 
+import asyncio
+import tempfile
+from dataclasses import asdict
+from datetime import datetime, timezone
 from pathlib import Path
-from typing import Any
+from types import SimpleNamespace
+from typing import IO, Iterator
 
-from fastapi import APIRouter, Depends, File, HTTPException, UploadFile, status
-from fastapi.responses import FileResponse
+from fastapi import APIRouter, Depends, File, HTTPException, Query, Response, UploadFile, status
+from fastapi.responses import FileResponse, StreamingResponse
 from pydantic import BaseModel
-from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.api.deps import get_db_session
-from app.models.alert import Alert
-from app.models.client import Client
-from app.models.document import Document, DocumentType, PaymentMethod
-from app.pdf_generator import PdfGeneratorService
-from app.services.alert_service import calculate_alert_date
-from app.services.audit_log_service import log_event, read_recent_logs
-from app.services.importer_service import (
-    ImportValidationError,
-    SpreadsheetImporter,
-    parse_document_type,
-    parse_fundae_payment_type,
-    parse_payment_method,
-    to_bool,
-    to_date,
-)
+from app.api.pagination import NEXT_CURSOR_HEADER, decode_cursor_values, encode_cursor
+from app.db.search_index import create_search_index, search_index_status
+from app.pdf_generator.bulk import append_to_bundle, iter_report_job_batches, load_client_report_job, render_client_reports
+from app.pdf_generator.cache import active_report_cache
+from app.services.audit_log_service import format_entry, log_event, search_logs
+from app.services.client_import_service import ClientImportEngine
+from app.services.database_backup_service import database_backup
+from app.services.import_job_service import import_job_manager
+from app.services.importer_service import ImportValidationError, SpreadsheetImporter
+from app.services.storage_service import UploadTooLargeError, save_import_upload
 
 router = APIRouter(prefix="/tools", tags=["tools"])
 
 PROJECT_ROOT = Path(__file__).resolve().parents[3]
 CONFIG_ROOTS = [PROJECT_ROOT / "config", PROJECT_ROOT / "static/config"]
+EXPORTS_DIR = Path("storage/exports")
+BUNDLE_SPOOL_MAX_BYTES = 64 * 1024 * 1024
+BUNDLE_STREAM_CHUNK_SIZE = 256 * 1024
 
 
 class ConfigFileUpdate(BaseModel):
     content: str
 
 
-def _collect_document_expiry_dates(document: Document) -> list:
-    expiries: list = []
-    if document.doc_type == DocumentType.POWER_OF_ATTORNEY:
-        if document.flag_fran and document.expiry_fran:
-            expiries.append(document.expiry_fran)
-        if document.flag_ciusaba and document.expiry_ciusaba:
-            expiries.append(document.expiry_ciusaba)
-        return list(dict.fromkeys(expiries))
-
-    if document.expiry_date:
-        expiries.append(document.expiry_date)
-    return expiries
-
-
-def _none_if_blank(value: Any) -> Any:
-    if isinstance(value, str):
-        cleaned = value.strip()
-        return cleaned if cleaned else None
-    return value
-
-
-def _matches_nullable(column: Any, value: Any) -> Any:
-    return column.is_(None) if value is None else column == value
-
-
-async def _find_existing_document_for_import(
-    session: AsyncSession,
-    *,
-    client_id: int,
-    doc_type: DocumentType,
-    expiry_date: Any,
-    issue_date: Any,
-    birth_date: Any,
-    address: Any,
-    course_number: Any,
-    renewed_with_us: bool,
-    payment_method: Any,
-    fundae: bool,
-    fundae_payment_type: Any,
-    operation_number: Any,
-    flag_fran: bool,
-    flag_ciusaba: bool,
-    flag_permiso_c: bool,
-    flag_permiso_d: bool,
-    expiry_fran: Any,
-    expiry_ciusaba: Any,
-) -> Document | None:
-    query = select(Document).where(
-        Document.client_id == client_id,
-        Document.doc_type == doc_type,
-        _matches_nullable(Document.expiry_date, expiry_date),
-        _matches_nullable(Document.issue_date, issue_date),
-        _matches_nullable(Document.birth_date, birth_date),
-        _matches_nullable(Document.address, address),
-        _matches_nullable(Document.course_number, course_number),
-        Document.renewed_with_us == renewed_with_us,
-        _matches_nullable(Document.payment_method, payment_method),
-        Document.fundae == fundae,
-        _matches_nullable(Document.fundae_payment_type, fundae_payment_type),
-        _matches_nullable(Document.operation_number, operation_number),
-        Document.flag_fran == flag_fran,
-        Document.flag_ciusaba == flag_ciusaba,
-        Document.flag_permiso_c == flag_permiso_c,
-        Document.flag_permiso_d == flag_permiso_d,
-        _matches_nullable(Document.expiry_fran, expiry_fran),
-        _matches_nullable(Document.expiry_ciusaba, expiry_ciusaba),
-    )
-    return await session.scalar(query.limit(1))
-
-
 def _resolve_config_path(raw_path: str) -> Path:
     if not raw_path:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="El parametro path es obligatorio.")
@@ -176,308 +108,230 @@ async def download_import_template() -> FileResponse:
     return FileResponse(path, filename="clients_import_example.xlsx")
 
 
+async def _store_import_upload(file: UploadFile) -> Path:
+    if not file.filename:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Archivo vacio.")
+
+    try:
+        stored = await save_import_upload(file)
+    except UploadTooLargeError as exc:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=str(exc)) from exc
+    return Path(stored.path)
+
+
 @router.post("/import/clients")
 async def import_clients(
     file: UploadFile = File(...),
     session: AsyncSession = Depends(get_db_session),
 ) -> dict:
-    if not file.filename:
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Archivo vacio.")
-
-    upload_dir = Path("storage/imports")
-    upload_dir.mkdir(parents=True, exist_ok=True)
-    input_path = upload_dir / file.filename
+    input_path = await _store_import_upload(file)
 
-    with input_path.open("wb") as output:
-        output.write(await file.read())
-
-    importer = SpreadsheetImporter()
+    # Las filas se leen del fichero segun el motor las va consumiendo, por lotes.
+    rows = SpreadsheetImporter().iter_file(input_path)
     try:
-        rows = importer.import_file(input_path)
+        result = await ClientImportEngine(session).apply(rows)
     except ImportValidationError as exc:
         raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(exc)) from exc
-
-    clients_created = 0
-    clients_updated = 0
-    documents_created = 0
-    documents_skipped_existing = 0
-    documents_updated_existing = 0
-    errors: list[str] = []
-
-    for row in rows:
-        data = row.data
-        try:
-            nif = str(data.get("nif") or "").strip()
-            full_name = str(data.get("full_name") or "").strip()
-            phone = str(data.get("phone") or "").strip()
-            company_raw = data.get("company")
-            company = str(company_raw).strip() if company_raw is not None else None
-            if company == "":
-                company = None
-            email_raw = data.get("email")
-            email = str(email_raw).strip() if email_raw is not None else None
-            if email == "":
-                email = None
-
-            if not nif or not full_name:
-                errors.append(f"Fila {row.row_number}: faltan campos obligatorios.")
-                continue
-
-            client = await session.scalar(select(Client).where(Client.nif == nif))
-            if client is None:
-                client = Client(full_name=full_name, nif=nif, phone=phone, company=company, email=email)
-                session.add(client)
-                await session.flush()
-                clients_created += 1
-            else:
-                client.full_name = full_name
-                if phone:
-                    client.phone = phone
-                if company is not None:
-                    client.company = company
-                if email is not None:
-                    client.email = email
-                clients_updated += 1
-
-            doc_type = parse_document_type(data.get("document_type"))
-            expiry_date = to_date(data.get("expiry_date"))
-            if doc_type:
-                renewed_with_us = to_bool(data.get("renewed_with_us") or data.get("renovado_con_nosotros"))
-                raw_payment_method = data.get("payment_method") or data.get("forma_pago") or data.get("forma de pago")
-                payment_method = parse_payment_method(raw_payment_method)
-                fundae = to_bool(data.get("fundae") or data.get("fundae_flag") or data.get("flag_fundae"))
-                if isinstance(raw_payment_method, str) and raw_payment_method.strip().lower() == "fundae":
-                    payment_method = PaymentMethod.EMPRESA
-                    fundae = True
-                fundae_payment_type = parse_fundae_payment_type(
-                    data.get("fundae_payment_type") or data.get("fundae_tipo_pago") or data.get("fundae tipo pago")
-                )
-                operation_number_raw = (
-                    data.get("operation_number") or data.get("numero_operacion") or data.get("numero de operacion")
-                )
-                operation_number = str(operation_number_raw).strip() if operation_number_raw else None
-                if operation_number == "":
-                    operation_number = None
-
-                if doc_type not in {DocumentType.CAP, DocumentType.TACHOGRAPH_CARD}:
-                    renewed_with_us = False
-                    payment_method = None
-                    fundae = False
-                    fundae_payment_type = None
-                    operation_number = None
-                elif not renewed_with_us:
-                    payment_method = None
-                    fundae = False
-                    fundae_payment_type = None
-                    operation_number = None
-                elif payment_method is None:
-                    errors.append(f"Fila {row.row_number}: renovado con nosotros requiere forma de pago.")
-                    continue
-                elif payment_method != PaymentMethod.EMPRESA:
-                    fundae = False
-                    fundae_payment_type = None
-                    operation_number = None
-
-                if doc_type not in {DocumentType.POWER_OF_ATTORNEY, DocumentType.DRIVING_LICENSE} and not expiry_date:
-                    errors.append(f"Fila {row.row_number}: falta la fecha de caducidad del documento.")
-                    continue
-
-                flag_fran = to_bool(data.get("flag_fran"))
-                flag_ciusaba = to_bool(data.get("flag_ciusaba"))
-                flag_permiso_c = to_bool(data.get("flag_permiso_c") or data.get("permiso_c") or data.get("flag_c"))
-                flag_permiso_d = to_bool(data.get("flag_permiso_d") or data.get("permiso_d") or data.get("flag_d"))
-                expiry_fran = to_date(data.get("expiry_fran"))
-                expiry_ciusaba = to_date(data.get("expiry_ciusaba"))
-                if doc_type != DocumentType.DRIVING_LICENSE:
-                    flag_permiso_c = False
-                    flag_permiso_d = False
-                if doc_type == DocumentType.POWER_OF_ATTORNEY:
-                    has_valid_expiry = (flag_fran and expiry_fran) or (flag_ciusaba and expiry_ciusaba)
-                    if not has_valid_expiry:
-                        errors.append(
-                            f"Fila {row.row_number}: en poder notarial debe existir Apoderamiento Fran o Apoderamiento CIUSABA con su fecha de caducidad."
-                        )
-                        continue
-
-                issue_date = to_date(data.get("issue_date"))
-                birth_date = to_date(data.get("birth_date"))
-                address = _none_if_blank(data.get("address"))
-                course_number = _none_if_blank(data.get("course_number"))
-
-                if doc_type == DocumentType.DRIVING_LICENSE:
-                    existing_license = await session.scalar(
-                        select(Document).where(
-                            Document.client_id == client.id,
-                            Document.doc_type == DocumentType.DRIVING_LICENSE,
-                        )
-                    )
-                    if existing_license is not None:
-                        merged_c = bool(existing_license.flag_permiso_c) or flag_permiso_c
-                        merged_d = bool(existing_license.flag_permiso_d) or flag_permiso_d
-                        changed = False
-                        if merged_c != existing_license.flag_permiso_c:
-                            existing_license.flag_permiso_c = merged_c
-                            changed = True
-                        if merged_d != existing_license.flag_permiso_d:
-                            existing_license.flag_permiso_d = merged_d
-                            changed = True
-                        if changed:
-                            documents_updated_existing += 1
-                        else:
-                            documents_skipped_existing += 1
-                        continue
-
-                existing_document = await _find_existing_document_for_import(
-                    session,
-                    client_id=client.id,
-                    doc_type=doc_type,
-                    expiry_date=expiry_date,
-                    issue_date=issue_date,
-                    birth_date=birth_date,
-                    address=address,
-                    course_number=course_number,
-                    renewed_with_us=renewed_with_us,
-                    payment_method=payment_method,
-                    fundae=fundae,
-                    fundae_payment_type=fundae_payment_type,
-                    operation_number=operation_number,
-                    flag_fran=flag_fran,
-                    flag_ciusaba=flag_ciusaba,
-                    flag_permiso_c=flag_permiso_c,
-                    flag_permiso_d=flag_permiso_d,
-                    expiry_fran=expiry_fran,
-                    expiry_ciusaba=expiry_ciusaba,
-                )
-                if existing_document is not None:
-                    documents_skipped_existing += 1
-                    continue
-
-                doc = Document(
-                    client_id=client.id,
-                    doc_type=doc_type,
-                    expiry_date=expiry_date,
-                    issue_date=issue_date,
-                    birth_date=birth_date,
-                    address=address,
-                    course_number=course_number,
-                    renewed_with_us=renewed_with_us,
-                    payment_method=payment_method,
-                    fundae=fundae,
-                    fundae_payment_type=fundae_payment_type,
-                    operation_number=operation_number,
-                    flag_fran=flag_fran,
-                    flag_ciusaba=flag_ciusaba,
-                    flag_permiso_c=flag_permiso_c,
-                    flag_permiso_d=flag_permiso_d,
-                    expiry_fran=expiry_fran,
-                    expiry_ciusaba=expiry_ciusaba,
-                )
-                session.add(doc)
-                await session.flush()
-                for due_date in _collect_document_expiry_dates(doc):
-                    existing_alert = await session.scalar(
-                        select(Alert).where(
-                            Alert.document_id == doc.id,
-                            Alert.expiry_date == due_date,
-                        )
-                    )
-                    if existing_alert is None:
-                        session.add(
-                            Alert(
-                                client_id=client.id,
-                                document_id=doc.id,
-                                expiry_date=due_date,
-                                alert_date=calculate_alert_date(due_date),
-                            )
-                        )
-                documents_created += 1
-        except Exception as exc:  # noqa: BLE001
-            errors.append(f"Fila {row.row_number}: {exc}")
-
+    finally:
+        rows.close()
+        input_path.unlink(missing_ok=True)
     await session.commit()
     log_event(
         "import_clients",
         (
-            f"created={clients_created}, updated={clients_updated}, docs={documents_created}, "
-            f"docs_skipped_existing={documents_skipped_existing}, docs_updated_existing={documents_updated_existing}, "
-            f"errors={len(errors)}"
+            f"created={result.clients_created}, updated={result.clients_updated}, docs={result.documents_created}, "
+            f"docs_skipped_existing={result.documents_skipped_existing}, "
+            f"docs_updated_existing={result.documents_updated_existing}, errors={len(result.errors)}"
         ),
     )
 
-    return {
-        "clients_created": clients_created,
-        "clients_updated": clients_updated,
-        "documents_created": documents_created,
-        "documents_skipped_existing": documents_skipped_existing,
-        "documents_updated_existing": documents_updated_existing,
-        "errors": errors,
-    }
+    return asdict(result)
+
+
+@router.post("/import/jobs", status_code=status.HTTP_202_ACCEPTED)
+async def create_import_job(file: UploadFile = File(...)) -> dict:
+    input_path = await _store_import_upload(file)
+    if input_path.suffix.lower() not in SpreadsheetImporter.SUPPORTED_SUFFIXES:
+        input_path.unlink(missing_ok=True)
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"Tipo de archivo no soportado: {input_path.suffix}",
+        )
+
+    # El trabajo borra el fichero subido al terminar, sea cual sea el resultado.
+    job = import_job_manager.submit(input_path, filename=Path(file.filename).name)
+    log_event("create_import_job", f"job_id={job.id}, file={input_path.as_posix()}")
+    return job.to_dict()
+
+
+@router.get("/import/jobs")
+async def list_import_jobs() -> dict:
+    return {"jobs": [job.to_dict() for job in import_job_manager.list_jobs()]}
+
+
+@router.get("/import/jobs/{job_id}")
+async def get_import_job(job_id: str) -> dict:
+    job = import_job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Trabajo de importacion no encontrado.")
+    return job.to_dict()
+
+
+@router.post("/import/jobs/{job_id}/cancel")
+async def cancel_import_job(job_id: str) -> dict:
+    job = import_job_manager.cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Trabajo de importacion no encontrado.")
+    log_event("cancel_import_job", f"job_id={job_id}")
+    return job.to_dict()
 
 
 @router.post("/pdf/client/{client_id}")
 async def generate_client_pdf(client_id: int, session: AsyncSession = Depends(get_db_session)) -> dict:
-    client = await session.get(Client, client_id)
-    if client is None:
+    job = await load_client_report_job(session, client_id)
+    if job is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Cliente no encontrado.")
 
-    docs = list(await session.scalars(select(Document).where(Document.client_id == client_id).order_by(Document.created_at.asc())))
-    alerts = list(await session.scalars(select(Alert).where(Alert.client_id == client_id).order_by(Alert.alert_date.asc(), Alert.created_at.asc())))
+    # ReportLab/pypdf se cargan con el primer PDF, no al arrancar la aplicacion.
+    from app.pdf_generator.service import PdfGeneratorService
 
+    rendered = await render_client_reports([job], cache=active_report_cache())
     service = PdfGeneratorService()
-    output_name = service.default_output_name(prefix=f"cliente_{client.nif}")
-    output_path = Path("storage/exports") / output_name
-    generated = service.generate_client_report(
-        output_path=output_path,
-        client=client,
-        documents=docs,
-        alerts=alerts,
-    )
+    generated = EXPORTS_DIR / service.default_output_name(prefix=f"cliente_{job.client['nif']}")
+    generated.parent.mkdir(parents=True, exist_ok=True)
+    await asyncio.to_thread(service.write_client_report, generated, rendered.reports[0], SimpleNamespace(**job.client))
     log_event(
         "generate_client_pdf",
-        f"client_id={client_id}, documents={len(docs)}, alerts={len(alerts)}, output={generated.as_posix()}",
+        (
+            f"client_id={client_id}, documents={len(job.documents)}, alerts={len(job.alerts)}, "
+            f"cached={bool(rendered.cache_hits)}, output={generated.as_posix()}"
+        ),
     )
 
     return {"path": generated.as_posix(), "filename": generated.name}
 
 
+def _iter_spooled_file(spooled: IO[bytes]) -> Iterator[bytes]:
+    try:
+        spooled.seek(0)
+        while chunk := spooled.read(BUNDLE_STREAM_CHUNK_SIZE):
+            yield chunk
+    finally:
+        spooled.close()
+
+
 @router.post("/pdf/bulk")
-async def generate_bulk_pdf(session: AsyncSession = Depends(get_db_session)) -> dict:
-    service = PdfGeneratorService()
-    clients = list(await session.scalars(select(Client).order_by(Client.created_at.asc())))
-    if not clients:
+async def generate_bulk_pdf(session: AsyncSession = Depends(get_db_session)) -> StreamingResponse:
+    from app.pdf_generator.service import PdfGeneratorService, ReportBundle
+
+    bundle = ReportBundle()
+    cache_hits = 0
+    cache_misses = 0
+    async for jobs in iter_report_job_batches(session):
+        rendered = await render_client_reports(jobs, cache=active_report_cache())
+        await asyncio.to_thread(append_to_bundle, bundle, jobs, rendered)
+        cache_hits += rendered.cache_hits
+        cache_misses += rendered.cache_misses
+
+    if not bundle.reports:
         raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail="No hay clientes disponibles.")
 
-    individual_reports: list[Path] = []
-    for client in clients:
-        docs = list(await session.scalars(select(Document).where(Document.client_id == client.id).order_by(Document.created_at.asc())))
-        alerts = list(await session.scalars(select(Alert).where(Alert.client_id == client.id).order_by(Alert.alert_date.asc(), Alert.created_at.asc())))
-
-        report_name = service.default_output_name(prefix=f"cliente_{client.nif}")
-        report_path = Path("storage/exports") / "bulk_parts" / report_name
-        generated_report = service.generate_client_report(
-            output_path=report_path,
-            client=client,
-            documents=docs,
-            alerts=alerts,
-        )
-        individual_reports.append(generated_report)
-
-    output_name = service.default_output_name(prefix="bulk_renovaciones")
-    output_path = Path("storage/exports") / output_name
-    generated_bundle = service.generate_bundle(output_path=output_path, ordered_files=individual_reports)
+    # Se escribe en memoria y solo pasa a un temporal en disco si el PDF es grande.
+    spooled = tempfile.SpooledTemporaryFile(max_size=BUNDLE_SPOOL_MAX_BYTES)
+    await asyncio.to_thread(bundle.write, spooled)
+    filename = PdfGeneratorService().default_output_name(prefix="bulk_renovaciones")
     log_event(
         "generate_bulk_pdf",
-        f"clients={len(clients)}, reports={len(individual_reports)}, output={generated_bundle.as_posix()}",
+        f"clients={bundle.reports}, cache_hits={cache_hits}, cache_misses={cache_misses}, filename={filename}",
+    )
+
+    return StreamingResponse(
+        _iter_spooled_file(spooled),
+        media_type="application/pdf",
+        headers={
+            "Content-Disposition": f'attachment; filename="{filename}"',
+            "X-Report-Clients": str(bundle.reports),
+            "X-Cache-Hits": str(cache_hits),
+            "X-Cache-Misses": str(cache_misses),
+        },
     )
 
-    return {
-        "path": generated_bundle.as_posix(),
-        "filename": generated_bundle.name,
-        "clients": len(clients),
-        "reports": len(individual_reports),
-    }
+
+@router.get("/backup/database")
+async def get_database_backup_status() -> dict:
+    return database_backup.status.to_dict()
+
+
+@router.post("/backup/database", status_code=status.HTTP_202_ACCEPTED)
+async def start_database_backup() -> dict:
+    if database_backup.db_path is None:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="La copia en caliente solo esta disponible para bases de datos SQLite.",
+        )
+    if not database_backup.start("manual"):
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Ya hay una copia de la base de datos en curso.")
+    log_event("start_database_backup", "trigger=manual")
+    return database_backup.status.to_dict()
+
+
+@router.get("/search-index")
+async def get_search_index_status(session: AsyncSession = Depends(get_db_session)) -> dict:
+    return await session.run_sync(lambda sync_session: search_index_status(sync_session.connection()))
+
+
+@router.post("/search-index/rebuild")
+async def rebuild_search_index(session: AsyncSession = Depends(get_db_session)) -> dict:
+    if not await session.run_sync(lambda sync_session: create_search_index(sync_session.connection())):
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="La busqueda FTS5 solo esta disponible con SQLite 3.34 o posterior.",
+        )
+    await session.commit()
+    result = await session.run_sync(lambda sync_session: search_index_status(sync_session.connection()))
+    log_event("search_index_rebuilt", f"clients={result['clients']}, documents={result['documents']}")
+    return result
+
+
+def _utc_naive(value: datetime | None) -> datetime | None:
+    # El log guarda UTC sin zona horaria.
+    if value is None or value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
 
 
 @router.get("/logs")
-async def get_system_logs(limit: int = 200) -> dict:
-    return {"lines": read_recent_logs(limit=limit)}
+async def get_system_logs(
+    response: Response,
+    limit: int = Query(default=200, ge=1, le=1000),
+    action: str | None = Query(default=None),
+    client_id: int | None = Query(default=None),
+    since: datetime | None = Query(default=None, description="UTC, ISO 8601"),
+    until: datetime | None = Query(default=None, description="UTC, ISO 8601"),
+    cursor: str | None = Query(default=None),
+) -> dict:
+    position = None
+    if cursor:
+        name, offset = decode_cursor_values(cursor, 2)
+        if not isinstance(name, str) or not isinstance(offset, int) or offset < 0:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Cursor no valido.")
+        position = (name, offset)
+    try:
+        page = await asyncio.to_thread(
+            search_logs,
+            limit,
+            action=action,
+            client_id=client_id,
+            since=_utc_naive(since),
+            until=_utc_naive(until),
+            position=position,
+        )
+    except ValueError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Cursor no valido.") from exc
+    if page.next_position:
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(list(page.next_position))
+    # "lines" (texto, de antiguo a reciente) es lo que muestra el panel de administracion.
+    return {
+        "entries": page.entries,
+        "lines": [format_entry(entry) for entry in reversed(page.entries)],
+    }
@@ -16,11 +16,41 @@ class Settings(BaseSettings):
     )
     scheduler_enabled: bool = True
     reset_db_on_startup: bool = False
-    auto_reset_sqlite_on_schema_mismatch: bool = True
+    auto_reset_sqlite_on_schema_mismatch: bool = Field(
+        default=True,
+        description="Solo para bases SQLite anteriores a las migraciones a las que les faltan columnas base: se rehacen desde cero.",
+    )
     backup_on_startup: bool = True
     backup_keep_last: int = 30
+    backup_scheduled: bool = Field(default=True, description="Copia de la BD cada noche junto con el job de alertas.")
+    backup_pages_per_step: int = 1024
+    backup_step_sleep_ms: int = 20
     storage_backup_on_startup: bool = True
     storage_backup_keep_last: int = 30
+    import_commit_chunk_size: int = 500
+    upload_max_mb: int = Field(default=25, description="Tamano maximo de fotos y PDF de documentos.")
+    import_upload_max_mb: int = 50
+    pdf_workers: int = Field(default=0, description="Procesos para el PDF masivo. 0 = numero de CPUs.")
+    pdf_batch_size: int = 200
+    pdf_cache_enabled: bool = True
+    pdf_cache_max_mb: int = 512
+    pdf_thumbnail_dpi: int = Field(default=150, description="Resolucion de las fotos reducidas que se incrustan en los informes.")
+    pdf_thumbnail_cache_max_mb: int = Field(
+        default=256,
+        description="Tamano maximo de storage/exports/thumbnails/; se borran primero las miniaturas usadas hace mas tiempo.",
+    )
+    dashboard_cache_ttl_seconds: int = 30
+    log_max_mb: int = Field(default=10, description="Tamano a partir del cual se rota storage/logs/app.log. 0 = sin limite.")
+    log_rotate_hours: int = Field(default=24, description="Antiguedad maxima de app.log antes de rotarlo. 0 = sin rotacion por tiempo.")
+    log_keep_files: int = 14
+    slow_query_ms: int = Field(default=200, description="Consultas SQL mas lentas que esto se anotan en el log. 0 = desactivado.")
+    sqlite_journal_mode: str = Field(default="WAL", description="WAL deja leer mientras otra conexion escribe.")
+    sqlite_synchronous: str = Field(default="NORMAL", description="Con WAL, NORMAL solo puede perder las ultimas transacciones ante un corte de luz.")
+    sqlite_cache_size_kb: int = 65536
+    sqlite_mmap_size_mb: int = Field(default=256, description="Lecturas de la BD mapeadas en memoria. 0 = desactivado.")
+    sqlite_temp_store_memory: bool = True
+    sqlite_busy_timeout_ms: int = Field(default=30000, description="Espera maxima por un bloqueo antes de fallar con database is locked.")
+    sqlite_checkpoint_minutes: int = Field(default=60, description="Cada cuanto se vuelca el WAL a la BD y se ejecuta PRAGMA optimize. 0 = solo en el job diario.")
 
     model_config = SettingsConfigDict(
         env_file=".env",
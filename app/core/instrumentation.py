@@ -0,0 +1,244 @@
+"""Request latency and database query metrics, exposed in Prometheus text format.
+
+``InstrumentationMiddleware`` times every HTTP request per route template, and the
+cursor hooks installed by ``instrument_engine`` time every SQL statement. Statements
+run while a request is being served are also added to that request, so ``/metrics``
+shows both how many queries a route runs and how long they take.
+"""
+
+from __future__ import annotations
+
+import bisect
+import threading
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Any, Iterable
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.core.config import get_settings
+
+settings = get_settings()
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+SLOW_QUERY_STATEMENT_CHARS = 500
+UNMATCHED_ROUTE = "<unmatched>"
+_QUERY_START_KEY = "instrumentation_query_start"
+
+
+class Histogram:
+    def __init__(self, buckets: Iterable[float]) -> None:
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.total += value
+        self.count += 1
+
+
+@dataclass
+class RequestStats:
+    path: str = ""
+    route: str = UNMATCHED_ROUTE
+    queries: int = 0
+    query_seconds: float = 0.0
+
+
+_current_request: ContextVar[RequestStats | None] = ContextVar("current_request", default=None)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names: tuple[str, ...], values: tuple[str, ...], extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class MetricsRegistry:
+    """In-process counters and histograms; every method is safe to call from any thread."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.request_seconds: dict[tuple[str, str, str], Histogram] = {}
+            self.request_queries: dict[tuple[str, str], Histogram] = {}
+            self.request_query_seconds: dict[tuple[str, str], Histogram] = {}
+            self.query_seconds = Histogram(LATENCY_BUCKETS)
+            self.slow_queries = 0
+
+    def observe_request(self, method: str, stats: RequestStats, status_code: int, seconds: float) -> None:
+        with self._lock:
+            key = (method, stats.route)
+            self.request_seconds.setdefault((*key, str(status_code)), Histogram(LATENCY_BUCKETS)).observe(seconds)
+            self.request_queries.setdefault(key, Histogram(QUERY_COUNT_BUCKETS)).observe(stats.queries)
+            self.request_query_seconds.setdefault(key, Histogram(LATENCY_BUCKETS)).observe(stats.query_seconds)
+
+    def observe_query(self, seconds: float, slow: bool) -> None:
+        with self._lock:
+            self.query_seconds.observe(seconds)
+            if slow:
+                self.slow_queries += 1
+
+    def render(self) -> str:
+        lines: list[str] = []
+        with self._lock:
+            self._render_histograms(
+                lines,
+                "http_request_duration_seconds",
+                "Duracion de las peticiones HTTP por ruta.",
+                ("method", "route", "status"),
+                self.request_seconds,
+            )
+            self._render_histograms(
+                lines,
+                "http_request_db_queries",
+                "Consultas SQL ejecutadas por peticion.",
+                ("method", "route"),
+                self.request_queries,
+            )
+            self._render_histograms(
+                lines,
+                "http_request_db_duration_seconds",
+                "Tiempo total en consultas SQL por peticion.",
+                ("method", "route"),
+                self.request_query_seconds,
+            )
+            self._render_histograms(
+                lines, "db_query_duration_seconds", "Duracion de cada consulta SQL.", (), {(): self.query_seconds}
+            )
+            lines.append("# HELP db_slow_queries_total Consultas por encima de SLOW_QUERY_MS.")
+            lines.append("# TYPE db_slow_queries_total counter")
+            lines.append(f"db_slow_queries_total {self.slow_queries}")
+        return "\n".join(lines) + "\n"
+
+    @staticmethod
+    def _render_histograms(
+        lines: list[str],
+        name: str,
+        help_text: str,
+        label_names: tuple[str, ...],
+        histograms: dict[Any, Histogram],
+    ) -> None:
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} histogram")
+        for label_values, histogram in sorted(histograms.items()):
+            cumulative = 0
+            for bound, count in zip((*histogram.buckets, "+Inf"), histogram.counts):
+                cumulative += count
+                le = bound if isinstance(bound, str) else f"{bound:g}"
+                bucket_labels = _labels(label_names, label_values, 'le="' + le + '"')
+                lines.append(f"{name}_bucket{bucket_labels} {cumulative}")
+            lines.append(f"{name}_sum{_labels(label_names, label_values)} {histogram.total:.6f}")
+            lines.append(f"{name}_count{_labels(label_names, label_values)} {histogram.count}")
+
+
+metrics = MetricsRegistry()
+
+
+def _route_template(scope: dict[str, Any]) -> str:
+    """The matched route as a template (/api/v1/clients/{client_id}): one series per endpoint, not per URL."""
+    route = scope.get("route")
+    path_format = getattr(route, "path_format", None)
+    if not path_format:
+        return UNMATCHED_ROUTE
+    # La ruta de un router incluido no lleva el prefijo: se recupera de la URL real.
+    path = scope.get("path", "")
+    try:
+        rendered = path_format.format(**scope.get("path_params", {}))
+    except (KeyError, IndexError, ValueError):
+        return path_format
+    if rendered and path.endswith(rendered):
+        return path[: len(path) - len(rendered)] + path_format
+    return path_format
+
+
+class InstrumentationMiddleware:
+    """Pure ASGI middleware: it does not buffer bodies, so streamed PDFs stay streamed."""
+
+    def __init__(self, app: Any) -> None:
+        self.app = app
+
+    async def __call__(self, scope: dict[str, Any], receive: Any, send: Any) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats(path=scope.get("path", ""))
+        token = _current_request.set(stats)
+        status_code = 500
+        started = time.perf_counter()
+
+        async def send_wrapper(message: dict[str, Any]) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current_request.reset(token)
+            stats.route = _route_template(scope)
+            metrics.observe_request(scope["method"], stats, status_code, time.perf_counter() - started)
+
+
+def _before_cursor_execute(conn: Any, cursor: Any, statement: str, parameters: Any, context: Any, executemany: bool) -> None:
+    conn.info.setdefault(_QUERY_START_KEY, []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn: Any, cursor: Any, statement: str, parameters: Any, context: Any, executemany: bool) -> None:
+    starts = conn.info.get(_QUERY_START_KEY)
+    if not starts:
+        return
+    seconds = time.perf_counter() - starts.pop()
+    stats = _current_request.get()
+    if stats is not None:
+        stats.queries += 1
+        stats.query_seconds += seconds
+
+    threshold = settings.slow_query_ms
+    slow = threshold > 0 and seconds * 1000 >= threshold
+    metrics.observe_query(seconds, slow)
+    if slow:
+        # Importado aqui: app.services importa app.db.session, que instala estos hooks al cargarse.
+        from app.services.audit_log_service import log_event
+
+        compact = " ".join(statement.split())[:SLOW_QUERY_STATEMENT_CHARS]
+        path = stats.path if stats is not None else "-"
+        log_event("slow_query", f"ms={seconds * 1000:.1f}, path={path}, statement={compact}")
+
+
+def _handle_error(context: Any) -> None:
+    # Una sentencia que falla no llega a after_cursor_execute: se quita aqui su inicio para que la pila
+    # de la conexion (que vuelve al pool) no desplace la medicion de las siguientes.
+    connection = context.connection
+    if connection is None or context.execution_context is None:
+        return
+    starts = connection.info.get(_QUERY_START_KEY)
+    if starts:
+        starts.pop()
+
+
+def instrument_engine(engine: Engine | AsyncEngine) -> None:
+    sync_engine = engine.sync_engine if isinstance(engine, AsyncEngine) else engine
+    for name, listener in (
+        ("before_cursor_execute", _before_cursor_execute),
+        ("after_cursor_execute", _after_cursor_execute),
+        ("handle_error", _handle_error),
+    ):
+        if not event.contains(sync_engine, name, listener):
+            event.listen(sync_engine, name, listener)
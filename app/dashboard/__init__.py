@@ -1,3 +1,3 @@
-from app.dashboard.metrics import DashboardMetrics
+from app.dashboard.metrics import DashboardMetrics, DashboardMetricsCache, dashboard_metrics
 
-__all__ = ["DashboardMetrics"]
+__all__ = ["DashboardMetrics", "DashboardMetricsCache", "dashboard_metrics"]
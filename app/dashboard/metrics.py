@@ -1,5 +1,101 @@
+from __future__ import annotations
+
+import time
+from datetime import date, timedelta
+from typing import Any
+
+from sqlalchemy import case, event, func, select, true
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core.config import get_settings
+from app.models.alert import Alert
+from app.models.document import Document
 from app.schemas.reporting import DashboardSummary
 
+settings = get_settings()
 
-# Placeholder for future service-layer dashboard aggregation logic.
 DashboardMetrics = DashboardSummary
+
+
+def _count_where(condition: Any):
+    return func.coalesce(func.sum(case((condition, 1), else_=0)), 0)
+
+
+def dashboard_summary_query(today: date):
+    """Every dashboard counter in one statement: one aggregate row per table, cross joined."""
+    upcoming = Document.expiry_date.is_not(None) & (Document.expiry_date >= today)
+    documents = select(
+        _count_where(upcoming & (Document.expiry_date <= today + timedelta(days=30))).label("due_in_30_days"),
+        _count_where(upcoming & (Document.expiry_date <= today + timedelta(days=60))).label("due_in_60_days"),
+        _count_where(upcoming & (Document.expiry_date <= today + timedelta(days=90))).label("due_in_90_days"),
+        _count_where(Document.expiry_date.is_not(None) & (Document.expiry_date < today)).label("documents_expired"),
+        _count_where(Document.pdf_path.is_(None)).label("documents_missing_pdf"),
+        func.count(Document.id).label("documents_total"),
+    ).subquery("document_counts")
+    alerts = select(
+        func.count(Alert.id).label("alerts_total"),
+        _count_where(Alert.alert_date <= today).label("alerts_due_today_or_older"),
+    ).subquery("alert_counts")
+    return select(documents, alerts).select_from(documents.join(alerts, true()))
+
+
+class DashboardMetricsCache:
+    """Short-lived in-process copy of the dashboard counters.
+
+    Any commit that touches documents or alerts drops it (see the session hooks
+    below); writes that bypass the ORM must call ``invalidate`` themselves. Each
+    ``invalidate`` bumps a generation counter, and a result is only stored if no
+    invalidation happened while it was being computed.
+    """
+
+    def __init__(self, ttl_seconds: float | None = None) -> None:
+        self.ttl_seconds = ttl_seconds if ttl_seconds is not None else settings.dashboard_cache_ttl_seconds
+        self._summary: DashboardSummary | None = None
+        self._computed_for: date | None = None
+        self._expires_at = 0.0
+        self._generation = 0
+
+    async def get(self, session: AsyncSession) -> DashboardSummary:
+        today = date.today()
+        if self._summary is not None and self._computed_for == today and time.monotonic() < self._expires_at:
+            return self._summary
+
+        generation = self._generation
+        row = (await session.execute(dashboard_summary_query(today))).one()
+        summary = DashboardSummary(**row._mapping)
+        # Si otra peticion confirmo cambios mientras se contaba, este resultado puede ser anterior a ellos.
+        if generation == self._generation:
+            self._summary = summary
+            self._computed_for = today
+            self._expires_at = time.monotonic() + self.ttl_seconds
+        return summary
+
+    def invalidate(self) -> None:
+        self._generation += 1
+        self._summary = None
+
+
+dashboard_metrics = DashboardMetricsCache()
+
+_DIRTY_KEY = "dashboard_metrics_dirty"
+_TRACKED_MODELS = (Document, Alert)
+
+
+@event.listens_for(Session, "after_flush")
+def _mark_dashboard_dirty(session: Session, flush_context: Any) -> None:
+    for instance in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(instance, _TRACKED_MODELS):
+            session.info[_DIRTY_KEY] = True
+            return
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_on_commit(session: Session) -> None:
+    if session.info.pop(_DIRTY_KEY, False):
+        dashboard_metrics.invalidate()
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_on_rollback(session: Session) -> None:
+    session.info.pop(_DIRTY_KEY, None)
@@ -0,0 +1,223 @@
+"""Numbered schema migrations, tracked in the one-row ``schema_version`` table.
+
+A new database is created from the models and stamped with ``LATEST_VERSION``; an
+existing one only runs the steps above its version, each in its own transaction, so
+adding a column or an index no longer means dropping the tables and re-importing.
+
+To change the schema: update the model and append a step to ``MIGRATIONS``. Steps
+must tolerate a database that already has part of the change (the ones created
+before versioning existed are migrated from version 0).
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable
+
+from sqlalchemy import Column, Connection, Integer, Table, delete, insert, inspect, select
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.db.base import Base
+from app.db.search_index import create_search_index
+from app.services.audit_log_service import log_event
+from app.services.client_status_service import refresh_client_status
+from app.services.storage_service import migrate_files_to_blobs
+
+schema_version = Table("schema_version", Base.metadata, Column("version", Integer, nullable=False))
+
+# Columnas que ya tenia la primera version de las tablas: sin ellas la base no se puede migrar.
+BASELINE_COLUMNS = {
+    "clients": {"id", "full_name", "company", "photo_path", "nif", "phone", "email", "created_at"},
+    "documents": {
+        "id",
+        "client_id",
+        "doc_type",
+        "expiry_date",
+        "issue_date",
+        "birth_date",
+        "address",
+        "pdf_path",
+        "course_number",
+        "renewed_with_us",
+        "payment_method",
+        "fundae",
+        "fundae_payment_type",
+        "operation_number",
+        "flag_fran",
+        "flag_ciusaba",
+        "flag_permiso_c",
+        "flag_permiso_d",
+        "expiry_fran",
+        "expiry_ciusaba",
+        "created_at",
+    },
+    "alerts": {"id", "client_id", "document_id", "expiry_date", "alert_date", "created_at"},
+}
+
+REDUNDANT_INDEXES = (
+    "ix_documents_client_id",
+    "ix_documents_expiry_date",
+    "ix_alerts_client_id",
+    "ix_alerts_document_id",
+    "ix_alerts_alert_date",
+)
+
+
+class SchemaVersionError(RuntimeError):
+    pass
+
+
+@dataclass(frozen=True)
+class Migration:
+    version: int
+    description: str
+    upgrade: Callable[[Connection], Any]
+    # Recibe lo que devuelve ``upgrade``, una vez confirmada la transaccion.
+    after_commit: Callable[[Any], None] | None = None
+
+
+def _add_columns(connection: Connection, table: str, columns: dict[str, str]) -> None:
+    existing = {column["name"] for column in inspect(connection).get_columns(table)}
+    for name, ddl in columns.items():
+        if name not in existing:
+            connection.exec_driver_sql(f"ALTER TABLE {table} ADD COLUMN {name} {ddl}")
+
+
+def _create_indexes(connection: Connection, *names: str) -> None:
+    indexes = {index.name: index for table in Base.metadata.sorted_tables for index in table.indexes}
+    for name in names:
+        indexes[name].create(connection, checkfirst=True)
+
+
+def _client_status_summary(connection: Connection) -> None:
+    _add_columns(
+        connection,
+        "clients",
+        {
+            "earliest_alert_date": "DATE",
+            "latest_alert_date": "DATE",
+            "alert_count": "INTEGER NOT NULL DEFAULT 0",
+        },
+    )
+    _create_indexes(
+        connection,
+        "ix_clients_earliest_alert_date",
+        "ix_clients_latest_alert_date",
+        "ix_clients_alert_count",
+    )
+    refresh_client_status(connection)
+
+
+def _listing_indexes(connection: Connection) -> None:
+    _create_indexes(
+        connection,
+        "ix_clients_created_at_id",
+        "ix_documents_client_id_doc_type",
+        "ix_documents_renewed_doc_type_created_at",
+        "ix_documents_created_at_id",
+        "ix_documents_expiry_date_pdf_path",
+        "ix_alerts_document_id_expiry_date",
+        "ix_alerts_client_id_alert_date",
+        "ix_alerts_alert_date_id",
+    )
+    # Prefijos de los compuestos: solo encarecian cada alta de documento o alerta.
+    for name in REDUNDANT_INDEXES:
+        connection.exec_driver_sql(f"DROP INDEX IF EXISTS {name}")
+
+
+def _blob_path_indexes(connection: Connection) -> None:
+    _create_indexes(connection, "ix_clients_photo_path", "ix_documents_pdf_path")
+
+
+def _drop_status_color(connection: Connection) -> None:
+    # El color se deduce de las fechas al leer; la columna guardada (y su indice) ya no la lee nadie.
+    connection.exec_driver_sql("DROP INDEX IF EXISTS ix_clients_status_color")
+    if "status_color" in {column["name"] for column in inspect(connection).get_columns("clients")}:
+        connection.exec_driver_sql("ALTER TABLE clients DROP COLUMN status_color")
+
+
+def _alert_listing_index_order(connection: Connection) -> None:
+    # El indice se creo como (alert_date, id) y el listado ordena por id descendente: se rehace en ese sentido.
+    connection.exec_driver_sql("DROP INDEX IF EXISTS ix_alerts_alert_date_id")
+    _create_indexes(connection, "ix_alerts_alert_date_id")
+
+
+def _delete_legacy_files(legacy_files: list[Path]) -> None:
+    # Los ficheros antiguos solo se borran cuando las filas ya apuntan al blob en la BD.
+    for legacy_file in legacy_files:
+        legacy_file.unlink(missing_ok=True)
+    if legacy_files:
+        log_event("storage_blobs_migrated", f"files={len(legacy_files)}")
+
+
+MIGRATIONS = [
+    Migration(1, "indice de busqueda FTS5 de clientes y documentos", create_search_index),
+    Migration(2, "resumen de alertas y color de estado en clients", _client_status_summary),
+    Migration(3, "indices compuestos de listados, alertas y renovaciones", _listing_indexes),
+    Migration(4, "indices de rutas de blobs", _blob_path_indexes),
+    Migration(5, "ficheros de storage/ por cliente al almacen de blobs", migrate_files_to_blobs, _delete_legacy_files),
+    Migration(6, "quitar clients.status_color, que se calcula al leer", _drop_status_color),
+    Migration(7, "indice del listado de alertas con id descendente", _alert_listing_index_order),
+]
+LATEST_VERSION = MIGRATIONS[-1].version
+
+
+def read_version(connection: Connection) -> int | None:
+    """The stamped version; None for an empty database or one from before versioning."""
+    if not inspect(connection).has_table(schema_version.name):
+        return None
+    return connection.scalar(select(schema_version.c.version)) or 0
+
+
+def has_tables(connection: Connection) -> bool:
+    return inspect(connection).has_table("clients")
+
+
+def baseline_mismatch(connection: Connection) -> bool:
+    """True when an unversioned database lacks columns that no migration adds."""
+    inspector = inspect(connection)
+    for table, expected in BASELINE_COLUMNS.items():
+        columns = {column["name"] for column in inspector.get_columns(table)}
+        if columns and not expected.issubset(columns):
+            return True
+    return False
+
+
+def stamp(connection: Connection, version: int) -> None:
+    schema_version.create(connection, checkfirst=True)
+    connection.execute(delete(schema_version))
+    connection.execute(insert(schema_version).values(version=version))
+
+
+def create_schema(connection: Connection) -> None:
+    Base.metadata.create_all(connection)
+    stamp(connection, LATEST_VERSION)
+
+
+def _apply(connection: Connection, migration: Migration) -> Any:
+    if connection.dialect.name == "sqlite":
+        # pysqlite solo abre transaccion antes de INSERT/UPDATE/DELETE: sin esto cada ALTER TABLE se confirmaria por separado.
+        connection.exec_driver_sql("BEGIN IMMEDIATE")
+    result = migration.upgrade(connection)
+    stamp(connection, migration.version)
+    return result
+
+
+async def apply_migrations(engine: AsyncEngine, version: int) -> list[Migration]:
+    """Run the steps above ``version``; a failing step is rolled back and stops the rest."""
+    if version > LATEST_VERSION:
+        raise SchemaVersionError(
+            f"La base de datos esta en la version de esquema {version} y esta aplicacion solo llega a la "
+            f"{LATEST_VERSION}: actualiza la aplicacion."
+        )
+    applied: list[Migration] = []
+    for migration in MIGRATIONS:
+        if migration.version <= version:
+            continue
+        async with engine.begin() as conn:
+            result = await conn.run_sync(_apply, migration)
+        if migration.after_commit is not None:
+            migration.after_commit(result)
+        applied.append(migration)
+    return applied
@@ -0,0 +1,200 @@
+"""Trigram FTS5 shadow index (SQLite only) behind the ``q`` search of clients and documents.
+
+Text is stored and queried accent-folded; rows are refreshed on every ORM flush
+that touches clients or documents.
+"""
+
+from __future__ import annotations
+
+import sqlite3
+import unicodedata
+from itertools import chain
+from typing import Any, Iterable, Sequence
+
+from sqlalchemy import DDL, Connection, column, delete, event, func, insert, inspect, select, table
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.db.base import Base
+from app.models.client import Client
+from app.models.document import Document, DocumentType
+
+MIN_TERM_LENGTH = 3
+SYNC_CHUNK_SIZE = 500
+
+# El tokenizador trigram existe desde SQLite 3.34.
+FTS_AVAILABLE = sqlite3.sqlite_version_info >= (3, 34, 0)
+
+CLIENT_SEARCH_COLUMNS = ("full_name", "nif", "company", "phone", "course_numbers")
+DOCUMENT_SEARCH_COLUMNS = ("doc_type", "course_number")
+
+client_search = table("client_search", column("rowid"), column("client_search"), *map(column, CLIENT_SEARCH_COLUMNS))
+document_search = table(
+    "document_search", column("rowid"), column("document_search"), *map(column, DOCUMENT_SEARCH_COLUMNS)
+)
+
+
+def _fts_enabled(bind: Any) -> bool:
+    return FTS_AVAILABLE and bind is not None and bind.dialect.name == "sqlite"
+
+
+def _ddl_if_fts(ddl: Any, target: Any, bind: Connection, **kw: Any) -> bool:
+    return _fts_enabled(bind)
+
+
+CREATE_SEARCH_TABLES = [
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {name} USING fts5({', '.join(columns)}, tokenize='trigram')"
+    for name, columns in (("client_search", CLIENT_SEARCH_COLUMNS), ("document_search", DOCUMENT_SEARCH_COLUMNS))
+]
+
+for _statement in CREATE_SEARCH_TABLES:
+    event.listen(Base.metadata, "after_create", DDL(_statement).execute_if(callable_=_ddl_if_fts))
+
+for _name in ("client_search", "document_search"):
+    event.listen(
+        Base.metadata,
+        "before_drop",
+        DDL(f"DROP TABLE IF EXISTS {_name}").execute_if(callable_=_ddl_if_fts),
+    )
+
+
+def fold_text(value: Any) -> str:
+    if value is None:
+        return ""
+    normalized = unicodedata.normalize("NFKD", str(value))
+    return "".join(char for char in normalized if not unicodedata.combining(char)).casefold()
+
+
+def search_enabled(session: AsyncSession, term: str) -> bool:
+    return _fts_enabled(session.bind) and len(fold_text(term).strip()) >= MIN_TERM_LENGTH
+
+
+def _match_expression(term: str, columns: Sequence[str] | None = None) -> str:
+    phrase = '"' + fold_text(term).strip().replace('"', '""') + '"'
+    if columns:
+        return "{" + " ".join(columns) + "} : " + phrase
+    return phrase
+
+
+def matching_client_ids(term: str, columns: Sequence[str] | None = None):
+    return select(client_search.c.rowid).where(client_search.c.client_search.match(_match_expression(term, columns)))
+
+
+def matching_document_ids(term: str):
+    return select(document_search.c.rowid).where(document_search.c.document_search.match(_match_expression(term)))
+
+
+def _chunks(items: Sequence[int], size: int) -> Iterable[Sequence[int]]:
+    for start in range(0, len(items), size):
+        yield items[start : start + size]
+
+
+def refresh_client_rows(connection: Connection, client_ids: Iterable[int]) -> None:
+    for chunk in _chunks(sorted(set(client_ids)), SYNC_CHUNK_SIZE):
+        connection.execute(delete(client_search).where(client_search.c.rowid.in_(chunk)))
+
+        course_numbers: dict[int, list[str]] = {}
+        for client_id, course_number in connection.execute(
+            select(Document.client_id, Document.course_number)
+            .where(
+                Document.client_id.in_(chunk),
+                Document.doc_type == DocumentType.CAP,
+                Document.course_number.is_not(None),
+            )
+            .order_by(Document.id)
+        ):
+            course_numbers.setdefault(client_id, []).append(fold_text(course_number))
+
+        rows = [
+            {
+                "rowid": client_id,
+                "full_name": fold_text(full_name),
+                "nif": fold_text(nif),
+                "company": fold_text(company),
+                "phone": fold_text(phone),
+                "course_numbers": " | ".join(course_numbers.get(client_id, [])),
+            }
+            for client_id, full_name, nif, company, phone in connection.execute(
+                select(Client.id, Client.full_name, Client.nif, Client.company, Client.phone).where(Client.id.in_(chunk))
+            )
+        ]
+        if rows:
+            connection.execute(insert(client_search), rows)
+
+
+def refresh_document_rows(connection: Connection, document_ids: Iterable[int]) -> None:
+    for chunk in _chunks(sorted(set(document_ids)), SYNC_CHUNK_SIZE):
+        connection.execute(delete(document_search).where(document_search.c.rowid.in_(chunk)))
+        rows = [
+            {
+                "rowid": document_id,
+                # Mismo texto que cast(doc_type, String): el nombre del enum guardado en la columna.
+                "doc_type": fold_text(doc_type.name if doc_type is not None else None),
+                "course_number": fold_text(course_number),
+            }
+            for document_id, doc_type, course_number in connection.execute(
+                select(Document.id, Document.doc_type, Document.course_number).where(Document.id.in_(chunk))
+            )
+        ]
+        if rows:
+            connection.execute(insert(document_search), rows)
+
+
+def rebuild_search_index(connection: Connection) -> None:
+    if not _fts_enabled(connection):
+        return
+    connection.execute(delete(client_search))
+    connection.execute(delete(document_search))
+    refresh_client_rows(connection, connection.scalars(select(Client.id)).all())
+    refresh_document_rows(connection, connection.scalars(select(Document.id)).all())
+
+
+def search_index_status(connection: Connection) -> dict[str, Any]:
+    """Row counts of the FTS tables against their source tables (one full count each: not for hot paths)."""
+    if not _fts_enabled(connection):
+        return {"available": False, "in_sync": False}
+    status: dict[str, Any] = {"available": True}
+    inspector = inspect(connection)
+    for name, fts_table, source in (("clients", client_search, Client), ("documents", document_search, Document)):
+        status[name] = connection.scalar(select(func.count()).select_from(source)) or 0
+        # None si la tabla FTS falta (p. ej. borrada a mano): se recrea con la reconstruccion.
+        status[f"indexed_{name}"] = None
+        if inspector.has_table(fts_table.name):
+            status[f"indexed_{name}"] = connection.scalar(select(func.count()).select_from(fts_table)) or 0
+    status["in_sync"] = all(status[f"indexed_{name}"] == status[name] for name in ("clients", "documents"))
+    return status
+
+
+def create_search_index(connection: Connection) -> bool:
+    """Create the FTS tables on an existing database and fill them; False where FTS5 is not available."""
+    if not _fts_enabled(connection):
+        return False
+    for statement in CREATE_SEARCH_TABLES:
+        connection.exec_driver_sql(statement)
+    rebuild_search_index(connection)
+    return True
+
+
+@event.listens_for(Session, "after_flush")
+def _sync_search_index(session: Session, flush_context: Any) -> None:
+    client_ids: set[int] = set()
+    document_ids: set[int] = set()
+    for instance in chain(session.new, session.dirty, session.deleted):
+        if isinstance(instance, Client):
+            client_ids.add(instance.id)
+        elif isinstance(instance, Document):
+            document_ids.add(instance.id)
+            client_ids.add(instance.client_id)
+            # Si el documento cambia de cliente, el anterior pierde su numero de curso.
+            client_ids.update(inspect(instance).attrs.client_id.history.deleted)
+
+    client_ids.discard(None)
+    document_ids.discard(None)
+    if not client_ids and not document_ids:
+        return
+
+    connection = session.connection()
+    if not _fts_enabled(connection):
+        return
+    refresh_client_rows(connection, client_ids)
+    refresh_document_rows(connection, document_ids)
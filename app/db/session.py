@@ -3,6 +3,8 @@ from typing import AsyncGenerator
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 
 from app.core.config import get_settings
+from app.core.instrumentation import instrument_engine
+from app.db.sqlite_profile import configure_sqlite
 
 settings = get_settings()
 engine_kwargs: dict = {
@@ -11,12 +13,14 @@ engine_kwargs: dict = {
 }
 
 if settings.database_url.startswith("sqlite+aiosqlite"):
-    engine_kwargs["connect_args"] = {"timeout": 30}
+    engine_kwargs["connect_args"] = {"timeout": settings.sqlite_busy_timeout_ms / 1000}
 
 engine = create_async_engine(
     settings.database_url,
     **engine_kwargs,
 )
+instrument_engine(engine)
+configure_sqlite(engine)
 
 SessionLocal = async_sessionmaker(
     bind=engine,
@@ -0,0 +1,73 @@
+"""SQLite performance profile applied to every new connection.
+
+In WAL mode readers keep working while an import or a PDF run is writing, instead of
+waiting for the rollback journal to be released. The WAL file is folded back into the
+database by the periodic ``checkpoint`` job and when the engine is disposed.
+"""
+
+from __future__ import annotations
+
+from typing import Any
+
+from sqlalchemy import Connection, event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.core.config import get_settings
+
+settings = get_settings()
+
+JOURNAL_MODES = {"WAL", "DELETE", "TRUNCATE", "PERSIST", "MEMORY", "OFF"}
+SYNCHRONOUS_MODES = {"OFF", "NORMAL", "FULL", "EXTRA"}
+
+
+def profile_pragmas() -> list[str]:
+    journal_mode = settings.sqlite_journal_mode.upper()
+    synchronous = settings.sqlite_synchronous.upper()
+    if journal_mode not in JOURNAL_MODES:
+        raise ValueError(f"SQLITE_JOURNAL_MODE no valido: {settings.sqlite_journal_mode}")
+    if synchronous not in SYNCHRONOUS_MODES:
+        raise ValueError(f"SQLITE_SYNCHRONOUS no valido: {settings.sqlite_synchronous}")
+
+    pragmas = [
+        f"PRAGMA busy_timeout = {settings.sqlite_busy_timeout_ms}",
+        f"PRAGMA journal_mode = {journal_mode}",
+        f"PRAGMA synchronous = {synchronous}",
+        # Negativo = KiB en lugar de paginas.
+        f"PRAGMA cache_size = -{settings.sqlite_cache_size_kb}",
+        f"PRAGMA mmap_size = {settings.sqlite_mmap_size_mb * 1024 * 1024}",
+    ]
+    if settings.sqlite_temp_store_memory:
+        pragmas.append("PRAGMA temp_store = MEMORY")
+    return pragmas
+
+
+def _apply_profile(dbapi_connection: Any, connection_record: Any) -> None:
+    cursor = dbapi_connection.cursor()
+    try:
+        for pragma in profile_pragmas():
+            cursor.execute(pragma)
+    finally:
+        cursor.close()
+
+
+def configure_sqlite(engine: AsyncEngine) -> bool:
+    """Install the profile on ``engine`` if it is SQLite; False for any other backend."""
+    if engine.url.get_backend_name() != "sqlite":
+        return False
+    if not event.contains(engine.sync_engine, "connect", _apply_profile):
+        event.listen(engine.sync_engine, "connect", _apply_profile)
+    return True
+
+
+def checkpoint(connection: Connection) -> tuple[int, int, int] | None:
+    """Fold the WAL back into the database file and refresh the planner statistics.
+
+    Returns SQLite's ``(busy, wal_pages, checkpointed_pages)``; None outside SQLite.
+    """
+    if connection.dialect.name != "sqlite":
+        return None
+    # Primero optimize: si reanaliza alguna tabla, sus escrituras tambien entran en el checkpoint.
+    connection.exec_driver_sql("PRAGMA optimize")
+    # TRUNCATE deja el -wal a cero bytes; si hay lectores activos se queda en un checkpoint parcial.
+    result = connection.exec_driver_sql("PRAGMA wal_checkpoint(TRUNCATE)").one()
+    return tuple(result)
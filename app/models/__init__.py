@@ -1,5 +1,5 @@
 from app.models.alert import Alert
-from app.models.client import Client
+from app.models.client import Client, ClientStatus
 from app.models.document import Document, DocumentType, FundaePaymentType, PaymentMethod
 
-__all__ = ["Alert", "Client", "Document", "DocumentType", "PaymentMethod", "FundaePaymentType"]
+__all__ = ["Alert", "Client", "ClientStatus", "Document", "DocumentType", "PaymentMethod", "FundaePaymentType"]
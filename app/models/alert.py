@@ -1,6 +1,6 @@
 from datetime import date, datetime
 
-from sqlalchemy import Date, DateTime, ForeignKey
+from sqlalchemy import Date, DateTime, ForeignKey, Index, text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.db.base import Base
@@ -9,16 +9,22 @@ from app.models.document import DocumentType
 
 class Alert(Base):
     __tablename__ = "alerts"
+    __table_args__ = (
+        # Alta/actualizacion de alertas automaticas de un documento.
+        Index("ix_alerts_document_id_expiry_date", "document_id", "expiry_date"),
+        # Resumen de estado del cliente (min/max de alert_date) y listado filtrado por cliente.
+        Index("ix_alerts_client_id_alert_date", "client_id", "alert_date"),
+        # Orden del listado paginado (alert_date ASC, id DESC): con el id en el mismo sentido que el ORDER BY,
+        # SQLite recorre el indice sin ordenar cada pagina en un B-tree temporal.
+        Index("ix_alerts_alert_date_id", "alert_date", text("id DESC")),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True, index=True)
-    client_id: Mapped[int] = mapped_column(ForeignKey("clients.id", ondelete="CASCADE"), index=True)
-    document_id: Mapped[int | None] = mapped_column(
-        ForeignKey("documents.id", ondelete="SET NULL"),
-        nullable=True,
-        index=True,
-    )
+    # client_id, document_id y alert_date sin indice propio: son el prefijo de los indices compuestos.
+    client_id: Mapped[int] = mapped_column(ForeignKey("clients.id", ondelete="CASCADE"))
+    document_id: Mapped[int | None] = mapped_column(ForeignKey("documents.id", ondelete="SET NULL"), nullable=True)
     expiry_date: Mapped[date] = mapped_column(Date, nullable=False, index=True)
-    alert_date: Mapped[date] = mapped_column(Date, nullable=False, index=True)
+    alert_date: Mapped[date] = mapped_column(Date, nullable=False)
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
 
     client = relationship("Client", back_populates="alerts")
@@ -1,22 +1,40 @@
-from datetime import datetime
+import enum
+from datetime import date, datetime
 
-from sqlalchemy import DateTime, String
+from sqlalchemy import Date, DateTime, Index, Integer, String
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.db.base import Base
 
 
+class ClientStatus(str, enum.Enum):
+    GREEN = "green"
+    YELLOW = "yellow"
+    RED = "red"
+
+
 class Client(Base):
     __tablename__ = "clients"
+    __table_args__ = (
+        # Orden del listado paginado y de los lotes del PDF masivo.
+        Index("ix_clients_created_at_id", "created_at", "id"),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True, index=True)
     full_name: Mapped[str] = mapped_column(String(255), nullable=False, index=True)
     company: Mapped[str | None] = mapped_column(String(255), nullable=True, index=True)
-    photo_path: Mapped[str | None] = mapped_column(String(500), nullable=True)
+    photo_path: Mapped[str | None] = mapped_column(String(500), nullable=True, index=True)
     nif: Mapped[str] = mapped_column(String(32), unique=True, index=True, nullable=False)
     phone: Mapped[str] = mapped_column(String(32), nullable=False, index=True)
     email: Mapped[str | None] = mapped_column(String(255), nullable=True)
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
 
+    # Resumen de alertas mantenido por app.services.client_status_service.
+    earliest_alert_date: Mapped[date | None] = mapped_column(Date, nullable=True, index=True)
+    latest_alert_date: Mapped[date | None] = mapped_column(Date, nullable=True, index=True)
+    alert_count: Mapped[int] = mapped_column(Integer, default=0, server_default="0", nullable=False, index=True)
+    # El color (verde/amarillo/rojo) no se guarda: se deduce de estas fechas al leer (ClientRead y el filtro
+    # del listado), asi nunca queda atrasado respecto al dia actual.
+
     documents = relationship("Document", back_populates="client", cascade="all, delete-orphan")
     alerts = relationship("Alert", back_populates="client", cascade="all, delete-orphan")
@@ -1,7 +1,7 @@
 import enum
 from datetime import date, datetime
 
-from sqlalchemy import Boolean, Date, DateTime, Enum, ForeignKey, String
+from sqlalchemy import Boolean, Date, DateTime, Enum, ForeignKey, Index, String
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.db.base import Base
@@ -29,20 +29,31 @@ class FundaePaymentType(str, enum.Enum):
 
 class Document(Base):
     __tablename__ = "documents"
+    __table_args__ = (
+        # Documentos de un cliente por tipo (fusion de carnets en la importacion, cursos CAP del buscador).
+        Index("ix_documents_client_id_doc_type", "client_id", "doc_type"),
+        # /reporting/renewals: renovados con nosotros, por tipo y ano de alta.
+        Index("ix_documents_renewed_doc_type_created_at", "renewed_with_us", "doc_type", "created_at"),
+        # Orden del listado paginado.
+        Index("ix_documents_created_at_id", "created_at", "id"),
+        # Cubre los contadores del panel sin leer la tabla.
+        Index("ix_documents_expiry_date_pdf_path", "expiry_date", "pdf_path"),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True, index=True)
-    client_id: Mapped[int] = mapped_column(ForeignKey("clients.id", ondelete="CASCADE"), index=True)
+    # client_id y expiry_date sin indice propio: son el prefijo de los indices compuestos.
+    client_id: Mapped[int] = mapped_column(ForeignKey("clients.id", ondelete="CASCADE"))
     doc_type: Mapped[DocumentType] = mapped_column(
         Enum(DocumentType, name="document_type_enum"),
         nullable=False,
         index=True,
     )
 
-    expiry_date: Mapped[date | None] = mapped_column(Date, nullable=True, index=True)
+    expiry_date: Mapped[date | None] = mapped_column(Date, nullable=True)
     issue_date: Mapped[date | None] = mapped_column(Date, nullable=True)
     birth_date: Mapped[date | None] = mapped_column(Date, nullable=True)
     address: Mapped[str | None] = mapped_column(String(500), nullable=True)
-    pdf_path: Mapped[str | None] = mapped_column(String(500), nullable=True)
+    pdf_path: Mapped[str | None] = mapped_column(String(500), nullable=True, index=True)
 
     course_number: Mapped[str | None] = mapped_column(String(128), nullable=True)
 
@@ -1,3 +1,21 @@
-from app.pdf_generator.service import PdfGeneratorService
+"""PDF reports.
 
-__all__ = ["PdfGeneratorService"]
+ReportLab, pypdf and Pillow are only imported when a report is rendered (see ``service``),
+so importing this package or ``bulk``/``cache``/``thumbnails`` keeps application startup fast.
+"""
+
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from app.pdf_generator.service import PdfGeneratorService, ReportBundle
+
+__all__ = ["PdfGeneratorService", "ReportBundle"]
+
+
+def __getattr__(name: str) -> Any:
+    if name in __all__:
+        # Import explicito (no importlib): PyInstaller lo detecta al empaquetar el .exe.
+        from app.pdf_generator import service
+
+        return getattr(service, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
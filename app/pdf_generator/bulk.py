@@ -0,0 +1,230 @@
+from __future__ import annotations
+
+import asyncio
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, field
+from datetime import datetime
+from types import SimpleNamespace
+from typing import TYPE_CHECKING, Any, AsyncIterator
+
+from sqlalchemy import and_, inspect, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import get_settings
+from app.models.alert import Alert
+from app.models.client import Client
+from app.models.document import Document
+from app.pdf_generator.cache import ReportCache, report_digest
+
+if TYPE_CHECKING:
+    from app.pdf_generator.service import ReportBundle
+
+settings = get_settings()
+
+
+@dataclass
+class ClientReportJob:
+    """Plain, picklable snapshot of everything a client report needs."""
+
+    client: dict[str, Any]
+    documents: list[dict[str, Any]] = field(default_factory=list)
+    alerts: list[dict[str, Any]] = field(default_factory=list)
+
+
+@dataclass
+class RenderedReports:
+    """Rendered or cached report bodies, in job order."""
+
+    reports: list[bytes]
+    cache_hits: int = 0
+    cache_misses: int = 0
+
+
+def _row_to_dict(instance: Any) -> dict[str, Any]:
+    return {attr.key: getattr(instance, attr.key) for attr in inspect(instance).mapper.column_attrs}
+
+
+def render_client_report(job: ClientReportJob) -> bytes:
+    """Process-pool entry point: render one client report in memory."""
+    from app.pdf_generator.service import PdfGeneratorService
+
+    return PdfGeneratorService().render_client_report(
+        client=SimpleNamespace(**job.client),
+        documents=[SimpleNamespace(**doc) for doc in job.documents],
+        alerts=[SimpleNamespace(**alert) for alert in job.alerts],
+    )
+
+
+async def _load_report_jobs(session: AsyncSession, clients: list[Client]) -> list[ClientReportJob]:
+    client_ids = [client.id for client in clients]
+
+    documents_by_client: dict[int, list[dict[str, Any]]] = {}
+    for document in await session.scalars(
+        select(Document).where(Document.client_id.in_(client_ids)).order_by(Document.client_id.asc(), Document.created_at.asc())
+    ):
+        documents_by_client.setdefault(document.client_id, []).append(_row_to_dict(document))
+
+    alerts_by_client: dict[int, list[dict[str, Any]]] = {}
+    for alert in await session.scalars(
+        select(Alert)
+        .where(Alert.client_id.in_(client_ids))
+        .order_by(Alert.client_id.asc(), Alert.alert_date.asc(), Alert.created_at.asc())
+    ):
+        alerts_by_client.setdefault(alert.client_id, []).append(_row_to_dict(alert))
+
+    return [
+        ClientReportJob(
+            client=_row_to_dict(client),
+            documents=documents_by_client.get(client.id, []),
+            alerts=alerts_by_client.get(client.id, []),
+        )
+        for client in clients
+    ]
+
+
+async def iter_report_job_batches(
+    session: AsyncSession,
+    batch_size: int | None = None,
+) -> AsyncIterator[list[ClientReportJob]]:
+    """Yield report jobs for every client, ``batch_size`` clients at a time, in three queries per batch.
+
+    Loaded rows are expunged after each batch so the session does not keep the whole client base in memory.
+    """
+    batch_size = batch_size or settings.pdf_batch_size
+    last_key: tuple[datetime, int] | None = None
+    while True:
+        stmt = select(Client).order_by(Client.created_at.asc(), Client.id.asc()).limit(batch_size)
+        if last_key is not None:
+            last_created_at, last_id = last_key
+            stmt = stmt.where(
+                or_(
+                    Client.created_at > last_created_at,
+                    and_(Client.created_at == last_created_at, Client.id > last_id),
+                )
+            )
+        clients = list(await session.scalars(stmt))
+        if not clients:
+            return
+
+        jobs = await _load_report_jobs(session, clients)
+        last_key = (clients[-1].created_at, clients[-1].id)
+        session.expunge_all()
+        yield jobs
+
+        if len(clients) < batch_size:
+            return
+
+
+async def load_client_report_job(session: AsyncSession, client_id: int) -> ClientReportJob | None:
+    client = await session.get(Client, client_id)
+    if client is None:
+        return None
+    jobs = await _load_report_jobs(session, [client])
+    return jobs[0]
+
+
+def _configured_workers() -> int:
+    return max(1, settings.pdf_workers or os.cpu_count() or 1)
+
+
+def _worker_count(jobs: int) -> int:
+    return max(1, min(_configured_workers(), jobs))
+
+
+_pool: ProcessPoolExecutor | None = None
+_pool_workers = 0
+_pool_lock = threading.Lock()
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    """The shared pool, created on first use: workers import ReportLab once and serve every batch and request."""
+    global _pool, _pool_workers
+    with _pool_lock:
+        workers = _configured_workers()
+        if _pool is not None and _pool_workers != workers:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+        if _pool is None:
+            # spawn en todas las plataformas: es lo que hay en Windows y evita hacer fork
+            # de un proceso con event loop e hilos de aiosqlite vivos.
+            _pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+            _pool_workers = workers
+        return _pool
+
+
+def shutdown_report_pool(wait: bool = True) -> None:
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(wait=wait, cancel_futures=True)
+
+
+def _render_in_pool(jobs: list[ClientReportJob], workers: int) -> list[bytes]:
+    pool = _get_pool()
+    chunksize = max(1, len(jobs) // (workers * 4))
+    try:
+        return list(pool.map(render_client_report, jobs, chunksize=chunksize))
+    except BrokenProcessPool:
+        # Un worker murio (p. ej. sin memoria): el pool ya no sirve, el siguiente lote crea otro.
+        shutdown_report_pool(wait=False)
+        raise
+
+
+def _render_all(jobs: list[ClientReportJob]) -> list[bytes]:
+    workers = _worker_count(len(jobs))
+    if workers == 1:
+        return [render_client_report(job) for job in jobs]
+    return _render_in_pool(jobs, workers)
+
+
+def _lookup_cached(jobs: list[ClientReportJob], cache: ReportCache) -> tuple[list[str], list[bytes | None]]:
+    # Hash (stat de los adjuntos) y lectura de la cache de todo el lote, en un solo viaje a un hilo.
+    digests = [report_digest(job.client, job.documents, job.alerts) for job in jobs]
+    return digests, [cache.get(digest) for digest in digests]
+
+
+def _store_rendered(cache: ReportCache, entries: list[tuple[str, bytes]]) -> None:
+    for digest, body in entries:
+        cache.put(digest, body)
+
+
+async def render_client_reports(jobs: list[ClientReportJob], cache: ReportCache | None = None) -> RenderedReports:
+    """Render reports in parallel, returning them in the same order as ``jobs``.
+
+    With a cache, unchanged clients are served from it and only the misses are rendered.
+    Disk access (hashing, cache reads and writes) runs in a worker thread, once per batch.
+    """
+    reports: list[bytes | None] = [None] * len(jobs)
+    rendered = RenderedReports(reports=[])
+    if not jobs:
+        return rendered
+
+    pending: list[int] = list(range(len(jobs)))
+    digests: list[str] = []
+    if cache is not None:
+        digests, reports = await asyncio.to_thread(_lookup_cached, jobs, cache)
+        pending = [idx for idx, report in enumerate(reports) if report is None]
+        rendered.cache_hits = len(jobs) - len(pending)
+        rendered.cache_misses = len(pending)
+
+    if pending:
+        bodies = await asyncio.to_thread(_render_all, [jobs[idx] for idx in pending])
+        for idx, body in zip(pending, bodies):
+            reports[idx] = body
+        if cache is not None:
+            await asyncio.to_thread(_store_rendered, cache, [(digests[idx], reports[idx]) for idx in pending])
+
+    rendered.reports = [report for report in reports if report is not None]
+    return rendered
+
+
+def append_to_bundle(bundle: ReportBundle, jobs: list[ClientReportJob], rendered: RenderedReports) -> None:
+    from app.pdf_generator.service import report_attachments
+
+    for job, report in zip(jobs, rendered.reports):
+        bundle.append(report, report_attachments(job.client.get("photo_path")))
@@ -0,0 +1,157 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from datetime import date, datetime
+from pathlib import Path
+from typing import Any
+
+from app.core.app_config import get_app_json_config
+from app.core.config import get_settings
+
+settings = get_settings()
+
+CACHE_DIR = Path("storage/exports/cache")
+
+
+def _file_signature(raw_path: Any) -> list[Any] | None:
+    if not raw_path:
+        return None
+    for candidate in (Path(str(raw_path)), Path(str(raw_path).lstrip("/"))):
+        try:
+            stat = candidate.stat()
+        except OSError:
+            continue
+        return [candidate.as_posix(), stat.st_mtime_ns, stat.st_size]
+    return None
+
+
+def report_digest(client: dict[str, Any], documents: list[dict[str, Any]], alerts: list[dict[str, Any]]) -> str:
+    """Digest of every input that changes the rendered client report."""
+    app_json = get_app_json_config()
+    payload = {
+        "client": client,
+        "documents": documents,
+        "alerts": alerts,
+        "photo": _file_signature(client.get("photo_path")),
+        "document_files": [_file_signature(doc.get("pdf_path")) for doc in documents],
+        "pdf_config": app_json.pdf.model_dump(),
+        "app_name": app_json.app_name,
+        "logo": [app_json.ui.logo_path, _file_signature(app_json.ui.logo_path)],
+        # El informe lleva impresa la fecha en que se genera ("Fecha del informe" y la cabecera de cada
+        # pagina, en UTC como generated_at) y el estado "Caducado / Caduca pronto" (fecha local): la cache
+        # dura como mucho un dia.
+        "report_date": [datetime.utcnow().date(), date.today()],
+    }
+    encoded = json.dumps(payload, sort_keys=True, default=str).encode("utf-8")
+    return hashlib.sha256(encoded).hexdigest()
+
+
+class ReportCache:
+    """Rendered client reports on disk, keyed by digest, with size-based LRU eviction.
+
+    The cache size is tracked as a running total, so the directory is only scanned
+    when it goes over ``max_bytes``; eviction then frees down to ``EVICT_TO``.
+    """
+
+    EVICT_TO = 0.9
+
+    def __init__(self, cache_dir: Path = CACHE_DIR, max_bytes: int | None = None) -> None:
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes if max_bytes is not None else settings.pdf_cache_max_mb * 1024 * 1024
+        self._lock = threading.Lock()
+        # None hasta el primer put: el total se calcula una vez recorriendo el directorio.
+        self._total_bytes: int | None = None
+
+    def path_for(self, digest: str) -> Path:
+        return self.cache_dir / f"{digest}.pdf"
+
+    def get(self, digest: str) -> bytes | None:
+        """The cached report, read into memory so a later eviction cannot remove it mid-use."""
+        path = self.path_for(digest)
+        try:
+            report = path.read_bytes()
+        except OSError:
+            return None
+        try:
+            # mtime marca el ultimo uso para la expulsion LRU.
+            os.utime(path)
+        except OSError:
+            pass
+        return report
+
+    def put(self, digest: str, report: bytes) -> Path:
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        target = self.path_for(digest)
+        # mkstemp da un nombre unico por llamada: varios hilos pueden guardar el mismo informe a la vez.
+        fd, tmp_name = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as tmp_file:
+                tmp_file.write(report)
+            try:
+                replaced = target.stat().st_size
+            except OSError:
+                replaced = 0
+            os.replace(tmp_name, target)
+        except BaseException:
+            Path(tmp_name).unlink(missing_ok=True)
+            raise
+
+        with self._lock:
+            if self._total_bytes is None:
+                self._total_bytes = self._scan_size()
+            else:
+                self._total_bytes += len(report) - replaced
+            over_limit = self._total_bytes > self.max_bytes
+        if over_limit:
+            self.evict()
+        return target
+
+    def _scan_size(self) -> int:
+        total = 0
+        for path in self.cache_dir.glob("*.pdf"):
+            try:
+                total += path.stat().st_size
+            except OSError:
+                continue
+        return total
+
+    def evict(self) -> int:
+        """Drop the least recently used reports until the cache is back under ``EVICT_TO`` of the limit."""
+        with self._lock:
+            return self._evict()
+
+    def _evict(self) -> int:
+        entries: list[tuple[float, int, Path]] = []
+        for path in self.cache_dir.glob("*.pdf"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        # Se baja por debajo del limite con margen para no recorrer el directorio en cada put.
+        target = self.max_bytes * self.EVICT_TO if total > self.max_bytes else self.max_bytes
+        for _, size, path in sorted(entries):
+            if total <= target:
+                break
+            try:
+                path.unlink()
+            except OSError:
+                continue
+            total -= size
+            removed += 1
+        self._total_bytes = total
+        return removed
+
+
+report_cache = ReportCache()
+
+
+def active_report_cache() -> ReportCache | None:
+    return report_cache if settings.pdf_cache_enabled else None
@@ -3,9 +3,9 @@ from __future__ import annotations
 from datetime import date, datetime
 from io import BytesIO
 from pathlib import Path
-from typing import Any
+from typing import Any, BinaryIO, Iterable
 
-from pypdf import PdfWriter
+from pypdf import PdfReader, PdfWriter
 from reportlab.lib import colors
 from reportlab.lib.pagesizes import A4
 from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
@@ -15,47 +15,62 @@ from reportlab.platypus import PageBreak, Paragraph, SimpleDocTemplate, Spacer,
 from reportlab.pdfgen.canvas import Canvas
 
 from app.core.app_config import get_app_json_config
+from app.pdf_generator.thumbnails import thumbnail_cache
 
-try:
-    from PIL import Image
-except Exception:  # noqa: BLE001
-    Image = None
 
+class ReportBundle:
+    """Single PDF that client reports are appended to as they are rendered."""
 
-class PdfGeneratorService:
-    """Service for assembling client and bulk PDF outputs."""
+    def __init__(self) -> None:
+        self._writer = PdfWriter()
+        # Los adjuntos viven en el almacen por contenido: un mismo fichero se lee una sola vez por PDF.
+        self._attachments: dict[Path, PdfReader] = {}
+        self.reports = 0
+
+    def append(self, report: bytes | str | Path, attachments: Iterable[Path] = ()) -> None:
+        self._writer.append(BytesIO(report) if isinstance(report, bytes) else str(report))
+        for attachment in attachments:
+            reader = self._attachments.get(attachment)
+            if reader is None:
+                reader = self._attachments[attachment] = PdfReader(str(attachment))
+            self._writer.append(reader)
+        self.reports += 1
+
+    def write(self, output: BinaryIO) -> None:
+        if not self.reports:
+            raise ValueError("El PDF no tiene informes")
+        self._writer.write(output)
 
-    def generate_bundle(self, output_path: str | Path, ordered_files: list[str | Path]) -> Path:
-        target = Path(output_path)
-        if not ordered_files:
-            raise ValueError("ordered_files no puede estar vacio")
 
-        target.parent.mkdir(parents=True, exist_ok=True)
-        writer = PdfWriter()
-        for source in ordered_files:
-            src = Path(source)
-            if src.exists() and src.suffix.lower() == ".pdf":
-                writer.append(str(src))
+def report_attachments(photo_path: Any) -> list[Path]:
+    """PDF files appended after a client report (a photo uploaded as PDF)."""
+    photo_pdf_path = _resolve_existing_path(photo_path)
+    if photo_pdf_path and photo_pdf_path.suffix.lower() == ".pdf":
+        return [photo_pdf_path]
+    return []
 
-        with target.open("wb") as output:
-            writer.write(output)
-        return target
+
+class PdfGeneratorService:
+    """Service for assembling client and bulk PDF outputs."""
 
     def default_output_name(self, prefix: str) -> str:
         stamp = datetime.utcnow().strftime("%Y%m%d_%H%M%S")
         return f"{prefix}_{stamp}.pdf"
 
-    def generate_client_report(
-        self,
-        output_path: str | Path,
-        *,
-        client: Any,
-        documents: list[Any],
-        alerts: list[Any],
-    ) -> Path:
-        target = Path(output_path)
-        target.parent.mkdir(parents=True, exist_ok=True)
+    def write_client_report(self, output_path: Path, report: bytes, client: Any) -> None:
+        attachments = report_attachments(getattr(client, "photo_path", None))
+        if not attachments:
+            output_path.write_bytes(report)
+            return
 
+        bundle = ReportBundle()
+        bundle.append(report, attachments)
+        with output_path.open("wb") as output:
+            bundle.write(output)
+
+    def render_client_report(self, *, client: Any, documents: list[Any], alerts: list[Any]) -> bytes:
+        """Render the client report in memory, without the attached photo PDF."""
+        buffer = BytesIO()
         generated_at = datetime.utcnow()
         app_json = get_app_json_config()
         logo_path = Path(app_json.ui.logo_path.lstrip("/")) if app_json.ui.logo_path.startswith("/") else Path(app_json.ui.logo_path)
@@ -64,7 +79,7 @@ class PdfGeneratorService:
         contact_phone = app_json.pdf.contact_phone
 
         doc, styles, on_page = _build_base_template(
-            output_path=target,
+            output=buffer,
             generated_at=generated_at,
             logo_path=logo_path if logo_path.exists() else None,
             app_name=app_name,
@@ -99,16 +114,7 @@ class PdfGeneratorService:
             **kwargs,
         )
         doc.build(story, canvasmaker=canvas_maker)
-
-        photo_pdf_path = _resolve_existing_path(getattr(client, "photo_path", None))
-        if photo_pdf_path and photo_pdf_path.suffix.lower() == ".pdf":
-            writer = PdfWriter()
-            writer.append(str(target))
-            writer.append(str(photo_pdf_path))
-            with target.open("wb") as out:
-                writer.write(out)
-
-        return target
+        return buffer.getvalue()
 
     def _build_title_page(
         self,
@@ -307,7 +313,7 @@ class PdfGeneratorService:
 
 def _build_base_template(
     *,
-    output_path: Path,
+    output: BinaryIO,
     generated_at: datetime,
     logo_path: Path | None,
     app_name: str,
@@ -322,7 +328,7 @@ def _build_base_template(
     bottom_margin = 22 * mm
 
     doc = SimpleDocTemplate(
-        str(output_path),
+        output,
         pagesize=A4,
         leftMargin=left_margin,
         rightMargin=right_margin,
@@ -477,21 +483,12 @@ def _build_thumbnail(path: Path | None, *, max_w: float, max_h: float) -> RLImag
     if not path or not path.exists():
         return None
 
-    suffix = path.suffix.lower()
-    if suffix in {".jpg", ".jpeg", ".png", ".bmp", ".gif", ".tif", ".tiff", ".webp"}:
-        if suffix in {".jpg", ".jpeg", ".png"}:
-            return RLImage(str(path), width=max_w, height=max_h)
-        if Image is None:
-            return None
-        try:
-            with Image.open(path) as img:
-                rgb = img.convert("RGB")
-                buffer = BytesIO()
-                rgb.save(buffer, format="PNG")
-                buffer.seek(0)
-            return RLImage(buffer, width=max_w, height=max_h)
-        except Exception:  # noqa: BLE001
-            return None
+    # Miniatura ya reducida y comprimida (cacheada por ruta, mtime y tamano); sin Pillow, el original.
+    thumbnail = thumbnail_cache.get(path, max_w, max_h)
+    if thumbnail is not None:
+        return RLImage(str(thumbnail), width=max_w, height=max_h)
+    if path.suffix.lower() in {".jpg", ".jpeg", ".png"}:
+        return RLImage(str(path), width=max_w, height=max_h)
     return None
 
 
@@ -0,0 +1,153 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import threading
+import time
+import uuid
+from pathlib import Path
+
+from app.core.config import get_settings
+
+settings = get_settings()
+
+THUMBNAIL_DIR = Path("storage/exports/thumbnails")
+IMAGE_SUFFIXES = {".jpg", ".jpeg", ".png", ".bmp", ".gif", ".tif", ".tiff", ".webp"}
+JPEG_QUALITY = 85
+POINTS_PER_INCH = 72
+
+# Una miniatura usada hace menos de esto no se borra: el informe que la pidio aun puede estar leyendola.
+EVICT_GRACE_SECONDS = 300
+
+# Hueco de la foto en la portada del informe (70 x 70 mm, en puntos).
+CLIENT_PHOTO_BOX = (70 / 25.4 * POINTS_PER_INCH, 70 / 25.4 * POINTS_PER_INCH)
+
+
+class ThumbnailCache:
+    """Right-sized JPEG copies of report images, built once per (path, mtime, box).
+
+    Like the report cache, it is capped at ``max_bytes`` with LRU eviction; thumbnails of
+    replaced or deleted images are never used again and age out first.
+    """
+
+    EVICT_TO = 0.9
+
+    def __init__(self, cache_dir: Path = THUMBNAIL_DIR, dpi: int | None = None, max_bytes: int | None = None) -> None:
+        self.cache_dir = cache_dir
+        self.dpi = dpi or settings.pdf_thumbnail_dpi
+        self.max_bytes = max_bytes if max_bytes is not None else settings.pdf_thumbnail_cache_max_mb * 1024 * 1024
+        self._lock = threading.Lock()
+        self._total_bytes: int | None = None
+
+    def pixel_box(self, max_w: float, max_h: float) -> tuple[int, int]:
+        return (
+            max(1, round(max_w / POINTS_PER_INCH * self.dpi)),
+            max(1, round(max_h / POINTS_PER_INCH * self.dpi)),
+        )
+
+    def path_for(self, source: Path, box: tuple[int, int]) -> Path | None:
+        try:
+            stat = source.stat()
+        except OSError:
+            return None
+        key = f"{source.resolve().as_posix()}|{stat.st_mtime_ns}|{stat.st_size}|{box[0]}x{box[1]}"
+        digest = hashlib.sha256(key.encode("utf-8")).hexdigest()
+        return self.cache_dir / digest[:2] / f"{digest}.jpg"
+
+    def get(self, source: Path, max_w: float, max_h: float) -> Path | None:
+        """Cached thumbnail for ``source`` fitting a ``max_w`` x ``max_h`` point box, building it on first use."""
+        if source.suffix.lower() not in IMAGE_SUFFIXES:
+            return None
+        box = self.pixel_box(max_w, max_h)
+        target = self.path_for(source, box)
+        if target is None:
+            return None
+        try:
+            # mtime marca el ultimo uso para la expulsion LRU.
+            os.utime(target)
+            return target
+        except OSError:
+            pass
+        # Pillow solo se carga si hay que generar una miniatura.
+        try:
+            from PIL import Image, ImageOps
+        except ImportError:
+            return None
+
+        target.parent.mkdir(parents=True, exist_ok=True)
+        # Nombre temporal unico: varios procesos del PDF masivo pueden generar la misma miniatura a la vez.
+        tmp_path = target.with_name(f".{target.stem}.{os.getpid()}.{uuid.uuid4().hex}.tmp")
+        try:
+            with Image.open(source) as img:
+                img = ImageOps.exif_transpose(img)
+                img.thumbnail(box, Image.Resampling.LANCZOS)
+                if img.mode in {"RGBA", "LA", "P"}:
+                    img = img.convert("RGBA")
+                    background = Image.new("RGB", img.size, "white")
+                    background.paste(img, mask=img.getchannel("A"))
+                    img = background
+                else:
+                    img = img.convert("RGB")
+                img.save(tmp_path, format="JPEG", quality=JPEG_QUALITY, optimize=True)
+            os.replace(tmp_path, target)
+        except Exception:  # noqa: BLE001
+            tmp_path.unlink(missing_ok=True)
+            return None
+        self._track(target.stat().st_size)
+        return target
+
+    def _entries(self) -> list[tuple[float, int, Path]]:
+        entries: list[tuple[float, int, Path]] = []
+        for path in self.cache_dir.glob("*/*.jpg"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+
+    def _track(self, size: int) -> None:
+        with self._lock:
+            if self._total_bytes is None:
+                self._total_bytes = sum(entry_size for _, entry_size, _ in self._entries())
+            else:
+                self._total_bytes += size
+            over_limit = self._total_bytes > self.max_bytes
+        if over_limit:
+            self.evict()
+
+    def evict(self) -> int:
+        """Drop the least recently used thumbnails until the cache is back under ``EVICT_TO`` of the limit.
+
+        The PDF workers build thumbnails in their own processes, so the nightly job also calls this
+        to enforce the limit across all of them.
+        """
+        with self._lock:
+            entries = self._entries()
+            total = sum(size for _, size, _ in entries)
+            target = self.max_bytes * self.EVICT_TO if total > self.max_bytes else self.max_bytes
+            idle_before = time.time() - EVICT_GRACE_SECONDS
+            removed = 0
+            for mtime, size, path in sorted(entries):
+                if total <= target or mtime > idle_before:
+                    break
+                try:
+                    path.unlink()
+                except OSError:
+                    continue
+                total -= size
+                removed += 1
+            # Si lo que queda por encima del limite esta en uso, no se vuelve a recorrer la carpeta en cada
+            # miniatura nueva: se espera a otro 10 % de crecimiento o al job nocturno.
+            self._total_bytes = min(total, int(target))
+            return removed
+
+
+thumbnail_cache = ThumbnailCache()
+
+
+def warm_client_photo(photo_path: str | Path | None) -> Path | None:
+    """Build the report thumbnail of a freshly uploaded photo so the first report does not pay for it."""
+    if not photo_path:
+        return None
+    return thumbnail_cache.get(Path(photo_path), *CLIENT_PHOTO_BOX)
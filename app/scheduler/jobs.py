@@ -1,71 +1,108 @@
 from __future__ import annotations
 
-from datetime import date
+import asyncio
+from datetime import date, datetime, timedelta
 
-from sqlalchemy import and_, select
+from sqlalchemy import DateTime, case, exists, insert, literal, select, union
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.dashboard.metrics import dashboard_metrics
+from app.db.sqlite_profile import checkpoint
 from app.models.alert import Alert
 from app.models.document import Document, DocumentType
+from app.pdf_generator.thumbnails import thumbnail_cache
 from app.services.alert_service import calculate_alert_date
+from app.services.client_status_service import refresh_client_status_async
+from app.services.storage_service import collect_garbage
 
 ALERT_WINDOWS = {30, 60, 90}
 
 
-def _collect_document_expiry_dates(document: Document) -> list[date]:
-    expiries: list[date] = []
-    if document.doc_type == DocumentType.POWER_OF_ATTORNEY:
-        if document.flag_fran and document.expiry_fran:
-            expiries.append(document.expiry_fran)
-        if document.flag_ciusaba and document.expiry_ciusaba:
-            expiries.append(document.expiry_ciusaba)
-        return list(dict.fromkeys(expiries))
-
-    if document.expiry_date:
-        expiries.append(document.expiry_date)
-    return expiries
+def _deadline_candidates(due_dates: list[date]):
+    """(client_id, document_id, expiry_date) pairs whose expiry falls on one of the due dates."""
+    standard = select(
+        Document.client_id.label("client_id"),
+        Document.id.label("document_id"),
+        Document.expiry_date.label("expiry_date"),
+    ).where(
+        Document.doc_type != DocumentType.POWER_OF_ATTORNEY,
+        Document.expiry_date.in_(due_dates),
+    )
+    fran = select(
+        Document.client_id.label("client_id"),
+        Document.id.label("document_id"),
+        Document.expiry_fran.label("expiry_date"),
+    ).where(
+        Document.doc_type == DocumentType.POWER_OF_ATTORNEY,
+        Document.flag_fran.is_(True),
+        Document.expiry_fran.in_(due_dates),
+    )
+    ciusaba = select(
+        Document.client_id.label("client_id"),
+        Document.id.label("document_id"),
+        Document.expiry_ciusaba.label("expiry_date"),
+    ).where(
+        Document.doc_type == DocumentType.POWER_OF_ATTORNEY,
+        Document.flag_ciusaba.is_(True),
+        Document.expiry_ciusaba.in_(due_dates),
+    )
+    # UNION (no ALL) colapsa los poderes con la misma fecha en Fran y CIUSABA.
+    return union(standard, fran, ciusaba).subquery("candidates")
 
 
 async def create_deadline_alerts(session: AsyncSession) -> int:
     """Create alerts for documents expiring in 30/60/90 days."""
     today = date.today()
-
-    documents = list(await session.scalars(select(Document)))
-    created = 0
-
-    for document in documents:
-        expiries = _collect_document_expiry_dates(document)
-        if not expiries:
-            continue
-
-        for expiry_date in expiries:
-            days_until_due = (expiry_date - today).days
-            if days_until_due not in ALERT_WINDOWS:
-                continue
-
-            existing_alert = await session.scalar(
-                select(Alert).where(
-                    and_(
-                        Alert.client_id == document.client_id,
-                        Alert.document_id == document.id,
-                        Alert.expiry_date == expiry_date,
-                    )
-                )
-            )
-            if existing_alert:
-                continue
-
-            session.add(
-                Alert(
-                    client_id=document.client_id,
-                    document_id=document.id,
-                    expiry_date=expiry_date,
-                    alert_date=calculate_alert_date(expiry_date),
-                )
-            )
-            created += 1
+    due_dates = [today + timedelta(days=days) for days in sorted(ALERT_WINDOWS)]
+
+    candidates = _deadline_candidates(due_dates)
+    alert_date = case(
+        *((candidates.c.expiry_date == due_date, calculate_alert_date(due_date)) for due_date in due_dates)
+    )
+    not_alerted = ~exists().where(
+        Alert.client_id == candidates.c.client_id,
+        Alert.document_id == candidates.c.document_id,
+        Alert.expiry_date == candidates.c.expiry_date,
+    )
+    client_ids = list(await session.scalars(select(candidates.c.client_id).where(not_alerted).distinct()))
+    if not client_ids:
+        return 0
+
+    missing = select(
+        candidates.c.client_id,
+        candidates.c.document_id,
+        candidates.c.expiry_date,
+        alert_date,
+        literal(datetime.utcnow(), DateTime),
+    ).where(not_alerted)
+
+    result = await session.execute(
+        insert(Alert).from_select(
+            ["client_id", "document_id", "expiry_date", "alert_date", "created_at"],
+            missing,
+        )
+    )
+    created = max(result.rowcount or 0, 0)
 
     if created:
+        # INSERT ... SELECT no pasa por el flush del ORM: resumen de clientes y contadores del panel a mano.
+        await refresh_client_status_async(session, client_ids)
         await session.commit()
+        dashboard_metrics.invalidate()
 
     return created
+
+
+async def collect_unreferenced_blobs(session: AsyncSession) -> int:
+    """Delete stored files that no document or client references any more."""
+    return await session.run_sync(lambda sync_session: collect_garbage(sync_session.connection()))
+
+
+async def evict_thumbnails() -> int:
+    """Enforce the thumbnail cache limit, including thumbnails built by the PDF worker processes."""
+    return await asyncio.to_thread(thumbnail_cache.evict)
+
+
+async def optimize_database(session: AsyncSession) -> tuple[int, int, int] | None:
+    """Checkpoint the SQLite WAL and run PRAGMA optimize; no-op on other backends."""
+    return await session.run_sync(lambda sync_session: checkpoint(sync_session.connection()))
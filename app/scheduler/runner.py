@@ -5,7 +5,16 @@ import logging
 from datetime import datetime, timedelta
 
 from app.db.session import SessionLocal
-from app.scheduler.jobs import create_deadline_alerts
+from app.core.config import get_settings
+from app.scheduler.jobs import (
+    collect_unreferenced_blobs,
+    create_deadline_alerts,
+    evict_thumbnails,
+    optimize_database,
+)
+from app.services.database_backup_service import database_backup
+
+settings = get_settings()
 
 logger = logging.getLogger(__name__)
 
@@ -15,6 +24,7 @@ class DailyScheduler:
         self.run_hour = run_hour
         self.run_minute = run_minute
         self._task: asyncio.Task[None] | None = None
+        self._maintenance_task: asyncio.Task[None] | None = None
         self._stopped = asyncio.Event()
 
     def start(self) -> None:
@@ -22,15 +32,27 @@ class DailyScheduler:
             return
         self._stopped.clear()
         self._task = asyncio.create_task(self._run_loop())
+        if settings.sqlite_checkpoint_minutes > 0:
+            self._maintenance_task = asyncio.create_task(self._maintenance_loop())
 
     async def stop(self) -> None:
         self._stopped.set()
         if self._task:
             await self._task
+        if self._maintenance_task:
+            await self._maintenance_task
 
     async def run_once(self) -> int:
         async with SessionLocal() as session:
-            return await create_deadline_alerts(session)
+            created = await create_deadline_alerts(session)
+            await collect_unreferenced_blobs(session)
+            await evict_thumbnails()
+            await optimize_database(session)
+            return created
+
+    async def run_maintenance(self) -> tuple[int, int, int] | None:
+        async with SessionLocal() as session:
+            return await optimize_database(session)
 
     async def _run_loop(self) -> None:
         while not self._stopped.is_set():
@@ -47,6 +69,24 @@ class DailyScheduler:
             except Exception:
                 logger.exception("Daily alert job failed")
 
+            if settings.backup_scheduled and database_backup.start("scheduled"):
+                logger.info("Scheduled database backup started")
+
+    async def _maintenance_loop(self) -> None:
+        interval = settings.sqlite_checkpoint_minutes * 60
+        while not self._stopped.is_set():
+            try:
+                await asyncio.wait_for(self._stopped.wait(), timeout=interval)
+                break
+            except asyncio.TimeoutError:
+                pass
+
+            try:
+                result = await self.run_maintenance()
+                logger.debug("SQLite checkpoint completed: %s", result)
+            except Exception:
+                logger.exception("SQLite checkpoint failed")
+
     def _seconds_until_next_run(self) -> float:
         now = datetime.now()
         next_run = now.replace(hour=self.run_hour, minute=self.run_minute, second=0, microsecond=0)
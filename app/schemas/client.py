@@ -1,6 +1,8 @@
-from datetime import datetime
+from datetime import date, datetime
 
-from pydantic import BaseModel, ConfigDict
+from pydantic import BaseModel, ConfigDict, model_validator
+
+from app.models.client import ClientStatus
 
 
 class ClientBase(BaseModel):
@@ -28,5 +30,19 @@ class ClientUpdate(BaseModel):
 class ClientRead(ClientBase):
     id: int
     created_at: datetime
+    status_color: str = "green"
+    alert_count: int = 0
+    earliest_alert_date: date | None = None
 
     model_config = ConfigDict(from_attributes=True)
+
+    @model_validator(mode="after")
+    def _current_status_color(self) -> "ClientRead":
+        # El color no se guarda en la BD: sale de las fechas del resumen de alertas, igual que el filtro del listado.
+        if self.earliest_alert_date is not None and self.earliest_alert_date <= date.today():
+            self.status_color = ClientStatus.RED.value
+        elif self.alert_count > 0:
+            self.status_color = ClientStatus.YELLOW.value
+        else:
+            self.status_color = ClientStatus.GREEN.value
+        return self
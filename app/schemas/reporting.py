@@ -12,6 +12,8 @@ class DashboardSummary(BaseModel):
     documents_total: int
     alerts_total: int
     alerts_due_today_or_older: int
+    documents_expired: int = 0
+    documents_missing_pdf: int = 0
 
 
 class RenewedDocumentItem(BaseModel):
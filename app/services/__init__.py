@@ -1,16 +1,25 @@
 from app.services.alert_service import calculate_alert_date
-from app.services.audit_log_service import log_event, read_recent_logs
+from app.services.audit_log_service import log_event, read_recent_logs, search_logs
+from app.services.client_import_service import ClientImportEngine
+from app.services.client_status_service import refresh_client_status
+from app.services.import_job_service import ImportJobManager
 from app.services.importer_service import ImportResult, ImportValidationError, ImportedRow, SpreadsheetImporter
-from app.services.storage_service import save_client_photo, save_document_pdf
+from app.services.storage_service import StoredUpload, UploadTooLargeError, save_client_photo, save_document_pdf
 
 __all__ = [
+    "ClientImportEngine",
+    "ImportJobManager",
     "ImportResult",
     "ImportValidationError",
     "ImportedRow",
     "SpreadsheetImporter",
+    "StoredUpload",
+    "UploadTooLargeError",
     "calculate_alert_date",
     "log_event",
     "read_recent_logs",
+    "refresh_client_status",
     "save_client_photo",
     "save_document_pdf",
+    "search_logs",
 ]
@@ -1,20 +1,378 @@
+"""Audit log written by a background thread.
+
+``log_event`` only puts the line on a queue; the writer thread drains it in batches into
+``storage/logs/app.log``, which stays open between batches. The file is rotated by size
+and by age into ``app_<timestamp>.log`` and only the newest rotated files are kept.
+
+Each line is a JSON object (``ts``, ``action``, entity ids, ``details``). Next to every log
+file an ``.idx`` file lists the byte offset of a line every ``INDEX_STEP_BYTES``, so reads
+seek backwards from the end or from an offset instead of loading whole files.
+"""
+
+from __future__ import annotations
+
+import atexit
+import bisect
+import json
+import os
+import queue
+import re
+import threading
+import time
+from dataclasses import dataclass, field
 from datetime import datetime
 from pathlib import Path
+from typing import Any, BinaryIO, Iterator
+
+from app.core.config import get_settings
+
+settings = get_settings()
 
 LOG_DIR = Path("storage/logs")
 LOG_FILE = LOG_DIR / "app.log"
+BATCH_SIZE = 500
+FLUSH_INTERVAL_SECONDS = 0.5
+SHUTDOWN_TIMEOUT = 5
+INDEX_STEP_BYTES = 64 * 1024
+READ_CHUNK_SIZE = 64 * 1024
+ENTITY_IDS = ("client_id", "document_id", "alert_id", "job_id")
+_ENTITY_PATTERN = re.compile(rf"\b({'|'.join(ENTITY_IDS)})=(\d+)")
+# Lineas de texto anteriores al formato JSON: "[2024-01-01T10:00:00] accion: detalles".
+_LEGACY_PATTERN = re.compile(r"^\[(?P<ts>[^\]]+)\] (?P<action>[^:]+): ?(?P<details>.*)$")
+
+
+def index_path(log_file: Path) -> Path:
+    return log_file.with_suffix(".idx")
+
+
+class AuditLogWriter:
+    def __init__(self, log_file: Path = LOG_FILE) -> None:
+        self.log_file = log_file
+        self._queue: queue.SimpleQueue[str | threading.Event | None] = queue.SimpleQueue()
+        self._lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+        self._stream: BinaryIO | None = None
+        self._index: BinaryIO | None = None
+        self._size = 0
+        self._last_indexed = 0
+        self._period = 0
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def write(self, line: str) -> None:
+        self._ensure_started()
+        self._queue.put(line)
+
+    def flush(self, timeout: float | None = SHUTDOWN_TIMEOUT) -> bool:
+        """Block until every line queued so far is on disk."""
+        if not self.running:
+            return True
+        done = threading.Event()
+        self._queue.put(done)
+        return done.wait(timeout)
+
+    def close(self, timeout: float | None = SHUTDOWN_TIMEOUT) -> None:
+        """Write what is pending and stop the thread; a later ``write`` starts it again."""
+        with self._lock:
+            thread = self._thread
+            if thread is None:
+                return
+            self._queue.put(None)
+            thread.join(timeout)
+            self._thread = None
+
+    def _ensure_started(self) -> None:
+        if self.running:
+            return
+        with self._lock:
+            if not self.running:
+                self._thread = threading.Thread(target=self._run, name="audit-log", daemon=True)
+                self._thread.start()
+
+    def _run(self) -> None:
+        stopping = False
+        while not stopping:
+            try:
+                item = self._queue.get(timeout=FLUSH_INTERVAL_SECONDS)
+            except queue.Empty:
+                continue
+            lines: list[str] = []
+            waiters: list[threading.Event] = []
+            while True:
+                if item is None:
+                    stopping = True
+                elif isinstance(item, threading.Event):
+                    waiters.append(item)
+                else:
+                    lines.append(item)
+                if stopping or len(lines) >= BATCH_SIZE:
+                    break
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+            try:
+                self._write_batch(lines)
+            except OSError:
+                # Disco lleno o fichero bloqueado: se pierde el lote, pero la aplicacion sigue.
+                self._close_stream()
+            for waiter in waiters:
+                waiter.set()
+        self._close_stream()
+
+    def _write_batch(self, lines: list[str]) -> None:
+        if not lines:
+            return
+        stream = self._open_stream()
+        if self._should_rotate():
+            self._rotate()
+            stream = self._open_stream()
+        offsets: list[int] = []
+        chunks: list[bytes] = []
+        position = self._size
+        for line in lines:
+            if position == 0 or position - self._last_indexed >= INDEX_STEP_BYTES:
+                offsets.append(position)
+                self._last_indexed = position
+            encoded = line.encode("utf-8")
+            chunks.append(encoded)
+            position += len(encoded)
+        stream.write(b"".join(chunks))
+        stream.flush()
+        self._size = position
+        if offsets and self._index is not None:
+            self._index.write("".join(f"{offset}\n" for offset in offsets).encode("ascii"))
+            self._index.flush()
+
+    def _open_stream(self) -> BinaryIO:
+        if self._stream is None:
+            self.log_file.parent.mkdir(parents=True, exist_ok=True)
+            # Binario: los offsets del indice son bytes reales tambien en Windows (sin traducir \n).
+            self._stream = self.log_file.open("ab")
+            stat = os.fstat(self._stream.fileno())
+            self._size = stat.st_size
+            self._period = self._period_of(stat.st_mtime if stat.st_size else time.time())
+            offsets = read_index(self.log_file)
+            self._last_indexed = offsets[-1] if offsets else 0
+            self._index = index_path(self.log_file).open("ab")
+        return self._stream
+
+    def _close_stream(self) -> None:
+        for handle in (self._stream, self._index):
+            if handle is not None:
+                try:
+                    handle.close()
+                except OSError:
+                    pass
+        self._stream = None
+        self._index = None
+
+    @staticmethod
+    def _period_of(timestamp: float) -> int:
+        hours = settings.log_rotate_hours
+        if hours <= 0:
+            return 0
+        # Periodos en hora local: con 24 h el fichero cambia a medianoche.
+        local = datetime.fromtimestamp(timestamp) - datetime(1970, 1, 1)
+        return int(local.total_seconds() // (hours * 3600))
+
+    def _should_rotate(self) -> bool:
+        if not self._size:
+            return False
+        if settings.log_max_mb > 0 and self._size >= settings.log_max_mb * 1024 * 1024:
+            return True
+        return self._period != self._period_of(time.time())
+
+    def _rotate(self) -> None:
+        self._close_stream()
+        stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        target = self.log_file.with_name(f"{self.log_file.stem}_{stamp}{self.log_file.suffix}")
+        counter = 1
+        while target.exists():
+            target = self.log_file.with_name(f"{self.log_file.stem}_{stamp}_{counter}{self.log_file.suffix}")
+            counter += 1
+        try:
+            os.replace(self.log_file, target)
+        except OSError:
+            # En Windows falla si otro proceso tiene app.log abierto: se sigue escribiendo y se reintenta luego.
+            return
+        try:
+            os.replace(index_path(self.log_file), index_path(target))
+        except OSError:
+            pass
+        self.prune()
+
+    def rotated_files(self) -> list[Path]:
+        pattern = f"{self.log_file.stem}_*{self.log_file.suffix}"
+        return sorted(self.log_file.parent.glob(pattern), key=lambda path: path.name)
+
+    def prune(self) -> None:
+        keep_last = settings.log_keep_files
+        if keep_last <= 0:
+            return
+        for old_file in self.rotated_files()[:-keep_last]:
+            old_file.unlink(missing_ok=True)
+            index_path(old_file).unlink(missing_ok=True)
+
+
+audit_log = AuditLogWriter()
+# Scripts de linea de comandos (restaurar copias, etc.) no pasan por el lifespan de la app.
+atexit.register(audit_log.close)
 
 
 def log_event(action: str, details: str) -> None:
-    LOG_DIR.mkdir(parents=True, exist_ok=True)
-    timestamp = datetime.utcnow().isoformat(timespec="seconds")
-    with LOG_FILE.open("a", encoding="utf-8") as stream:
-        stream.write(f"[{timestamp}] {action}: {details}\n")
+    entry: dict[str, Any] = {"ts": datetime.utcnow().isoformat(timespec="seconds"), "action": action}
+    for name, value in _ENTITY_PATTERN.findall(details):
+        entry.setdefault(name, int(value))
+    entry["details"] = details
+    audit_log.write(json.dumps(entry, ensure_ascii=False) + "\n")
 
 
-def read_recent_logs(limit: int = 200) -> list[str]:
-    if not LOG_FILE.exists():
+def parse_line(raw: bytes | str) -> dict[str, Any] | None:
+    line = raw.decode("utf-8", errors="replace") if isinstance(raw, bytes) else raw
+    line = line.strip()
+    if not line:
+        return None
+    if line.startswith("{"):
+        try:
+            entry = json.loads(line)
+        except ValueError:
+            return None
+        return entry if isinstance(entry, dict) else None
+    match = _LEGACY_PATTERN.match(line)
+    if match is None:
+        return None
+    entry = {"ts": match["ts"], "action": match["action"]}
+    for name, value in _ENTITY_PATTERN.findall(match["details"]):
+        entry.setdefault(name, int(value))
+    entry["details"] = match["details"]
+    return entry
+
+
+def format_entry(entry: dict[str, Any]) -> str:
+    return f"[{entry.get('ts', '')}] {entry.get('action', '')}: {entry.get('details', '')}"
+
+
+def _entry_time(entry: dict[str, Any]) -> datetime | None:
+    try:
+        return datetime.fromisoformat(str(entry.get("ts")))
+    except ValueError:
+        return None
+
+
+def read_index(log_file: Path) -> list[int]:
+    try:
+        return [int(raw) for raw in index_path(log_file).read_text(encoding="ascii").split()]
+    except (OSError, ValueError):
         return []
 
-    lines = LOG_FILE.read_text(encoding="utf-8").splitlines()
-    return lines[-limit:]
+
+def reverse_lines(path: Path, end: int | None = None) -> Iterator[tuple[int, bytes]]:
+    """Yield ``(offset, line)`` from ``end`` (or the end of the file) backwards, reading fixed-size blocks."""
+    with path.open("rb") as stream:
+        position = stream.seek(0, os.SEEK_END) if end is None else end
+        pending = b""
+        while position > 0:
+            size = min(READ_CHUNK_SIZE, position)
+            position -= size
+            stream.seek(position)
+            pieces = (stream.read(size) + pending).split(b"\n")
+            pending = pieces[0]
+            line_end = position + len(pieces[0])
+            starts = []
+            for piece in pieces[1:]:
+                starts.append(line_end + 1)
+                line_end += 1 + len(piece)
+            for start, piece in zip(reversed(starts), reversed(pieces[1:])):
+                if piece:
+                    yield start, piece
+        if pending:
+            yield 0, pending
+
+
+def _read_line_at(path: Path, offset: int) -> dict[str, Any] | None:
+    with path.open("rb") as stream:
+        stream.seek(offset)
+        return parse_line(stream.readline())
+
+
+def _end_before(path: Path, until: datetime) -> int | None:
+    """Offset of the first indexed line newer than ``until``: nothing at or after it can match."""
+    offsets = read_index(path)
+    if not offsets:
+        return None
+
+    def newer(offset: int) -> bool:
+        entry = _read_line_at(path, offset)
+        moment = _entry_time(entry) if entry else None
+        return moment is not None and moment > until
+
+    position = bisect.bisect_left(offsets, True, key=newer)
+    return offsets[position] if position < len(offsets) else None
+
+
+@dataclass
+class LogPage:
+    entries: list[dict[str, Any]] = field(default_factory=list)
+    # (fichero, offset) desde el que seguir leyendo hacia atras; None si no hay mas.
+    next_position: tuple[str, int] | None = None
+
+
+def log_files(log_file: Path | None = None) -> list[Path]:
+    """The current log and the rotated ones, newest first."""
+    log_file = log_file or audit_log.log_file
+    files = [log_file] if log_file.exists() else []
+    return files + list(reversed(AuditLogWriter(log_file).rotated_files()))
+
+
+def search_logs(
+    limit: int = 200,
+    *,
+    action: str | None = None,
+    client_id: int | None = None,
+    since: datetime | None = None,
+    until: datetime | None = None,
+    position: tuple[str, int] | None = None,
+    log_file: Path | None = None,
+) -> LogPage:
+    """Newest-first log entries matching the filters, ``limit`` at a time across rotated files."""
+    audit_log.flush()
+    files = log_files(log_file)
+    if position is not None:
+        names = [path.name for path in files]
+        if position[0] not in names:
+            raise ValueError(f"Fichero de log desconocido: {position[0]}")
+        files = files[names.index(position[0]) :]
+
+    page = LogPage()
+    for file_index, path in enumerate(files):
+        end = position[1] if position is not None and file_index == 0 else None
+        if until is not None:
+            indexed_end = _end_before(path, until)
+            if indexed_end is not None:
+                end = indexed_end if end is None else min(end, indexed_end)
+        for offset, raw in reverse_lines(path, end):
+            entry = parse_line(raw)
+            if entry is None:
+                continue
+            moment = _entry_time(entry)
+            if since is not None and moment is not None and moment < since:
+                # Los ficheros van en orden cronologico: todo lo que queda es mas antiguo.
+                return page
+            if until is not None and moment is not None and moment > until:
+                continue
+            if action is not None and entry.get("action") != action:
+                continue
+            if client_id is not None and entry.get("client_id") != client_id:
+                continue
+            if len(page.entries) == limit:
+                page.next_position = (path.name, offset + len(raw))
+                return page
+            page.entries.append(entry)
+    return page
+
+
+def read_recent_logs(limit: int = 200) -> list[str]:
+    return [format_entry(entry) for entry in reversed(search_logs(limit).entries)]
@@ -0,0 +1,370 @@
+from __future__ import annotations
+
+from dataclasses import fields, replace
+from datetime import date, datetime
+from itertools import islice
+from typing import Any, Iterable, Sequence
+
+from sqlalchemy import Connection, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.alert import Alert
+from app.models.client import Client
+from app.models.document import Document, DocumentType, PaymentMethod
+from app.services.alert_service import calculate_alert_date
+from app.services.importer_service import (
+    ImportResult,
+    ImportedRow,
+    parse_document_type,
+    parse_fundae_payment_type,
+    parse_payment_method,
+    to_bool,
+    to_date,
+)
+
+# SQLite limita el numero de parametros por sentencia; las busquedas IN se trocean.
+LOOKUP_CHUNK_SIZE = 500
+# Filas que se resuelven y se escriben juntas: acota la memoria aunque llegue el fichero entero.
+APPLY_CHUNK_SIZE = 500
+
+FINGERPRINT_FIELDS = (
+    "doc_type",
+    "expiry_date",
+    "issue_date",
+    "birth_date",
+    "address",
+    "course_number",
+    "renewed_with_us",
+    "payment_method",
+    "fundae",
+    "fundae_payment_type",
+    "operation_number",
+    "flag_fran",
+    "flag_ciusaba",
+    "flag_permiso_c",
+    "flag_permiso_d",
+    "expiry_fran",
+    "expiry_ciusaba",
+)
+TEXT_FINGERPRINT_FIELDS = {"address", "course_number", "operation_number"}
+
+
+def collect_document_expiry_dates(document: Document) -> list[date]:
+    expiries: list[date] = []
+    if document.doc_type == DocumentType.POWER_OF_ATTORNEY:
+        if document.flag_fran and document.expiry_fran:
+            expiries.append(document.expiry_fran)
+        if document.flag_ciusaba and document.expiry_ciusaba:
+            expiries.append(document.expiry_ciusaba)
+        return list(dict.fromkeys(expiries))
+
+    if document.expiry_date:
+        expiries.append(document.expiry_date)
+    return expiries
+
+
+def _none_if_blank(value: Any) -> Any:
+    if isinstance(value, str):
+        cleaned = value.strip()
+        return cleaned if cleaned else None
+    return value
+
+
+def _fingerprint_value(field_name: str, value: Any) -> Any:
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        return value.date()
+    if field_name in TEXT_FINGERPRINT_FIELDS:
+        # Las columnas de texto guardan como cadena los numeros que llegan del Excel.
+        return str(value)
+    return value
+
+
+def _document_fingerprint(nif: str, values: dict[str, Any]) -> tuple[Any, ...]:
+    return (nif, *(_fingerprint_value(name, values.get(name)) for name in FINGERPRINT_FIELDS))
+
+
+def _chunks(items: Sequence[Any], size: int) -> Iterable[Sequence[Any]]:
+    for start in range(0, len(items), size):
+        yield items[start : start + size]
+
+
+def _begin_sqlite(connection: Connection) -> None:
+    # pysqlite no abre transaccion hasta el primer INSERT/UPDATE: sin un BEGIN explicito, el primer
+    # SAVEPOINT seria la transaccion exterior y al liberarlo se confirmaria sin esperar al commit.
+    if connection.dialect.name == "sqlite" and not connection.connection.driver_connection.in_transaction:
+        connection.exec_driver_sql("BEGIN")
+
+
+class ClientImportEngine:
+    """Resolve imported rows against preloaded clients/documents and write them in batches.
+
+    Each call to ``apply`` loads the clients and documents of the NIFs present in
+    the rows with a handful of ``IN`` queries, resolves every row in memory with
+    the same rules and messages as the row-by-row importer, and flushes the new
+    clients, documents and alerts as batched INSERTs. The caller owns the commit,
+    so the engine can be fed the whole file or consecutive chunks of it; rows are
+    consumed ``APPLY_CHUNK_SIZE`` at a time either way.
+
+    Each batch is written inside a savepoint. If its flush hits an integrity error,
+    the savepoint is rolled back and the batch is replayed row by row, so only the
+    offending rows are lost and reported in ``errors``.
+    """
+
+    def __init__(self, session: AsyncSession, result: ImportResult | None = None) -> None:
+        self.session = session
+        self.result = result or ImportResult()
+
+    async def apply(self, rows: Iterable[ImportedRow]) -> ImportResult:
+        rows = iter(rows)
+        while batch := list(islice(rows, APPLY_CHUNK_SIZE)):
+            if await self._apply_in_savepoint(batch) is None:
+                continue
+            for row in batch:
+                error = await self._apply_in_savepoint([row])
+                if error is not None:
+                    self.result.errors.append(f"Fila {row.row_number}: no se pudo guardar ({error.orig}).")
+        return self.result
+
+    async def _apply_in_savepoint(self, rows: list[ImportedRow]) -> IntegrityError | None:
+        """Apply ``rows`` in a savepoint; on an integrity error undo them, counters included, and return it."""
+        before = replace(self.result, errors=list(self.result.errors))
+        connection = await self.session.connection()
+        await connection.run_sync(_begin_sqlite)
+        try:
+            async with self.session.begin_nested():
+                await self._apply_rows(rows)
+        except IntegrityError as exc:
+            for result_field in fields(before):
+                setattr(self.result, result_field.name, getattr(before, result_field.name))
+            return exc
+        return None
+
+    async def _apply_rows(self, rows: list[ImportedRow]) -> None:
+        nifs = sorted({str(row.data.get("nif") or "").strip() for row in rows} - {""})
+
+        clients_by_nif = await self._load_clients(nifs)
+        fingerprints, licenses_by_nif = await self._load_documents(clients_by_nif)
+
+        new_clients: list[Client] = []
+        new_documents: list[tuple[Document, Client]] = []
+
+        for row in rows:
+            try:
+                self._resolve_row(row, clients_by_nif, fingerprints, licenses_by_nif, new_clients, new_documents)
+            except Exception as exc:  # noqa: BLE001
+                self.result.errors.append(f"Fila {row.row_number}: {exc}")
+
+        await self._write(new_clients, new_documents)
+
+    async def _load_clients(self, nifs: list[str]) -> dict[str, Client]:
+        clients_by_nif: dict[str, Client] = {}
+        for chunk in _chunks(nifs, LOOKUP_CHUNK_SIZE):
+            for client in await self.session.scalars(select(Client).where(Client.nif.in_(chunk))):
+                clients_by_nif[client.nif] = client
+        return clients_by_nif
+
+    async def _load_documents(
+        self,
+        clients_by_nif: dict[str, Client],
+    ) -> tuple[set[tuple[Any, ...]], dict[str, Document]]:
+        nif_by_client_id = {client.id: nif for nif, client in clients_by_nif.items()}
+        fingerprints: set[tuple[Any, ...]] = set()
+        licenses_by_nif: dict[str, Document] = {}
+
+        client_ids = sorted(nif_by_client_id)
+        for chunk in _chunks(client_ids, LOOKUP_CHUNK_SIZE):
+            documents = await self.session.scalars(
+                select(Document).where(Document.client_id.in_(chunk)).order_by(Document.id.asc())
+            )
+            for document in documents:
+                nif = nif_by_client_id[document.client_id]
+                fingerprints.add(
+                    _document_fingerprint(nif, {name: getattr(document, name) for name in FINGERPRINT_FIELDS})
+                )
+                if document.doc_type == DocumentType.DRIVING_LICENSE:
+                    licenses_by_nif.setdefault(nif, document)
+        return fingerprints, licenses_by_nif
+
+    def _resolve_row(
+        self,
+        row: ImportedRow,
+        clients_by_nif: dict[str, Client],
+        fingerprints: set[tuple[Any, ...]],
+        licenses_by_nif: dict[str, Document],
+        new_clients: list[Client],
+        new_documents: list[tuple[Document, Client]],
+    ) -> None:
+        data = row.data
+        result = self.result
+
+        nif = str(data.get("nif") or "").strip()
+        full_name = str(data.get("full_name") or "").strip()
+        phone = str(data.get("phone") or "").strip()
+        company_raw = data.get("company")
+        company = str(company_raw).strip() if company_raw is not None else None
+        if company == "":
+            company = None
+        email_raw = data.get("email")
+        email = str(email_raw).strip() if email_raw is not None else None
+        if email == "":
+            email = None
+
+        if not nif or not full_name:
+            result.errors.append(f"Fila {row.row_number}: faltan campos obligatorios.")
+            return
+
+        client = clients_by_nif.get(nif)
+        if client is None:
+            client = Client(full_name=full_name, nif=nif, phone=phone, company=company, email=email)
+            clients_by_nif[nif] = client
+            new_clients.append(client)
+            result.clients_created += 1
+        else:
+            client.full_name = full_name
+            if phone:
+                client.phone = phone
+            if company is not None:
+                client.company = company
+            if email is not None:
+                client.email = email
+            result.clients_updated += 1
+
+        doc_type = parse_document_type(data.get("document_type"))
+        if not doc_type:
+            return
+
+        expiry_date = to_date(data.get("expiry_date"))
+        renewed_with_us = to_bool(data.get("renewed_with_us") or data.get("renovado_con_nosotros"))
+        raw_payment_method = data.get("payment_method") or data.get("forma_pago") or data.get("forma de pago")
+        payment_method = parse_payment_method(raw_payment_method)
+        fundae = to_bool(data.get("fundae") or data.get("fundae_flag") or data.get("flag_fundae"))
+        if isinstance(raw_payment_method, str) and raw_payment_method.strip().lower() == "fundae":
+            payment_method = PaymentMethod.EMPRESA
+            fundae = True
+        fundae_payment_type = parse_fundae_payment_type(
+            data.get("fundae_payment_type") or data.get("fundae_tipo_pago") or data.get("fundae tipo pago")
+        )
+        operation_number_raw = data.get("operation_number") or data.get("numero_operacion") or data.get("numero de operacion")
+        operation_number = str(operation_number_raw).strip() if operation_number_raw else None
+        if operation_number == "":
+            operation_number = None
+
+        if doc_type not in {DocumentType.CAP, DocumentType.TACHOGRAPH_CARD}:
+            renewed_with_us = False
+            payment_method = None
+            fundae = False
+            fundae_payment_type = None
+            operation_number = None
+        elif not renewed_with_us:
+            payment_method = None
+            fundae = False
+            fundae_payment_type = None
+            operation_number = None
+        elif payment_method is None:
+            result.errors.append(f"Fila {row.row_number}: renovado con nosotros requiere forma de pago.")
+            return
+        elif payment_method != PaymentMethod.EMPRESA:
+            fundae = False
+            fundae_payment_type = None
+            operation_number = None
+
+        if doc_type not in {DocumentType.POWER_OF_ATTORNEY, DocumentType.DRIVING_LICENSE} and not expiry_date:
+            result.errors.append(f"Fila {row.row_number}: falta la fecha de caducidad del documento.")
+            return
+
+        flag_fran = to_bool(data.get("flag_fran"))
+        flag_ciusaba = to_bool(data.get("flag_ciusaba"))
+        flag_permiso_c = to_bool(data.get("flag_permiso_c") or data.get("permiso_c") or data.get("flag_c"))
+        flag_permiso_d = to_bool(data.get("flag_permiso_d") or data.get("permiso_d") or data.get("flag_d"))
+        expiry_fran = to_date(data.get("expiry_fran"))
+        expiry_ciusaba = to_date(data.get("expiry_ciusaba"))
+        if doc_type != DocumentType.DRIVING_LICENSE:
+            flag_permiso_c = False
+            flag_permiso_d = False
+        if doc_type == DocumentType.POWER_OF_ATTORNEY:
+            has_valid_expiry = (flag_fran and expiry_fran) or (flag_ciusaba and expiry_ciusaba)
+            if not has_valid_expiry:
+                result.errors.append(
+                    f"Fila {row.row_number}: en poder notarial debe existir Apoderamiento Fran o Apoderamiento CIUSABA con su fecha de caducidad."
+                )
+                return
+
+        if doc_type == DocumentType.DRIVING_LICENSE:
+            existing_license = licenses_by_nif.get(nif)
+            if existing_license is not None:
+                merged_c = bool(existing_license.flag_permiso_c) or flag_permiso_c
+                merged_d = bool(existing_license.flag_permiso_d) or flag_permiso_d
+                changed = False
+                if merged_c != existing_license.flag_permiso_c:
+                    existing_license.flag_permiso_c = merged_c
+                    changed = True
+                if merged_d != existing_license.flag_permiso_d:
+                    existing_license.flag_permiso_d = merged_d
+                    changed = True
+                if changed:
+                    result.documents_updated_existing += 1
+                else:
+                    result.documents_skipped_existing += 1
+                return
+
+        values = {
+            "doc_type": doc_type,
+            "expiry_date": expiry_date,
+            "issue_date": to_date(data.get("issue_date")),
+            "birth_date": to_date(data.get("birth_date")),
+            "address": _none_if_blank(data.get("address")),
+            "course_number": _none_if_blank(data.get("course_number")),
+            "renewed_with_us": renewed_with_us,
+            "payment_method": payment_method,
+            "fundae": fundae,
+            "fundae_payment_type": fundae_payment_type,
+            "operation_number": operation_number,
+            "flag_fran": flag_fran,
+            "flag_ciusaba": flag_ciusaba,
+            "flag_permiso_c": flag_permiso_c,
+            "flag_permiso_d": flag_permiso_d,
+            "expiry_fran": expiry_fran,
+            "expiry_ciusaba": expiry_ciusaba,
+        }
+        fingerprint = _document_fingerprint(nif, values)
+        if fingerprint in fingerprints:
+            result.documents_skipped_existing += 1
+            return
+
+        document = Document(**values)
+        fingerprints.add(fingerprint)
+        if doc_type == DocumentType.DRIVING_LICENSE:
+            licenses_by_nif[nif] = document
+        new_documents.append((document, client))
+        result.documents_created += 1
+
+    async def _write(self, new_clients: list[Client], new_documents: list[tuple[Document, Client]]) -> None:
+        if new_clients:
+            self.session.add_all(new_clients)
+            await self.session.flush()
+
+        if new_documents:
+            for document, client in new_documents:
+                document.client_id = client.id
+            self.session.add_all([document for document, _ in new_documents])
+            await self.session.flush()
+
+            # Los documentos son nuevos: no pueden tener alertas previas.
+            self.session.add_all(
+                [
+                    Alert(
+                        client_id=document.client_id,
+                        document_id=document.id,
+                        expiry_date=due_date,
+                        alert_date=calculate_alert_date(due_date),
+                    )
+                    for document, _ in new_documents
+                    for due_date in collect_document_expiry_dates(document)
+                ]
+            )
+
+        # Vuelca tambien las actualizaciones de clientes y carnets existentes.
+        await self.session.flush()
@@ -0,0 +1,79 @@
+from __future__ import annotations
+
+from itertools import chain
+from typing import Any, Iterable, Sequence
+
+from sqlalchemy import Connection, event, func, inspect, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import set_committed_value
+
+from app.models.alert import Alert
+from app.models.client import Client
+
+STATUS_CHUNK_SIZE = 500
+STATUS_FIELDS = ("earliest_alert_date", "latest_alert_date", "alert_count")
+
+_clients = Client.__table__
+_alerts = Alert.__table__
+
+
+def _status_values() -> dict[str, Any]:
+    client_alerts = _alerts.c.client_id == _clients.c.id
+    return {
+        "earliest_alert_date": select(func.min(_alerts.c.alert_date)).where(client_alerts).scalar_subquery(),
+        "latest_alert_date": select(func.max(_alerts.c.alert_date)).where(client_alerts).scalar_subquery(),
+        "alert_count": select(func.count()).where(client_alerts).scalar_subquery(),
+    }
+
+
+def _chunks(items: Sequence[int], size: int) -> Iterable[Sequence[int]]:
+    for start in range(0, len(items), size):
+        yield items[start : start + size]
+
+
+def refresh_client_status(connection: Connection, client_ids: Iterable[int] | None = None) -> None:
+    """Recompute the alert summary of the given clients (all of them when ``client_ids`` is None)."""
+    values = _status_values()
+    if client_ids is None:
+        connection.execute(update(_clients).values(values))
+        return
+    for chunk in _chunks(sorted(set(client_ids)), STATUS_CHUNK_SIZE):
+        connection.execute(update(_clients).where(_clients.c.id.in_(chunk)).values(values))
+
+
+async def refresh_client_status_async(session: AsyncSession, client_ids: Iterable[int] | None = None) -> None:
+    ids = None if client_ids is None else list(client_ids)
+    await session.run_sync(lambda sync_session: refresh_client_status(sync_session.connection(), ids))
+
+
+def _sync_loaded_clients(session: Session, connection: Connection, client_ids: set[int]) -> None:
+    loaded = {
+        instance.id: instance
+        for instance in session.identity_map.values()
+        if isinstance(instance, Client) and instance.id in client_ids
+    }
+    if not loaded:
+        return
+    rows = connection.execute(
+        select(_clients.c.id, *(_clients.c[name] for name in STATUS_FIELDS)).where(_clients.c.id.in_(list(loaded)))
+    )
+    for row in rows:
+        for name in STATUS_FIELDS:
+            set_committed_value(loaded[row.id], name, row._mapping[name])
+
+
+@event.listens_for(Session, "after_flush")
+def _refresh_status_after_alert_writes(session: Session, flush_context: Any) -> None:
+    client_ids: set[int] = set()
+    for instance in chain(session.new, session.dirty, session.deleted):
+        if isinstance(instance, Alert):
+            client_ids.add(instance.client_id)
+            client_ids.update(inspect(instance).attrs.client_id.history.deleted)
+    client_ids.discard(None)
+    if not client_ids:
+        return
+
+    connection = session.connection()
+    refresh_client_status(connection, client_ids)
+    _sync_loaded_clients(session, connection, client_ids)
@@ -0,0 +1,214 @@
+"""Online SQLite backups that copy the database in small paged steps from a background thread.
+
+Between steps the source is unlocked for a moment, so writers keep working while a
+large database is being copied. The copy goes to a hidden ``.partial`` file and is
+renamed only once complete, so ``restore_backup.bat`` never picks up half a backup.
+"""
+
+from __future__ import annotations
+
+import enum
+import os
+import sqlite3
+import threading
+import time
+from contextlib import closing
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Any
+
+from sqlalchemy.engine import make_url
+
+from app.core.config import get_settings
+from app.services.audit_log_service import log_event
+
+settings = get_settings()
+
+
+class BackupState(str, enum.Enum):
+    IDLE = "idle"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+
+class BackupCancelled(Exception):
+    pass
+
+
+@dataclass
+class DatabaseBackupStatus:
+    state: BackupState = BackupState.IDLE
+    trigger: str | None = None
+    pages_total: int = 0
+    pages_copied: int = 0
+    started_at: datetime | None = None
+    finished_at: datetime | None = None
+    error: str | None = None
+    last_backup_path: str | None = None
+    last_completed_at: datetime | None = None
+    last_duration_seconds: float | None = None
+
+    def to_dict(self) -> dict[str, Any]:
+        progress = round(self.pages_copied / self.pages_total, 4) if self.pages_total else None
+        return {
+            "state": self.state.value,
+            "trigger": self.trigger,
+            "pages_total": self.pages_total,
+            "pages_copied": self.pages_copied,
+            "progress": progress,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "error": self.error,
+            "last_backup_path": self.last_backup_path,
+            "last_completed_at": self.last_completed_at,
+            "last_duration_seconds": self.last_duration_seconds,
+        }
+
+
+def resolve_sqlite_path(database_url: str) -> Path | None:
+    try:
+        parsed = make_url(database_url)
+    except Exception:
+        return None
+
+    if parsed.get_backend_name() != "sqlite":
+        return None
+
+    raw_path = parsed.database
+    if not raw_path or raw_path == ":memory:":
+        return None
+
+    # SQLAlchemy may expose Windows absolute paths as /C:/...
+    if os.name == "nt" and len(raw_path) > 2 and raw_path[0] == "/" and raw_path[2] == ":":
+        raw_path = raw_path[1:]
+
+    db_path = Path(raw_path).expanduser()
+    if not db_path.is_absolute():
+        db_path = Path.cwd() / db_path
+    return db_path
+
+
+def cleanup_old_backups(backup_dir: Path, pattern: str, keep_last: int) -> None:
+    if keep_last <= 0:
+        return
+
+    backups = sorted(backup_dir.glob(pattern), key=lambda p: p.name, reverse=True)
+    for old_file in backups[keep_last:]:
+        try:
+            old_file.unlink()
+        except OSError:
+            continue
+
+
+class DatabaseBackupService:
+    def __init__(self, database_url: str | None = None) -> None:
+        self.database_url = database_url or settings.database_url
+        self.status = DatabaseBackupStatus()
+        self._lock = threading.Lock()
+        self._cancel = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    @property
+    def db_path(self) -> Path | None:
+        return resolve_sqlite_path(self.database_url)
+
+    @property
+    def running(self) -> bool:
+        return self.status.state == BackupState.RUNNING
+
+    def start(self, trigger: str = "manual") -> bool:
+        """Launch a backup in a background thread; False if one is already running or there is nothing to copy."""
+        db_path = self.db_path
+        if db_path is None or not db_path.exists() or not self._begin(trigger):
+            return False
+        self._thread = threading.Thread(target=self._copy, args=(db_path,), name="database-backup", daemon=True)
+        self._thread.start()
+        return True
+
+    def run(self, trigger: str = "manual") -> Path | None:
+        """Same backup, but in the calling thread (e.g. right before a schema reset wipes the data)."""
+        db_path = self.db_path
+        if db_path is None or not db_path.exists() or not self._begin(trigger):
+            return None
+        return self._copy(db_path)
+
+    def cancel(self) -> None:
+        self._cancel.set()
+
+    def join(self, timeout: float | None = None) -> DatabaseBackupStatus:
+        if self._thread is not None:
+            self._thread.join(timeout)
+        return self.status
+
+    def _begin(self, trigger: str) -> bool:
+        with self._lock:
+            if self.running:
+                return False
+            self._cancel.clear()
+            self.status.state = BackupState.RUNNING
+            self.status.trigger = trigger
+            self.status.pages_total = 0
+            self.status.pages_copied = 0
+            self.status.started_at = datetime.utcnow()
+            self.status.finished_at = None
+            self.status.error = None
+            return True
+
+    def _progress(self, status: int, remaining: int, total: int) -> None:
+        self.status.pages_total = total
+        self.status.pages_copied = total - remaining
+        if self._cancel.is_set():
+            raise BackupCancelled()
+        if remaining:
+            time.sleep(settings.backup_step_sleep_ms / 1000)
+
+    def _copy(self, db_path: Path) -> Path | None:
+        backup_dir = db_path.parent / "backups"
+        backup_dir.mkdir(parents=True, exist_ok=True)
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        db_suffix = db_path.suffix or ".db"
+        backup_path = backup_dir / f"{db_path.stem}_{timestamp}{db_suffix}"
+        partial_path = backup_dir / f".{backup_path.name}.partial"
+        started = time.monotonic()
+
+        try:
+            with closing(sqlite3.connect(str(db_path), timeout=settings.sqlite_busy_timeout_ms / 1000)) as source:
+                with closing(sqlite3.connect(str(partial_path))) as target:
+                    source.backup(target, pages=settings.backup_pages_per_step, progress=self._progress)
+                    # La copia hereda el modo WAL del origen: se deja como un unico fichero autocontenido.
+                    target.execute("PRAGMA journal_mode = DELETE")
+            os.replace(partial_path, backup_path)
+        except BackupCancelled:
+            partial_path.unlink(missing_ok=True)
+            self._finish(BackupState.CANCELLED)
+            log_event("database_backup_cancelled", f"source={db_path.as_posix()}, trigger={self.status.trigger}")
+            return None
+        except Exception as exc:  # noqa: BLE001
+            partial_path.unlink(missing_ok=True)
+            self._finish(BackupState.FAILED, error=str(exc))
+            log_event("database_backup_error", f"source={db_path.as_posix()}, trigger={self.status.trigger}, error={exc}")
+            return None
+
+        cleanup_old_backups(backup_dir, f"{db_path.stem}_*{db_suffix}", settings.backup_keep_last)
+        duration = round(time.monotonic() - started, 3)
+        self.status.last_backup_path = backup_path.as_posix()
+        self.status.last_duration_seconds = duration
+        self.status.last_completed_at = datetime.utcnow()
+        self._finish(BackupState.COMPLETED)
+        log_event(
+            "database_backup",
+            f"source={db_path.as_posix()}, backup={backup_path.as_posix()}, trigger={self.status.trigger}, "
+            f"pages={self.status.pages_total}, seconds={duration}",
+        )
+        return backup_path
+
+    def _finish(self, state: BackupState, error: str | None = None) -> None:
+        self.status.error = error
+        self.status.finished_at = datetime.utcnow()
+        self.status.state = state
+
+
+database_backup = DatabaseBackupService()
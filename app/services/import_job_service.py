@@ -0,0 +1,171 @@
+from __future__ import annotations
+
+import asyncio
+import enum
+import uuid
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from itertools import islice
+from pathlib import Path
+from typing import Any, Iterator
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.core.config import get_settings
+from app.db.session import SessionLocal
+from app.services.audit_log_service import log_event
+from app.services.client_import_service import ClientImportEngine
+from app.services.importer_service import ImportedRow, ImportResult, ImportValidationError, SpreadsheetImporter
+
+settings = get_settings()
+
+MAX_FINISHED_JOBS = 50
+
+
+class ImportJobStatus(str, enum.Enum):
+    PENDING = "pending"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+
+FINISHED_STATUSES = {ImportJobStatus.COMPLETED, ImportJobStatus.FAILED, ImportJobStatus.CANCELLED}
+
+
+@dataclass
+class ImportJob:
+    id: str
+    filename: str
+    path: Path
+    status: ImportJobStatus = ImportJobStatus.PENDING
+    rows_processed: int = 0
+    chunks_committed: int = 0
+    result: ImportResult = field(default_factory=ImportResult)
+    error: str | None = None
+    cancel_requested: bool = False
+    created_at: datetime = field(default_factory=datetime.utcnow)
+    started_at: datetime | None = None
+    finished_at: datetime | None = None
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "id": self.id,
+            "filename": self.filename,
+            "status": self.status.value,
+            "rows_processed": self.rows_processed,
+            "chunks_committed": self.chunks_committed,
+            "cancel_requested": self.cancel_requested,
+            "error": self.error,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            **asdict(self.result),
+        }
+
+
+def _next_chunk(rows: Iterator[ImportedRow], size: int) -> list[ImportedRow]:
+    return list(islice(rows, size))
+
+
+class ImportJobManager:
+    """Run spreadsheet imports as background tasks that commit in chunks."""
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker[AsyncSession] = SessionLocal,
+        chunk_size: int | None = None,
+    ) -> None:
+        self.session_factory = session_factory
+        self.chunk_size = chunk_size or settings.import_commit_chunk_size
+        self._jobs: dict[str, ImportJob] = {}
+        self._tasks: dict[str, asyncio.Task[None]] = {}
+
+    def submit(self, path: Path, filename: str) -> ImportJob:
+        job = ImportJob(id=uuid.uuid4().hex, filename=filename, path=path)
+        self._jobs[job.id] = job
+        self._prune_finished()
+        task = asyncio.create_task(self._run(job))
+        self._tasks[job.id] = task
+        task.add_done_callback(lambda _: self._tasks.pop(job.id, None))
+        return job
+
+    def get(self, job_id: str) -> ImportJob | None:
+        return self._jobs.get(job_id)
+
+    def list_jobs(self) -> list[ImportJob]:
+        return sorted(self._jobs.values(), key=lambda job: job.created_at, reverse=True)
+
+    def cancel(self, job_id: str) -> ImportJob | None:
+        job = self._jobs.get(job_id)
+        if job is not None and job.status not in FINISHED_STATUSES:
+            job.cancel_requested = True
+        return job
+
+    async def wait(self, job_id: str) -> ImportJob | None:
+        task = self._tasks.get(job_id)
+        if task is not None:
+            await asyncio.shield(task)
+        return self._jobs.get(job_id)
+
+    async def shutdown(self) -> None:
+        for job_id in list(self._tasks):
+            self.cancel(job_id)
+        if self._tasks:
+            await asyncio.gather(*self._tasks.values(), return_exceptions=True)
+
+    async def _run(self, job: ImportJob) -> None:
+        job.status = ImportJobStatus.RUNNING
+        job.started_at = datetime.utcnow()
+        rows = SpreadsheetImporter().iter_file(job.path)
+        try:
+            async with self.session_factory() as session:
+                engine = ClientImportEngine(session, job.result)
+                while True:
+                    if job.cancel_requested:
+                        job.status = ImportJobStatus.CANCELLED
+                        break
+
+                    # La lectura del Excel es CPU/IO bloqueante: se hace fuera del event loop.
+                    chunk = await asyncio.to_thread(_next_chunk, rows, self.chunk_size)
+                    if not chunk:
+                        job.status = ImportJobStatus.COMPLETED
+                        break
+
+                    try:
+                        await engine.apply(chunk)
+                        await session.commit()
+                    except Exception:
+                        await session.rollback()
+                        raise
+                    job.rows_processed += len(chunk)
+                    job.chunks_committed += 1
+        except ImportValidationError as exc:
+            job.status = ImportJobStatus.FAILED
+            job.error = str(exc)
+        except Exception as exc:  # noqa: BLE001
+            job.status = ImportJobStatus.FAILED
+            job.error = f"{exc.__class__.__name__}: {exc}"
+        finally:
+            rows.close()
+            job.path.unlink(missing_ok=True)
+            job.finished_at = datetime.utcnow()
+
+        result = job.result
+        log_event(
+            "import_clients_job",
+            (
+                f"job_id={job.id}, status={job.status.value}, rows={job.rows_processed}, "
+                f"created={result.clients_created}, updated={result.clients_updated}, docs={result.documents_created}, "
+                f"docs_skipped_existing={result.documents_skipped_existing}, "
+                f"docs_updated_existing={result.documents_updated_existing}, errors={len(result.errors)}"
+            ),
+        )
+
+    def _prune_finished(self) -> None:
+        finished = [job for job in self.list_jobs() if job.status in FINISHED_STATUSES]
+        for job in finished[MAX_FINISHED_JOBS:]:
+            self._jobs.pop(job.id, None)
+
+
+import_job_manager = ImportJobManager()
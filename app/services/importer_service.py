@@ -3,14 +3,15 @@ from __future__ import annotations
 import csv
 import re
 import unicodedata
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from datetime import date, datetime
 from pathlib import Path
-from typing import Any
+from typing import Any, Iterable, Iterator, Sequence
 
 from app.models.document import DocumentType, FundaePaymentType, PaymentMethod
 
 REQUIRED_CLIENT_COLUMNS = {"full_name", "nif", "phone"}
+CAP_SHEET_COLUMNS = 10
 SPANISH_MONTHS = {
     "enero": 1,
     "febrero": 2,
@@ -36,10 +37,12 @@ class ImportedRow:
 
 @dataclass
 class ImportResult:
-    clients_created: int
-    clients_updated: int
-    documents_created: int
-    errors: list[str]
+    clients_created: int = 0
+    clients_updated: int = 0
+    documents_created: int = 0
+    documents_skipped_existing: int = 0
+    documents_updated_existing: int = 0
+    errors: list[str] = field(default_factory=list)
 
 
 class ImportValidationError(Exception):
@@ -54,47 +57,59 @@ class SpreadsheetImporter:
         file_path: str | Path,
         column_mapping: dict[str, str] | None = None,
     ) -> list[ImportedRow]:
+        return list(self.iter_file(file_path, column_mapping))
+
+    def iter_file(
+        self,
+        file_path: str | Path,
+        column_mapping: dict[str, str] | None = None,
+    ) -> Iterator[ImportedRow]:
+        """Yield mapped rows one by one without materializing the whole file."""
         path = Path(file_path)
         if path.suffix.lower() not in self.SUPPORTED_SUFFIXES:
             raise ImportValidationError(f"Tipo de archivo no soportado: {path.suffix}")
 
-        rows = self._read_csv(path) if path.suffix.lower() == ".csv" else self._read_xlsx(path)
-        mapped = self._apply_mapping(rows, column_mapping or {})
-        self._validate_required_columns(mapped)
-        return mapped
+        records = self._read_csv(path) if path.suffix.lower() == ".csv" else self._read_xlsx(path)
+        mapped = self._apply_mapping(records, column_mapping or {})
+        first = next(mapped, None)
+        self._validate_required_columns(first)
+        yield first
+        yield from mapped
 
-    def _read_csv(self, path: Path) -> list[dict[str, Any]]:
+    def _read_csv(self, path: Path) -> Iterator[dict[str, Any]]:
         with path.open("r", newline="", encoding="utf-8-sig") as stream:
             reader = csv.DictReader(stream)
-            return [dict(row) for row in reader]
+            for row in reader:
+                yield dict(row)
 
-    def _read_xlsx(self, path: Path) -> list[dict[str, Any]]:
+    def _read_xlsx(self, path: Path) -> Iterator[dict[str, Any]]:
         try:
             from openpyxl import load_workbook
         except ImportError as exc:
             raise ImportValidationError("openpyxl es obligatorio para importar archivos .xlsx") from exc
 
-        workbook = load_workbook(path, data_only=True)
-        special_rows = self._read_known_real_world_xlsx(path, workbook)
-        if special_rows is not None:
-            return special_rows
-
-        sheet = workbook.active
-        headers: list[str] = []
-        records: list[dict[str, Any]] = []
-
-        for row_idx, row in enumerate(sheet.iter_rows(values_only=True), start=1):
-            if row_idx == 1:
-                headers = [str(value).strip() if value is not None else "" for value in row]
-                continue
-
-            data = {headers[col_idx]: value for col_idx, value in enumerate(row) if col_idx < len(headers) and headers[col_idx]}
-            if any(v is not None and str(v).strip() != "" for v in data.values()):
-                records.append(data)
-
-        return records
-
-    def _read_known_real_world_xlsx(self, path: Path, workbook: Any) -> list[dict[str, Any]] | None:
+        # read_only lee las hojas en streaming; hay que cerrar el libro al terminar.
+        workbook = load_workbook(path, read_only=True, data_only=True)
+        try:
+            special_rows = self._read_known_real_world_xlsx(path, workbook)
+            if special_rows is not None:
+                yield from special_rows
+                return
+
+            rows = workbook.active.iter_rows(values_only=True)
+            header_row = next(rows, None)
+            if header_row is None:
+                return
+            headers = [str(value).strip() if value is not None else "" for value in header_row]
+
+            for row in rows:
+                data = {headers[col_idx]: value for col_idx, value in enumerate(row) if col_idx < len(headers) and headers[col_idx]}
+                if any(v is not None and str(v).strip() != "" for v in data.values()):
+                    yield data
+        finally:
+            workbook.close()
+
+    def _read_known_real_world_xlsx(self, path: Path, workbook: Any) -> Iterator[dict[str, Any]] | None:
         sheet_names = {name.lower(): name for name in workbook.sheetnames}
         stem = path.stem.lower()
 
@@ -110,18 +125,17 @@ class SpreadsheetImporter:
 
         return None
 
-    def _read_cap_real_sheet(self, path: Path, sheet: Any) -> list[dict[str, Any]]:
+    def _read_cap_real_sheet(self, path: Path, sheet: Any) -> Iterator[dict[str, Any]]:
         year = _extract_year_from_filename(path)
         if year is None:
             raise ImportValidationError(
                 "No se pudo determinar el año desde el nombre del fichero CAP (ejemplo esperado: 'CAP 2025.xlsx')."
             )
 
-        records: list[dict[str, Any]] = []
         current_issue_date: date | None = None
 
-        for row_idx in range(1, sheet.max_row + 1):
-            row_values = [sheet.cell(row=row_idx, column=col).value for col in range(1, 11)]
+        for row in sheet.iter_rows(max_col=CAP_SHEET_COLUMNS, values_only=True):
+            row_values = _pad_row(row, CAP_SHEET_COLUMNS)
             first_cell_title = _clean_text(row_values[0])
             block_title = _clean_text(row_values[1])
             dni_header = _normalize_header_token(row_values[3])
@@ -163,39 +177,32 @@ class SpreadsheetImporter:
 
             expiry_date = _add_years_safe(current_issue_date, 5) if current_issue_date else None
 
-            records.append(
-                {
+            yield {
+                "full_name": full_name,
+                "nif": nif,
+                "phone": phone,
+                "company": company,
+                "document_type": "cap",
+                "issue_date": current_issue_date,
+                "expiry_date": expiry_date,
+                "course_number": course_number,
+                "renewed_with_us": True,
+                "payment_method": "empresa",
+                "fundae": fundae,
+            }
+
+            if flag_c or flag_d:
+                yield {
                     "full_name": full_name,
                     "nif": nif,
                     "phone": phone,
                     "company": company,
-                    "document_type": "cap",
-                    "issue_date": current_issue_date,
-                    "expiry_date": expiry_date,
-                    "course_number": course_number,
-                    "renewed_with_us": True,
-                    "payment_method": "empresa",
-                    "fundae": fundae,
+                    "document_type": "driving_license",
+                    "flag_permiso_c": flag_c,
+                    "flag_permiso_d": flag_d,
                 }
-            )
 
-            if flag_c or flag_d:
-                records.append(
-                    {
-                        "full_name": full_name,
-                        "nif": nif,
-                        "phone": phone,
-                        "company": company,
-                        "document_type": "driving_license",
-                        "flag_permiso_c": flag_c,
-                        "flag_permiso_d": flag_d,
-                    }
-                )
-
-        return records
-
-    def _read_tarjetas_real_sheets(self, path: Path, conductores_sheet: Any, empresas_sheet: Any) -> list[dict[str, Any]]:
-        records: list[dict[str, Any]] = []
+    def _read_tarjetas_real_sheets(self, path: Path, conductores_sheet: Any, empresas_sheet: Any) -> Iterator[dict[str, Any]]:
         year = _extract_year_from_filename(path) or date.today().year
 
         for row in self._iter_tarjetas_rows(conductores_sheet):
@@ -207,16 +214,14 @@ class SpreadsheetImporter:
             issue_date = _coerce_date(row.get("fecha registro"))
             expiry_date = _add_years_safe(issue_date, 5) if issue_date else None
 
-            records.append(
-                {
-                    "full_name": full_name,
-                    "nif": nif,
-                    "phone": _normalize_generic_phone(row.get("telefono")),
-                    "document_type": "tachograph_card",
-                    "issue_date": issue_date,
-                    "expiry_date": expiry_date,
-                }
-            )
+            yield {
+                "full_name": full_name,
+                "nif": nif,
+                "phone": _normalize_generic_phone(row.get("telefono")),
+                "document_type": "tachograph_card",
+                "issue_date": issue_date,
+                "expiry_date": expiry_date,
+            }
 
         for row in self._iter_tarjetas_rows(empresas_sheet):
             full_name = _clean_text(row.get("nombre"))
@@ -227,75 +232,62 @@ class SpreadsheetImporter:
             issue_date = _coerce_date(row.get("fecha registro"))
             expiry_date = _add_years_safe(issue_date, 5) if issue_date else None
 
-            records.append(
-                {
+            yield {
+                "full_name": full_name,
+                "nif": nif,
+                "phone": _normalize_generic_phone(row.get("telefono")),
+                "company": full_name,
+                "document_type": "tachograph_card",
+                "issue_date": issue_date,
+                "expiry_date": expiry_date,
+            }
+
+            apodera_raw = row.get("apodera")
+            if _has_meaningful_value(apodera_raw):
+                apodera_date = _coerce_date(apodera_raw)
+                poa_expiry = expiry_date or _add_years_safe(apodera_date, 5) or date(year + 5, 1, 1)
+                yield {
                     "full_name": full_name,
                     "nif": nif,
                     "phone": _normalize_generic_phone(row.get("telefono")),
                     "company": full_name,
-                    "document_type": "tachograph_card",
-                    "issue_date": issue_date,
-                    "expiry_date": expiry_date,
+                    "document_type": "power_of_attorney",
+                    "flag_fran": True,
+                    "expiry_fran": poa_expiry,
                 }
-            )
 
-            apodera_raw = row.get("apodera")
-            if _has_meaningful_value(apodera_raw):
-                apodera_date = _coerce_date(apodera_raw)
-                poa_expiry = expiry_date or _add_years_safe(apodera_date, 5) or date(year + 5, 1, 1)
-                records.append(
-                    {
-                        "full_name": full_name,
-                        "nif": nif,
-                        "phone": _normalize_generic_phone(row.get("telefono")),
-                        "company": full_name,
-                        "document_type": "power_of_attorney",
-                        "flag_fran": True,
-                        "expiry_fran": poa_expiry,
-                    }
-                )
-
-        return records
-
-    def _iter_tarjetas_rows(self, sheet: Any) -> list[dict[str, Any]]:
-        header_values = [sheet.cell(row=1, column=col).value for col in range(1, sheet.max_column + 1)]
+    def _iter_tarjetas_rows(self, sheet: Any) -> Iterator[dict[str, Any]]:
+        rows = sheet.iter_rows(values_only=True)
+        header_values = next(rows, None) or ()
         normalized_headers = [_normalize_header_token(value) for value in header_values]
         index_map = {key: idx for idx, key in enumerate(normalized_headers) if key}
 
-        out: list[dict[str, Any]] = []
-        for row_idx in range(2, sheet.max_row + 1):
-            row_values = [sheet.cell(row=row_idx, column=col).value for col in range(1, sheet.max_column + 1)]
+        for row_values in rows:
             if not any(_has_meaningful_value(value) for value in row_values):
                 continue
 
-            out.append(
-                {
-                    "nombre": _pick_by_headers(row_values, index_map, ["nombre"]),
-                    "dni/cif": _pick_by_headers(row_values, index_map, ["dni/cif", "dni cif", "dni", "cif"]),
-                    "telefono": _pick_by_headers(row_values, index_map, ["telefono", "tlf"]),
-                    "fecha registro": _pick_by_headers(row_values, index_map, ["fecha registro"]),
-                    "apodera": _pick_by_headers(row_values, index_map, ["apodera"]),
-                }
-            )
-        return out
+            yield {
+                "nombre": _pick_by_headers(row_values, index_map, ["nombre"]),
+                "dni/cif": _pick_by_headers(row_values, index_map, ["dni/cif", "dni cif", "dni", "cif"]),
+                "telefono": _pick_by_headers(row_values, index_map, ["telefono", "tlf"]),
+                "fecha registro": _pick_by_headers(row_values, index_map, ["fecha registro"]),
+                "apodera": _pick_by_headers(row_values, index_map, ["apodera"]),
+            }
 
-    def _apply_mapping(self, rows: list[dict[str, Any]], column_mapping: dict[str, str]) -> list[ImportedRow]:
-        imported: list[ImportedRow] = []
+    def _apply_mapping(self, rows: Iterable[dict[str, Any]], column_mapping: dict[str, str]) -> Iterator[ImportedRow]:
         for idx, row in enumerate(rows, start=2):
             mapped: dict[str, Any] = {}
             for source_column, value in row.items():
                 target_key = column_mapping.get(source_column, source_column)
                 mapped[target_key] = self._normalize_value(value)
 
-            imported.append(ImportedRow(data=mapped, row_number=idx))
-
-        return imported
+            yield ImportedRow(data=mapped, row_number=idx)
 
-    def _validate_required_columns(self, rows: list[ImportedRow]) -> None:
-        if not rows:
+    def _validate_required_columns(self, first_row: ImportedRow | None) -> None:
+        if first_row is None:
             raise ImportValidationError("El archivo no contiene filas de datos.")
 
-        keys = set(rows[0].data.keys())
+        keys = set(first_row.data.keys())
         missing = REQUIRED_CLIENT_COLUMNS - keys
         if missing:
             raise ImportValidationError(f"Faltan columnas obligatorias: {', '.join(sorted(missing))}")
@@ -529,7 +521,14 @@ def _has_meaningful_value(value: Any) -> bool:
     return True
 
 
-def _pick_by_headers(row_values: list[Any], index_map: dict[str, int], candidates: list[str]) -> Any:
+def _pad_row(row: tuple[Any, ...], width: int) -> list[Any]:
+    values = list(row[:width])
+    if len(values) < width:
+        values.extend([None] * (width - len(values)))
+    return values
+
+
+def _pick_by_headers(row_values: Sequence[Any], index_map: dict[str, int], candidates: list[str]) -> Any:
     for candidate in candidates:
         idx = index_map.get(_normalize_header_token(candidate))
         if idx is None or idx >= len(row_values):
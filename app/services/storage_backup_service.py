@@ -0,0 +1,318 @@
+"""Incremental, content-addressed backups of ``storage/``.
+
+Each snapshot is a JSON manifest (path -> size, mtime, sha256) under
+``storage/backups/snapshots``; file contents live once in ``storage/backups/objects``
+named by their hash. Files whose size and mtime match the previous snapshot are not
+read again, and unchanged contents are never copied twice.
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import sys
+import threading
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Any
+
+from app.core.config import get_settings
+from app.services.audit_log_service import log_event
+
+settings = get_settings()
+
+STORAGE_DIR = Path("storage")
+MANIFEST_VERSION = 1
+SNAPSHOT_PREFIX = "storage_"
+ROLLBACK_PREFIX = "storage_before_restore_"
+COPY_CHUNK_SIZE = 1024 * 1024
+# Datos derivados o de paso, relativos a storage/: PDFs exportados, caches de informes y miniaturas,
+# subidas de importacion y temporales de blobs. Ni se copian ni se tocan al restaurar.
+EXCLUDED_DIRS = ("exports", "imports", "blobs/tmp")
+
+
+@dataclass
+class StorageSnapshot:
+    path: Path
+    files: int = 0
+    reused: int = 0
+    new_objects: int = 0
+    bytes_copied: int = 0
+
+    @property
+    def name(self) -> str:
+        return self.path.name
+
+
+class StorageBackupStore:
+    def __init__(self, storage_dir: Path = STORAGE_DIR) -> None:
+        self.storage_dir = storage_dir
+        self.backup_dir = storage_dir / "backups"
+        self.objects_dir = self.backup_dir / "objects"
+        self.snapshots_dir = self.backup_dir / "snapshots"
+        self.excluded_dirs = [self.backup_dir, *(storage_dir / name for name in EXCLUDED_DIRS)]
+
+    def snapshots(self) -> list[Path]:
+        """Snapshots from oldest to newest."""
+        if not self.snapshots_dir.is_dir():
+            return []
+        # Por fecha de escritura del manifiesto, no por nombre: "storage_before_restore_*" quedaria siempre
+        # como la mas reciente y nunca se podaria.
+        return sorted(
+            self.snapshots_dir.glob(f"{SNAPSHOT_PREFIX}*.json"), key=lambda path: (path.stat().st_mtime_ns, path.name)
+        )
+
+    def latest(self) -> Path | None:
+        # Las copias de rollback no cuentan como "la ultima": restaurar "latest" dos veces seguidas
+        # debe dejar el mismo resultado.
+        regular = [path for path in self.snapshots() if not path.name.startswith(ROLLBACK_PREFIX)]
+        return regular[-1] if regular else None
+
+    def resolve(self, name: str | None) -> Path | None:
+        if not name or name == "latest":
+            return self.latest()
+        candidate = Path(name)
+        if candidate.is_file():
+            return candidate
+        for path in (self.snapshots_dir / name, self.snapshots_dir / f"{name}.json"):
+            if path.is_file():
+                return path
+        return None
+
+    @staticmethod
+    def load_manifest(path: Path) -> dict[str, dict[str, Any]]:
+        data = json.loads(path.read_text(encoding="utf-8"))
+        return data["files"]
+
+    def object_path(self, digest: str) -> Path:
+        return self.objects_dir / digest[:2] / digest
+
+    def _is_excluded(self, path: Path) -> bool:
+        return any(path.is_relative_to(directory) for directory in self.excluded_dirs)
+
+    def _iter_storage_files(self):
+        for file_path in sorted(self.storage_dir.rglob("*")):
+            if not file_path.is_file():
+                continue
+            if self._is_excluded(file_path):
+                continue
+            yield file_path
+
+    def _store_object(self, source: Path) -> tuple[str, int]:
+        """Copy ``source`` into the object store while hashing it; returns (sha256, bytes copied)."""
+        self.objects_dir.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.objects_dir / f".{os.getpid()}_{threading.get_ident()}.tmp"
+        digest = hashlib.sha256()
+        with source.open("rb") as stream, tmp_path.open("wb") as output:
+            while chunk := stream.read(COPY_CHUNK_SIZE):
+                digest.update(chunk)
+                output.write(chunk)
+
+        target = self.object_path(digest.hexdigest())
+        if target.exists():
+            tmp_path.unlink()
+            return digest.hexdigest(), 0
+        target.parent.mkdir(parents=True, exist_ok=True)
+        os.replace(tmp_path, target)
+        return digest.hexdigest(), target.stat().st_size
+
+    def _new_snapshot_path(self, prefix: str) -> Path:
+        stem = f"{prefix}{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+        path = self.snapshots_dir / f"{stem}.json"
+        counter = 1
+        while path.exists():
+            path = self.snapshots_dir / f"{stem}_{counter}.json"
+            counter += 1
+        return path
+
+    def create_snapshot(self, prefix: str = SNAPSHOT_PREFIX) -> StorageSnapshot:
+        previous_path = self.latest()
+        previous = self.load_manifest(previous_path) if previous_path else {}
+
+        snapshot = StorageSnapshot(path=self._new_snapshot_path(prefix))
+        files: dict[str, dict[str, Any]] = {}
+        for file_path in self._iter_storage_files():
+            try:
+                stat = file_path.stat()
+                relative = file_path.relative_to(self.storage_dir).as_posix()
+                known = previous.get(relative)
+                if (
+                    known is not None
+                    and known["size"] == stat.st_size
+                    and known["mtime_ns"] == stat.st_mtime_ns
+                    and self.object_path(known["sha256"]).exists()
+                ):
+                    files[relative] = known
+                    snapshot.reused += 1
+                    continue
+
+                digest, copied = self._store_object(file_path)
+            except OSError:
+                # Fichero borrado o bloqueado mientras se recorria storage/: queda para la siguiente copia.
+                continue
+            files[relative] = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "sha256": digest}
+            if copied:
+                snapshot.new_objects += 1
+                snapshot.bytes_copied += copied
+
+        snapshot.files = len(files)
+        self.snapshots_dir.mkdir(parents=True, exist_ok=True)
+        manifest = {"version": MANIFEST_VERSION, "created_at": datetime.now().isoformat(), "files": files}
+        tmp_manifest = snapshot.path.with_suffix(".tmp")
+        tmp_manifest.write_text(json.dumps(manifest, indent=1, sort_keys=True), encoding="utf-8")
+        os.replace(tmp_manifest, snapshot.path)
+        return snapshot
+
+    def prune(self, keep_last: int) -> list[Path]:
+        """Drop all but the newest ``keep_last`` snapshots and the objects no snapshot references."""
+        removed: list[Path] = []
+        if keep_last > 0:
+            for old in self.snapshots()[:-keep_last]:
+                old.unlink(missing_ok=True)
+                removed.append(old)
+        self.collect_garbage()
+        return removed
+
+    def collect_garbage(self) -> int:
+        referenced: set[str] = set()
+        for path in self.snapshots():
+            referenced.update(entry["sha256"] for entry in self.load_manifest(path).values())
+
+        deleted = 0
+        if not self.objects_dir.is_dir():
+            return deleted
+        for object_path in self.objects_dir.rglob("*"):
+            if object_path.is_file() and (object_path.suffix == ".tmp" or object_path.name not in referenced):
+                object_path.unlink(missing_ok=True)
+                deleted += 1
+        return deleted
+
+    def restore(self, snapshot_path: Path) -> StorageSnapshot:
+        """Make ``storage/`` match the snapshot; returns the rollback snapshot taken beforehand.
+
+        Excluded directories are left as they are, even when restoring an older snapshot that
+        still lists files under them.
+        """
+        files = {
+            relative: entry
+            for relative, entry in self.load_manifest(snapshot_path).items()
+            if not self._is_excluded(self.storage_dir / relative)
+        }
+        missing = [relative for relative, entry in files.items() if not self.object_path(entry["sha256"]).exists()]
+        if missing:
+            raise FileNotFoundError(f"Faltan objetos de la copia para: {', '.join(missing[:5])}")
+
+        rollback = self.create_snapshot(prefix=ROLLBACK_PREFIX)
+
+        for file_path in list(self._iter_storage_files()):
+            if file_path.relative_to(self.storage_dir).as_posix() not in files:
+                file_path.unlink()
+
+        for relative, entry in files.items():
+            target = self.storage_dir / relative
+            if target.is_file():
+                stat = target.stat()
+                if stat.st_size == entry["size"] and stat.st_mtime_ns == entry["mtime_ns"]:
+                    continue
+            target.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = target.with_name(f".{target.name}.restore.tmp")
+            shutil.copyfile(self.object_path(entry["sha256"]), tmp_path)
+            os.replace(tmp_path, target)
+            # Misma mtime que en la copia: la siguiente copia incremental no vuelve a leerlo.
+            os.utime(target, ns=(entry["mtime_ns"], entry["mtime_ns"]))
+
+        for directory in sorted(self.storage_dir.rglob("*"), key=lambda path: len(path.parts), reverse=True):
+            if directory.is_dir() and not self._is_excluded(directory) and not any(directory.iterdir()):
+                directory.rmdir()
+        return rollback
+
+
+class StorageBackupRunner:
+    """Takes the startup snapshot in a background thread so the app starts serving right away."""
+
+    def __init__(self, store: StorageBackupStore | None = None) -> None:
+        self.store = store or StorageBackupStore()
+        self.last_snapshot: StorageSnapshot | None = None
+        self.last_error: str | None = None
+        self._thread: threading.Thread | None = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> bool:
+        if not settings.storage_backup_on_startup or self.running:
+            return False
+        if not self.store.storage_dir.is_dir():
+            return False
+        self._thread = threading.Thread(target=self._run, name="storage-backup", daemon=True)
+        self._thread.start()
+        return True
+
+    def join(self, timeout: float | None = None) -> StorageSnapshot | None:
+        if self._thread is not None:
+            self._thread.join(timeout)
+        return self.last_snapshot
+
+    def _run(self) -> None:
+        source = self.store.storage_dir.as_posix()
+        try:
+            snapshot = self.store.create_snapshot()
+            self.store.prune(settings.storage_backup_keep_last)
+        except Exception as exc:  # noqa: BLE001
+            self.last_error = str(exc)
+            log_event("startup_storage_backup_error", f"source={source}, error={exc}")
+            return
+        self.last_snapshot = snapshot
+        self.last_error = None
+        log_event(
+            "startup_storage_backup",
+            f"source={source}, snapshot={snapshot.path.as_posix()}, files={snapshot.files}, "
+            f"reused={snapshot.reused}, new_objects={snapshot.new_objects}, bytes_copied={snapshot.bytes_copied}",
+        )
+
+
+storage_backup_runner = StorageBackupRunner()
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Copias incrementales de storage/.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("backup", help="Crear una copia ahora.")
+    commands.add_parser("list", help="Listar las copias disponibles.")
+    restore_parser = commands.add_parser("restore", help="Restaurar una copia (por defecto, la ultima).")
+    restore_parser.add_argument("snapshot", nargs="?", default="latest")
+    args = parser.parse_args(argv)
+
+    store = StorageBackupStore()
+    if args.command == "backup":
+        snapshot = store.create_snapshot()
+        store.prune(settings.storage_backup_keep_last)
+        print(f"Copia creada: {snapshot.path} ({snapshot.files} ficheros, {snapshot.new_objects} nuevos)")
+        return 0
+    if args.command == "list":
+        for path in store.snapshots():
+            print(path.name)
+        return 0
+
+    snapshot_path = store.resolve(args.snapshot)
+    if snapshot_path is None:
+        print(f"No se encontro la copia de storage: {args.snapshot}", file=sys.stderr)
+        return 1
+    try:
+        rollback = store.restore(snapshot_path)
+    except FileNotFoundError as exc:
+        print(str(exc), file=sys.stderr)
+        return 1
+    log_event("storage_restore", f"snapshot={snapshot_path.as_posix()}, rollback={rollback.path.as_posix()}")
+    print(f"Copia de rollback creada: {rollback.path}")
+    print(f"Storage restaurado desde: {snapshot_path}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,14 +1,51 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import os
+import shutil
+import tempfile
+import time
+import uuid
+from dataclasses import dataclass
+from itertools import chain
 from pathlib import Path
+from typing import Any, BinaryIO, Iterable
 
 from fastapi import UploadFile
+from sqlalchemy import Connection, event, inspect, select, update
+from sqlalchemy.orm import Session
+
+from app.core.config import get_settings
+from app.models.client import Client
+from app.models.document import Document
+
+settings = get_settings()
 
 BASE_DIR = Path("storage")
-CLIENTS_DIR = BASE_DIR / "clientes"
-DOCUMENTS_DIR = BASE_DIR / "documentos"
+IMPORTS_DIR = BASE_DIR / "imports"
+# Almacen por contenido: storage/blobs/ab/<sha256><ext>. Un mismo fichero subido para varios
+# clientes o documentos se guarda una sola vez; se borra cuando ninguna fila lo referencia.
+BLOBS_DIR = BASE_DIR / "blobs"
+BLOB_TMP_DIR = BLOBS_DIR / "tmp"
+# Un blob recien escrito o reutilizado no se borra durante este tiempo: cubre la subida concurrente
+# del mismo contenido desde otra transaccion que aun no ha hecho commit.
+BLOB_GRACE_SECONDS = 300
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+REFERENCE_CHUNK_SIZE = 500
 
 
-def _safe_token(value: str) -> str:
-    return "".join(ch if ch.isalnum() or ch in {"-", "_"} else "_" for ch in value).strip("_")
+class UploadTooLargeError(ValueError):
+    def __init__(self, max_bytes: int) -> None:
+        self.max_bytes = max_bytes
+        super().__init__(f"El archivo supera el tamano maximo permitido ({max_bytes // (1024 * 1024)} MB).")
+
+
+@dataclass
+class StoredUpload:
+    path: str
+    size: int
+    sha256: str
 
 
 def _suffix(upload: UploadFile, default: str = ".bin") -> str:
@@ -17,30 +54,220 @@ def _suffix(upload: UploadFile, default: str = ".bin") -> str:
     return ext or default
 
 
-def save_client_photo(nif: str, upload: UploadFile) -> str:
-    safe_nif = _safe_token(nif)
-    ext = _suffix(upload, default=".jpg")
+def write_stream(source: BinaryIO, target_path: Path, max_bytes: int | None = None) -> StoredUpload:
+    """Copy ``source`` to ``target_path`` in fixed-size chunks, hashing as it goes.
+
+    The data lands in a temporary file next to the target and is renamed over it only
+    once complete, so a failed or oversized upload never leaves a truncated file behind.
+    """
+    target_path.parent.mkdir(parents=True, exist_ok=True)
+    digest = hashlib.sha256()
+    size = 0
+    fd, tmp_name = tempfile.mkstemp(dir=target_path.parent, prefix=f".{target_path.name}.", suffix=".upload")
+    try:
+        with os.fdopen(fd, "wb") as output:
+            while chunk := source.read(UPLOAD_CHUNK_SIZE):
+                size += len(chunk)
+                if max_bytes is not None and size > max_bytes:
+                    raise UploadTooLargeError(max_bytes)
+                digest.update(chunk)
+                output.write(chunk)
+        os.replace(tmp_name, target_path)
+    except BaseException:
+        Path(tmp_name).unlink(missing_ok=True)
+        raise
+    return StoredUpload(path=target_path.as_posix(), size=size, sha256=digest.hexdigest())
+
+
+async def store_upload(upload: UploadFile, target_path: Path, max_bytes: int | None = None) -> StoredUpload:
+    # UploadFile.file es un SpooledTemporaryFile que puede estar ya en disco: todo el I/O fuera del event loop.
+    await upload.seek(0)
+    return await asyncio.to_thread(write_stream, upload.file, target_path, max_bytes)
+
+
+def blob_path(sha256: str, suffix: str) -> Path:
+    return BLOBS_DIR / sha256[:2] / f"{sha256}{suffix.lower()}"
+
+
+def is_blob_path(raw_path: str | None) -> bool:
+    return bool(raw_path) and Path(raw_path).is_relative_to(BLOBS_DIR) and not Path(raw_path).is_relative_to(BLOB_TMP_DIR)
+
+
+def _reuse_marker(blob: Path) -> Path:
+    return BLOB_TMP_DIR / f"{blob.name}.reused"
+
+
+def _publish_blob(source: Path, stored: StoredUpload, suffix: str) -> StoredUpload:
+    """Move ``source`` (already hashed) to its content address, or drop it if that content is already stored."""
+    target = blob_path(stored.sha256, suffix)
+    if target.exists():
+        source.unlink()
+        # Refresca la gracia: el blob vuelve a estar en uso aunque otra fila acabe de soltarlo. Se marca con un
+        # fichero aparte, no con la mtime del blob: la cache de informes y las miniaturas la usan como clave.
+        _reuse_marker(target).touch()
+    else:
+        target.parent.mkdir(parents=True, exist_ok=True)
+        os.replace(source, target)
+    return StoredUpload(path=target.as_posix(), size=stored.size, sha256=stored.sha256)
+
+
+def write_blob(source: BinaryIO, suffix: str, max_bytes: int | None = None) -> StoredUpload:
+    tmp_path = BLOB_TMP_DIR / f"{uuid.uuid4().hex}.upload"
+    return _publish_blob(tmp_path, write_stream(source, tmp_path, max_bytes), suffix)
+
+
+def import_file_as_blob(path: Path) -> StoredUpload:
+    """Add an existing file to the blob store, leaving the original in place.
+
+    A hard link is used when possible so the bytes are not copied.
+    """
+    digest = hashlib.sha256()
+    with path.open("rb") as stream:
+        while chunk := stream.read(UPLOAD_CHUNK_SIZE):
+            digest.update(chunk)
+    BLOB_TMP_DIR.mkdir(parents=True, exist_ok=True)
+    tmp_path = BLOB_TMP_DIR / f"{uuid.uuid4().hex}.upload"
+    try:
+        os.link(path, tmp_path)
+    except OSError:
+        shutil.copyfile(path, tmp_path)
+    stored = StoredUpload(path=path.as_posix(), size=path.stat().st_size, sha256=digest.hexdigest())
+    return _publish_blob(tmp_path, stored, path.suffix)
+
+
+async def store_blob(upload: UploadFile, default_suffix: str, max_bytes: int | None = None) -> StoredUpload:
+    await upload.seek(0)
+    return await asyncio.to_thread(write_blob, upload.file, _suffix(upload, default=default_suffix), max_bytes)
+
+
+def _upload_limit() -> int:
+    return settings.upload_max_mb * 1024 * 1024
+
+
+async def save_client_photo(upload: UploadFile) -> StoredUpload:
+    return await store_blob(upload, ".jpg", _upload_limit())
+
+
+async def save_document_pdf(upload: UploadFile) -> StoredUpload:
+    return await store_blob(upload, ".pdf", _upload_limit())
+
+
+async def save_import_upload(upload: UploadFile) -> StoredUpload:
+    """Store an import upload under a unique name; whoever runs the import deletes it when done."""
+    # Prefijo unico: dos subidas con el mismo nombre no se pisan mientras sus importaciones siguen en curso.
+    target_path = IMPORTS_DIR / f"{uuid.uuid4().hex}_{Path(upload.filename or 'import.bin').name}"
+    return await store_upload(upload, target_path, settings.import_upload_max_mb * 1024 * 1024)
+
+
+def _chunks(items: list[str], size: int) -> Iterable[list[str]]:
+    for start in range(0, len(items), size):
+        yield items[start : start + size]
+
+
+def referenced_blobs(connection: Connection, paths: Iterable[str]) -> set[str]:
+    """The subset of ``paths`` still referenced by a document PDF or a client photo."""
+    referenced: set[str] = set()
+    for chunk in _chunks(sorted(set(paths)), REFERENCE_CHUNK_SIZE):
+        referenced.update(connection.scalars(select(Document.pdf_path).where(Document.pdf_path.in_(chunk))))
+        referenced.update(connection.scalars(select(Client.photo_path).where(Client.photo_path.in_(chunk))))
+    return referenced
+
+
+def _is_idle(path: Path, now: float) -> bool:
+    try:
+        return now - path.stat().st_mtime >= BLOB_GRACE_SECONDS
+    except OSError:
+        return False
+
+
+def _blob_is_idle(path: Path, now: float) -> bool:
+    marker = _reuse_marker(path)
+    return _is_idle(path, now) and (not marker.exists() or _is_idle(marker, now))
+
+
+def delete_blobs(paths: Iterable[str]) -> int:
+    deleted = 0
+    now = time.time()
+    for raw_path in paths:
+        path = Path(raw_path)
+        if is_blob_path(raw_path) and _blob_is_idle(path, now):
+            path.unlink(missing_ok=True)
+            _reuse_marker(path).unlink(missing_ok=True)
+            deleted += 1
+    return deleted
+
+
+def collect_garbage(connection: Connection) -> int:
+    """Delete blobs no row references (and abandoned temporary uploads) once past the grace period."""
+    if not BLOBS_DIR.is_dir():
+        return 0
+    on_disk = [path.as_posix() for path in BLOBS_DIR.glob("*/*") if path.is_file() and is_blob_path(path.as_posix())]
+    unreferenced = set(on_disk) - referenced_blobs(connection, on_disk)
+    deleted = delete_blobs(unreferenced)
+
+    now = time.time()
+    for tmp_path in BLOB_TMP_DIR.glob("*") if BLOB_TMP_DIR.is_dir() else ():
+        # Subidas abandonadas y marcas de reutilizacion ya caducadas.
+        if tmp_path.suffix in {".upload", ".reused"} and _is_idle(tmp_path, now):
+            tmp_path.unlink(missing_ok=True)
+            if tmp_path.suffix == ".upload":
+                deleted += 1
+    return deleted
+
+
+def migrate_files_to_blobs(connection: Connection) -> list[Path]:
+    """Point rows that use the old per-client paths under storage/ at the blob store.
+
+    Returns the old files; the caller deletes them once the transaction has committed.
+    """
+    moved: dict[str, str] = {}
+    for column in (Document.pdf_path, Client.photo_path):
+        table = column.class_.__table__
+        rows = connection.execute(
+            select(table.c.id, column).where(column.is_not(None), ~column.startswith(f"{BLOBS_DIR.as_posix()}/"))
+        )
+        for row_id, raw_path in rows.all():
+            if raw_path not in moved:
+                path = Path(raw_path)
+                if not path.is_relative_to(BASE_DIR) or not path.is_file():
+                    # Rutas fuera de storage/ o ficheros que ya no existen: se dejan como estan.
+                    continue
+                moved[raw_path] = import_file_as_blob(path).path
+            connection.execute(update(table).where(table.c.id == row_id).values({column.key: moved[raw_path]}))
+    return [Path(raw_path) for raw_path in moved]
+
 
-    target_dir = CLIENTS_DIR / safe_nif
-    target_dir.mkdir(parents=True, exist_ok=True)
+_RELEASED_KEY = "released_blobs"
+_BLOB_COLUMNS = {Document: "pdf_path", Client: "photo_path"}
 
-    target_path = target_dir / f"{safe_nif}_foto_cliente{ext}"
-    with target_path.open("wb") as output:
-        output.write(upload.file.read())
 
-    return str(target_path.as_posix())
+@event.listens_for(Session, "after_flush")
+def _track_released_blobs(session: Session, flush_context: Any) -> None:
+    candidates: set[str] = set()
+    for instance in chain(session.dirty, session.deleted):
+        attribute = _BLOB_COLUMNS.get(type(instance))
+        if attribute is None:
+            continue
+        history = inspect(instance).attrs[attribute].history
+        candidates.update(history.deleted)
+        if instance in session.deleted:
+            candidates.update(history.unchanged)
+    candidates = {path for path in candidates if is_blob_path(path)}
+    if not candidates:
+        return
 
+    released = candidates - referenced_blobs(session.connection(), candidates)
+    if released:
+        session.info.setdefault(_RELEASED_KEY, set()).update(released)
 
-def save_document_pdf(nif: str, doc_type: str, upload: UploadFile) -> str:
-    safe_nif = _safe_token(nif)
-    safe_type = _safe_token(doc_type)
-    ext = _suffix(upload, default=".pdf")
 
-    target_dir = DOCUMENTS_DIR / safe_nif / safe_type
-    target_dir.mkdir(parents=True, exist_ok=True)
+@event.listens_for(Session, "after_commit")
+def _delete_released_blobs(session: Session) -> None:
+    released = session.info.pop(_RELEASED_KEY, None)
+    if released:
+        delete_blobs(released)
 
-    target_path = target_dir / f"{safe_nif}_{safe_type}{ext}"
-    with target_path.open("wb") as output:
-        output.write(upload.file.read())
 
-    return str(target_path.as_posix())
+@event.listens_for(Session, "after_rollback")
+def _keep_blobs_on_rollback(session: Session) -> None:
+    session.info.pop(_RELEASED_KEY, None)
@@ -1,9 +1,12 @@
-from fastapi import APIRouter, Request
+from fastapi import APIRouter, Depends, Request
 from fastapi.responses import HTMLResponse, RedirectResponse
 from fastapi.templating import Jinja2Templates
+from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.api.deps import get_db_session
 from app.core.app_config import get_app_json_config
 from app.core.config import get_settings
+from app.dashboard.metrics import dashboard_metrics
 
 settings = get_settings()
 app_json = get_app_json_config()
@@ -12,7 +15,8 @@ templates = Jinja2Templates(directory="templates")
 router = APIRouter(tags=["ui"])
 
 
-def _base_context(page_title: str, active_nav: str) -> dict:
+async def _base_context(session: AsyncSession, page_title: str, active_nav: str) -> dict:
+    summary = await dashboard_metrics.get(session)
     return {
         "app_name": app_json.app_name,
         "api_prefix": settings.api_prefix,
@@ -22,7 +26,11 @@ def _base_context(page_title: str, active_nav: str) -> dict:
         "logo_path": app_json.ui.logo_path,
         "favicon_path": app_json.ui.favicon_path,
         "dashboard_logo_path": app_json.ui.dashboard_logo_path,
-        "quick_stats": {"d30": 24, "d60": 47, "d90": 91},
+        "quick_stats": {
+            "d30": summary.due_in_30_days,
+            "d60": summary.due_in_60_days,
+            "d90": summary.due_in_90_days,
+        },
     }
 
 
@@ -32,54 +40,54 @@ async def home() -> RedirectResponse:
 
 
 @router.get("/dashboard", response_class=HTMLResponse)
-async def dashboard(request: Request) -> HTMLResponse:
+async def dashboard(request: Request, session: AsyncSession = Depends(get_db_session)) -> HTMLResponse:
     return templates.TemplateResponse(
         request=request,
         name="dashboard/index.html",
-        context=_base_context(page_title="Resumen del panel", active_nav="dashboard"),
+        context=await _base_context(session, page_title="Resumen del panel", active_nav="dashboard"),
     )
 
 
 @router.get("/clients", response_class=HTMLResponse)
-async def clients(request: Request) -> HTMLResponse:
+async def clients(request: Request, session: AsyncSession = Depends(get_db_session)) -> HTMLResponse:
     return templates.TemplateResponse(
         request=request,
         name="clients/index.html",
-        context=_base_context(page_title="Clientes", active_nav="clients"),
+        context=await _base_context(session, page_title="Clientes", active_nav="clients"),
     )
 
 
 @router.get("/alerts", response_class=HTMLResponse)
-async def alerts(request: Request) -> HTMLResponse:
+async def alerts(request: Request, session: AsyncSession = Depends(get_db_session)) -> HTMLResponse:
     return templates.TemplateResponse(
         request=request,
         name="alerts/index.html",
-        context=_base_context(page_title="Alertas", active_nav="alerts"),
+        context=await _base_context(session, page_title="Alertas", active_nav="alerts"),
     )
 
 
 @router.get("/documents", response_class=HTMLResponse)
-async def documents(request: Request) -> HTMLResponse:
+async def documents(request: Request, session: AsyncSession = Depends(get_db_session)) -> HTMLResponse:
     return templates.TemplateResponse(
         request=request,
         name="documents/index.html",
-        context=_base_context(page_title="Documentos", active_nav="documents"),
+        context=await _base_context(session, page_title="Documentos", active_nav="documents"),
     )
 
 
 @router.get("/tools", response_class=HTMLResponse)
-async def tools(request: Request) -> HTMLResponse:
+async def tools(request: Request, session: AsyncSession = Depends(get_db_session)) -> HTMLResponse:
     return templates.TemplateResponse(
         request=request,
         name="tools/index.html",
-        context=_base_context(page_title="Herramientas y acciones", active_nav="tools"),
+        context=await _base_context(session, page_title="Herramientas y acciones", active_nav="tools"),
     )
 
 
 @router.get("/settings", response_class=HTMLResponse)
-async def settings_page(request: Request) -> HTMLResponse:
+async def settings_page(request: Request, session: AsyncSession = Depends(get_db_session)) -> HTMLResponse:
     return templates.TemplateResponse(
         request=request,
         name="settings/index.html",
-        context=_base_context(page_title="Configuracion", active_nav="settings"),
+        context=await _base_context(session, page_title="Configuracion", active_nav="settings"),
     )
@@ -0,0 +1,43 @@
+"""Compare two benchmark result files: median seconds and query counts per operation."""
+
+from __future__ import annotations
+
+import argparse
+import json
+from pathlib import Path
+from typing import Any
+
+
+def _load(path: Path) -> dict[str, Any]:
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def compare(baseline: dict[str, Any], current: dict[str, Any]) -> list[str]:
+    lines = [f"{'escala':<8} {'operacion':<30} {'antes (s)':>10} {'ahora (s)':>10} {'ratio':>7} {'consultas':>13}"]
+    for scale, operations in current["scales"].items():
+        previous = baseline["scales"].get(scale, {})
+        for name, measurement in operations.items():
+            if not isinstance(measurement, dict) or "seconds_median" not in measurement:
+                continue
+            before = previous.get(name, {})
+            now = measurement["seconds_median"]
+            then = before.get("seconds_median")
+            ratio = f"{now / then:.2f}x" if then else "-"
+            queries = f"{before.get('queries', '-')} -> {measurement['queries']}"
+            lines.append(f"{scale:<8} {name:<30} {then if then is not None else '-':>10} {now:>10} {ratio:>7} {queries:>13}")
+    return lines
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Compara dos resultados de benchmarks.")
+    parser.add_argument("baseline", type=Path)
+    parser.add_argument("current", type=Path)
+    args = parser.parse_args(argv)
+    baseline, current = _load(args.baseline), _load(args.current)
+    print(f"{baseline.get('commit')} -> {current.get('commit')}")
+    print("\n".join(compare(baseline, current)))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,157 @@
+"""Seeded synthetic clients and documents in the import file layout (CSV / XLSX)."""
+
+from __future__ import annotations
+
+import csv
+import random
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Any
+
+from app.models.document import DocumentType
+
+COLUMNS = [
+    "full_name",
+    "nif",
+    "phone",
+    "company",
+    "email",
+    "document_type",
+    "expiry_date",
+    "issue_date",
+    "birth_date",
+    "address",
+    "course_number",
+    "renewed_with_us",
+    "payment_method",
+    "fundae",
+    "fundae_payment_type",
+    "operation_number",
+    "flag_permiso_c",
+    "flag_permiso_d",
+    "flag_fran",
+    "flag_ciusaba",
+    "expiry_fran",
+    "expiry_ciusaba",
+]
+
+FIRST_NAMES = ["Ana", "Luis", "Marta", "Jose", "Lucia", "Pablo", "Eva", "Sergio", "Carmen", "Raul", "Ines", "Jorge"]
+LAST_NAMES = ["Garcia", "Martinez", "Lopez", "Sanchez", "Perez", "Gomez", "Ruiz", "Diaz", "Moreno", "Alvarez", "Munoz"]
+COMPANIES = ["Transportes", "Logistica", "Autocares", "Mudanzas", "Distribuciones", "Cargas"]
+CITIES = ["Valencia", "Alicante", "Castellon", "Murcia", "Albacete", "Cuenca"]
+NIF_LETTERS = "TRWAGMYFPDXBNJZSQVHLCKE"
+
+# Reparto aproximado de una cartera real: casi todos tienen DNI y carnet; CAP y tarjeta, los conductores.
+DOC_TYPE_WEIGHTS = {
+    DocumentType.DNI: 0.9,
+    DocumentType.DRIVING_LICENSE: 0.8,
+    DocumentType.CAP: 0.6,
+    DocumentType.TACHOGRAPH_CARD: 0.5,
+    DocumentType.POWER_OF_ATTORNEY: 0.1,
+    DocumentType.OTHER: 0.05,
+}
+ALERT_OFFSETS = (30, 60, 90)
+
+
+def parse_scale(value: str) -> int:
+    token = value.strip().lower()
+    if token.endswith("k"):
+        return int(float(token[:-1]) * 1_000)
+    if token.endswith("m"):
+        return int(float(token[:-1]) * 1_000_000)
+    return int(token)
+
+
+def _nif(index: int) -> str:
+    number = 10_000_000 + index
+    return f"{number}{NIF_LETTERS[number % 23]}"
+
+
+def _expiry(rng: random.Random, today: date) -> date:
+    # Una parte cae justo en las ventanas del job de alertas (hoy + 30/60/90).
+    if rng.random() < 0.05:
+        return today + timedelta(days=rng.choice(ALERT_OFFSETS))
+    return today + timedelta(days=rng.randint(-365, 5 * 365))
+
+
+def _flag(value: bool) -> str:
+    return "1" if value else "0"
+
+
+def _document_row(rng: random.Random, doc_type: DocumentType, index: int, today: date) -> dict[str, Any]:
+    row: dict[str, Any] = {"document_type": doc_type.value}
+    if doc_type == DocumentType.POWER_OF_ATTORNEY:
+        flag_fran = rng.random() < 0.7
+        flag_ciusaba = not flag_fran or rng.random() < 0.3
+        row.update(
+            flag_fran=_flag(flag_fran),
+            flag_ciusaba=_flag(flag_ciusaba),
+            expiry_fran=_expiry(rng, today).isoformat() if flag_fran else "",
+            expiry_ciusaba=_expiry(rng, today).isoformat() if flag_ciusaba else "",
+        )
+        return row
+
+    expiry = _expiry(rng, today)
+    row["expiry_date"] = expiry.isoformat()
+    row["issue_date"] = (expiry - timedelta(days=5 * 365)).isoformat()
+    if doc_type == DocumentType.DNI:
+        row["birth_date"] = date(rng.randint(1955, 2002), rng.randint(1, 12), rng.randint(1, 28)).isoformat()
+        row["address"] = f"Calle {rng.choice(LAST_NAMES)} {rng.randint(1, 200)}, {rng.choice(CITIES)}"
+    elif doc_type == DocumentType.DRIVING_LICENSE:
+        row["flag_permiso_c"] = _flag(rng.random() < 0.7)
+        row["flag_permiso_d"] = _flag(rng.random() < 0.3)
+    elif doc_type in {DocumentType.CAP, DocumentType.TACHOGRAPH_CARD}:
+        if doc_type == DocumentType.CAP:
+            row["course_number"] = f"CAP-{today.year}-{index:06d}"
+        if rng.random() < 0.4:
+            payment_method = rng.choice(["efectivo", "visa", "empresa"])
+            row.update(renewed_with_us="1", payment_method=payment_method)
+            if payment_method == "empresa" and rng.random() < 0.5:
+                row.update(
+                    fundae="1",
+                    fundae_payment_type=rng.choice(["recibo", "transferencia"]),
+                    operation_number=f"OP-{index:07d}",
+                )
+    return row
+
+
+def generate_rows(clients: int, seed: int = 1, today: date | None = None) -> list[dict[str, Any]]:
+    """One row per document; every client gets at least one document."""
+    rng = random.Random(seed)
+    today = today or date.today()
+    rows: list[dict[str, Any]] = []
+    for index in range(clients):
+        first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+        client = {
+            "full_name": f"{first} {last} {rng.choice(LAST_NAMES)}",
+            "nif": _nif(index),
+            "phone": f"6{rng.randint(0, 99_999_999):08d}",
+            "company": f"{rng.choice(COMPANIES)} {last} SL" if rng.random() < 0.6 else "",
+            "email": f"{first.lower()}.{last.lower()}{index}@example.com" if rng.random() < 0.5 else "",
+        }
+        doc_types = [doc_type for doc_type, weight in DOC_TYPE_WEIGHTS.items() if rng.random() < weight]
+        for doc_type in doc_types or [DocumentType.CAP]:
+            rows.append({**client, **_document_row(rng, doc_type, index, today)})
+    return rows
+
+
+def write_csv(rows: list[dict[str, Any]], path: Path) -> Path:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("w", newline="", encoding="utf-8") as stream:
+        writer = csv.DictWriter(stream, fieldnames=COLUMNS, restval="")
+        writer.writeheader()
+        writer.writerows(rows)
+    return path
+
+
+def write_xlsx(rows: list[dict[str, Any]], path: Path) -> Path:
+    from openpyxl import Workbook
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet("clientes")
+    sheet.append(COLUMNS)
+    for row in rows:
+        sheet.append([row.get(column, "") for column in COLUMNS])
+    workbook.save(path)
+    return path
@@ -0,0 +1,269 @@
+"""Time the hot paths on synthetic data and write the results as JSON.
+
+    python -m benchmarks.run --scales 1k,10k
+    python -m benchmarks.compare benchmarks/results/a.json benchmarks/results/b.json
+
+Each scale runs on throw-away SQLite databases in a temporary folder: nothing touches
+the application database or ``storage/``.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Any, AsyncGenerator, Awaitable, Callable, Iterator
+
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import delete, event
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+
+from app.api.deps import get_db_session
+from app.dashboard.metrics import dashboard_metrics
+from app.db.base import Base
+from app.db.sqlite_profile import configure_sqlite
+from app.models.alert import Alert
+from app.pdf_generator import cache as pdf_cache
+from app.scheduler.jobs import create_deadline_alerts
+from app.services import storage_service
+from benchmarks.data import generate_rows, parse_scale, write_csv, write_xlsx
+from main import app
+
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+DEFAULT_SCALES = "1k,10k"
+DEFAULT_PDF_MAX_CLIENTS = 1_000
+
+
+class QueryCounter:
+    def __init__(self, engine: AsyncEngine) -> None:
+        self.count = 0
+        event.listen(engine.sync_engine, "before_cursor_execute", self._on_execute)
+
+    def _on_execute(self, *args: Any) -> None:
+        self.count += 1
+
+
+@contextmanager
+def _patched(target: Any, name: str, value: Any) -> Iterator[None]:
+    original = getattr(target, name)
+    setattr(target, name, value)
+    try:
+        yield
+    finally:
+        setattr(target, name, original)
+
+
+class BenchmarkDatabase:
+    def __init__(self, path: Path) -> None:
+        self.engine = create_async_engine(f"sqlite+aiosqlite:///{path}", connect_args={"timeout": 30})
+        configure_sqlite(self.engine)
+        self.sessions = async_sessionmaker(self.engine, class_=AsyncSession, expire_on_commit=False)
+        self.queries = QueryCounter(self.engine)
+
+    async def create(self) -> None:
+        async with self.engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+
+    async def dispose(self) -> None:
+        await self.engine.dispose()
+
+    async def _session(self) -> AsyncGenerator[AsyncSession, None]:
+        async with self.sessions() as session:
+            yield session
+
+    def client(self) -> AsyncClient:
+        app.dependency_overrides[get_db_session] = self._session
+        return AsyncClient(transport=ASGITransport(app=app), base_url="http://benchmark", timeout=None)
+
+
+async def _measure(
+    database: BenchmarkDatabase,
+    operation: Callable[[], Awaitable[Any]],
+    repeat: int = 1,
+    before_each: Callable[[], None] | None = None,
+) -> dict[str, Any]:
+    timings: list[float] = []
+    queries: list[int] = []
+    result: Any = None
+    for _ in range(repeat):
+        if before_each is not None:
+            before_each()
+        start_queries = database.queries.count
+        started = time.perf_counter()
+        result = await operation()
+        timings.append(time.perf_counter() - started)
+        queries.append(database.queries.count - start_queries)
+    measurement = {
+        "runs": repeat,
+        "seconds_min": round(min(timings), 6),
+        "seconds_median": round(statistics.median(timings), 6),
+        "seconds_max": round(max(timings), 6),
+        "queries": max(queries),
+    }
+    return measurement | ({"result": result} if result is not None else {})
+
+
+def _check(response: Any) -> Any:
+    if response.status_code >= 400:
+        raise RuntimeError(f"{response.request.method} {response.request.url} -> {response.status_code}: {response.text[:300]}")
+    return response
+
+
+async def _import(database: BenchmarkDatabase, path: Path, content_type: str) -> dict[str, Any]:
+    async with database.client() as client:
+
+        async def run() -> dict[str, Any]:
+            with path.open("rb") as stream:
+                response = _check(
+                    await client.post("/api/v1/tools/import/clients", files={"file": (path.name, stream, content_type)})
+                )
+            body = response.json()
+            return {key: body[key] for key in ("clients_created", "documents_created")} | {"errors": len(body["errors"])}
+
+        return await _measure(database, run)
+
+
+async def run_scale(
+    label: str,
+    clients: int,
+    workdir: Path,
+    *,
+    seed: int,
+    repeat: int,
+    pdf_max_clients: int,
+) -> dict[str, Any]:
+    rows = generate_rows(clients, seed=seed)
+    csv_path = write_csv(rows, workdir / f"clientes_{label}.csv")
+    xlsx_path = write_xlsx(rows, workdir / f"clientes_{label}.xlsx")
+    results: dict[str, Any] = {"clients": clients, "documents": len(rows)}
+
+    xlsx_db = BenchmarkDatabase(workdir / f"xlsx_{label}.db")
+    await xlsx_db.create()
+    results["import_clients_xlsx"] = await _import(
+        xlsx_db, xlsx_path, "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+    )
+    await xlsx_db.dispose()
+
+    database = BenchmarkDatabase(workdir / f"csv_{label}.db")
+    await database.create()
+    results["import_clients_csv"] = await _import(database, csv_path, "text/csv")
+
+    async def deadline_alerts() -> int:
+        async with database.sessions() as session:
+            return await create_deadline_alerts(session)
+
+    # La importacion ya crea las alertas: se borran para medir el job generando todas las de las ventanas.
+    async with database.sessions() as session:
+        await session.execute(delete(Alert))
+        await session.commit()
+    results["create_deadline_alerts"] = await _measure(database, deadline_alerts)
+    results["create_deadline_alerts_noop"] = await _measure(database, deadline_alerts, repeat)
+
+    async with database.client() as client:
+
+        def get(url: str, **params: Any) -> Callable[[], Awaitable[None]]:
+            async def run() -> None:
+                _check(await client.get(url, params=params))
+
+            return run
+
+        results["list_clients_q"] = await _measure(database, get("/api/v1/clients", q="garcia"), repeat)
+        results["list_clients_q_nif"] = await _measure(database, get("/api/v1/clients", q=rows[-1]["nif"]), repeat)
+        results["reporting_renewals"] = await _measure(database, get("/api/v1/reporting/renewals"), repeat)
+        results["reporting_dashboard"] = await _measure(
+            database, get("/api/v1/reporting/dashboard"), repeat, before_each=dashboard_metrics.invalidate
+        )
+
+        if clients > pdf_max_clients:
+            results["generate_bulk_pdf"] = {"skipped": f"mas de {pdf_max_clients} clientes (--pdf-max-clients)"}
+        else:
+
+            async def bulk_pdf() -> dict[str, int]:
+                response = _check(await client.post("/api/v1/tools/pdf/bulk"))
+                return {"bytes": len(response.content), "cache_hits": int(response.headers["x-cache-hits"])}
+
+            with _patched(pdf_cache.report_cache, "cache_dir", workdir / f"pdf_cache_{label}"):
+                results["generate_bulk_pdf_cold"] = await _measure(database, bulk_pdf)
+                results["generate_bulk_pdf_cached"] = await _measure(database, bulk_pdf)
+
+    await database.dispose()
+    return results
+
+
+def _git_commit() -> str | None:
+    try:
+        output = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True)
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return output.stdout.strip() or None
+
+
+async def run_benchmarks(
+    scales: list[str],
+    *,
+    seed: int = 1,
+    repeat: int = 5,
+    pdf_max_clients: int = DEFAULT_PDF_MAX_CLIENTS,
+) -> dict[str, Any]:
+    report: dict[str, Any] = {
+        "commit": _git_commit(),
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "seed": seed,
+        "repeat": repeat,
+        "scales": {},
+    }
+    with tempfile.TemporaryDirectory(prefix="benchmarks_") as tmp:
+        workdir = Path(tmp)
+        with _patched(storage_service, "IMPORTS_DIR", workdir / "imports"):
+            try:
+                for label in scales:
+                    print(f"[{label}] ...", file=sys.stderr, flush=True)
+                    report["scales"][label] = await run_scale(
+                        label,
+                        parse_scale(label),
+                        workdir,
+                        seed=seed,
+                        repeat=repeat,
+                        pdf_max_clients=pdf_max_clients,
+                    )
+            finally:
+                app.dependency_overrides.clear()
+    return report
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmarks de importacion, listados, alertas y PDF.")
+    parser.add_argument("--scales", default=DEFAULT_SCALES, help="Numero de clientes por escala, p. ej. 1k,10k,100k.")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--repeat", type=int, default=5, help="Repeticiones de las consultas de solo lectura.")
+    parser.add_argument("--pdf-max-clients", type=int, default=DEFAULT_PDF_MAX_CLIENTS)
+    parser.add_argument("--output", type=Path, default=None, help="Fichero JSON (por defecto, benchmarks/results/).")
+    args = parser.parse_args(argv)
+
+    scales = [scale.strip() for scale in args.scales.split(",") if scale.strip()]
+    report = asyncio.run(
+        run_benchmarks(scales, seed=args.seed, repeat=args.repeat, pdf_max_clients=args.pdf_max_clients)
+    )
+    output = args.output
+    if output is None:
+        stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        output = RESULTS_DIR / f"{stamp}_{report['commit'] or 'local'}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2, sort_keys=True), encoding="utf-8")
+    print(output)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,35 +1,62 @@
+import asyncio
+import multiprocessing
 from contextlib import asynccontextmanager
 
 import uvicorn
 from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
 from fastapi.staticfiles import StaticFiles
 
 from app.api import api_router
 from app.core.app_config import get_app_json_config
 from app.core.config import get_settings
+from app.core.instrumentation import InstrumentationMiddleware, metrics
 from app.db.init_db import init_db
+from app.db.session import engine
+from app.pdf_generator.bulk import shutdown_report_pool
 from app.scheduler import DailyScheduler
+from app.services.audit_log_service import audit_log
+from app.services.database_backup_service import database_backup
+from app.services.import_job_service import import_job_manager
+from app.services.storage_backup_service import storage_backup_runner
 from app.ui import ui_router
 
 settings = get_settings()
 app_json = get_app_json_config()
 scheduler = DailyScheduler(run_hour=3, run_minute=0)
+BACKUP_SHUTDOWN_TIMEOUT = 10
 
 
 @asynccontextmanager
 async def lifespan(_: FastAPI):
     await init_db()
+    # Las copias de BD y de storage/ corren en segundo plano: la app atiende peticiones mientras tanto.
+    if settings.backup_on_startup:
+        database_backup.start("startup")
+    storage_backup_runner.start()
 
     if settings.scheduler_enabled:
         scheduler.start()
 
     yield
 
+    await import_job_manager.shutdown()
+    # Cada objeto y el manifiesto se escriben de forma atomica: si no acaba a tiempo, no deja una copia a medias.
+    await asyncio.to_thread(storage_backup_runner.join, BACKUP_SHUTDOWN_TIMEOUT)
+    # Una copia de BD a medias se cancela en el siguiente paso y se descarta.
+    database_backup.cancel()
+    await asyncio.to_thread(database_backup.join, BACKUP_SHUTDOWN_TIMEOUT)
     if settings.scheduler_enabled:
         await scheduler.stop()
+    await asyncio.to_thread(shutdown_report_pool)
+    # Al cerrar la ultima conexion SQLite vuelca el WAL y borra los ficheros -wal/-shm.
+    await engine.dispose()
+    # Lo ultimo: las tareas anteriores aun pueden registrar eventos al terminar.
+    await asyncio.to_thread(audit_log.close)
 
 
 app = FastAPI(title=app_json.app_name, lifespan=lifespan)
+app.add_middleware(InstrumentationMiddleware)
 app.mount("/static", StaticFiles(directory="static"), name="static")
 app.mount("/storage", StaticFiles(directory="storage"), name="storage")
 
@@ -42,7 +69,14 @@ async def health() -> dict[str, str]:
     return {"status": "ok"}
 
 
+@app.get("/metrics", tags=["health"], response_class=PlainTextResponse)
+async def get_metrics() -> PlainTextResponse:
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+
 if __name__ == "__main__":
+    # Necesario para el ProcessPoolExecutor del PDF masivo en el .exe de PyInstaller.
+    multiprocessing.freeze_support()
     uvicorn.run(
         "main:app",
         host=settings.uvicorn_host,
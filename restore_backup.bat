@@ -48,9 +48,19 @@ if exist "%DB_FILE%" (
     echo Could not create rollback backup. Close the app and retry.
     exit /b 1
   )
+  rem In WAL mode the latest commits may still live in the -wal file: keep it with the rollback copy.
+  if exist "%DB_FILE%-wal" copy /Y "%DB_FILE%-wal" "!ROLLBACK!-wal" >nul
   echo Rollback copy created: !ROLLBACK!
 )
 
+rem A -wal/-shm left from the current DB would be replayed over the restored file.
+if exist "%DB_FILE%-wal" del /F /Q "%DB_FILE%-wal"
+if exist "%DB_FILE%-shm" del /F /Q "%DB_FILE%-shm"
+if exist "%DB_FILE%-wal" (
+  echo Could not remove %DB_FILE%-wal. Close the app and retry.
+  exit /b 1
+)
+
 copy /Y "%SOURCE_BACKUP%" "%DB_FILE%" >nul
 if errorlevel 1 (
   echo Restore failed. Ensure the app is closed and retry.
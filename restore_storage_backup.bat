@@ -25,6 +25,12 @@ if not exist "%BACKUP_DIR%" (
   exit /b 1
 )
 
+rem Incremental snapshots live in storage\backups\snapshots; legacy ZIP backups can still be restored by name.
+set "SNAPSHOT_DIR=%BACKUP_DIR%\snapshots"
+if /I "%~x1"==".zip" goto :resolve_zip
+if exist "%SNAPSHOT_DIR%\storage_*.json" goto :restore_snapshot
+
+:resolve_zip
 if "%~1"=="" goto :pick_latest
 if /I "%~1"=="latest" goto :pick_latest
 
@@ -42,6 +48,29 @@ echo Storage backup file not found: %~1
 popd
 exit /b 1
 
+:restore_snapshot
+set "PY_CMD="
+where py >nul 2>&1
+if not errorlevel 1 set "PY_CMD=py -3.11"
+if not defined PY_CMD (
+  where python >nul 2>&1
+  if not errorlevel 1 set "PY_CMD=python"
+)
+if not defined PY_CMD (
+  echo Python not found. Install Python 3.11+ and try again.
+  popd
+  exit /b 1
+)
+
+%PY_CMD% -m app.services.storage_backup_service restore %1
+if errorlevel 1 (
+  echo Restore failed. Ensure app is closed and retry.
+  popd
+  exit /b 1
+)
+popd
+exit /b 0
+
 :pick_latest
 for /f "delims=" %%F in ('dir /b /a:-d /o:-n "%BACKUP_DIR%\storage_*.zip" 2^>nul') do (
   set "SOURCE_BACKUP=%BACKUP_DIR%\%%F"
@@ -8,6 +8,11 @@
     documents: [],
     alerts: [],
     renewalsFilters: "",
+    pages: {
+      clients: { filters: "", cursor: null },
+      documents: { filters: "", cursor: null },
+      alerts: { filters: "", cursor: null },
+    },
     selectedClient: null,
     pendingCreatePhotoFile: null,
     schemas: {
@@ -60,6 +65,36 @@
     return response.json();
   }
 
+  async function apiPage(path) {
+    const response = await fetch(`${apiPrefix}${path}`);
+    if (!response.ok) {
+      const text = await response.text();
+      throw new Error(`${response.status} ${text}`);
+    }
+    return { items: await response.json(), nextCursor: response.headers.get("X-Next-Cursor") };
+  }
+
+  function withCursor(path, cursor) {
+    if (!cursor) return path;
+    return `${path}${path.includes("?") ? "&" : "?"}cursor=${encodeURIComponent(cursor)}`;
+  }
+
+  async function loadPage(resource, filters, append) {
+    const pageState = state.pages[resource];
+    const basePath = `/${resource}${filters ? `?${filters}` : ""}`;
+    const page = await apiPage(withCursor(basePath, append ? pageState.cursor : null));
+    state[resource] = append ? state[resource].concat(page.items) : page.items;
+    state.pages[resource] = { filters, cursor: page.nextCursor };
+
+    const moreBtn = document.getElementById(`${resource}LoadMoreBtn`);
+    if (moreBtn) moreBtn.classList.toggle("d-none", !page.nextCursor);
+  }
+
+  function bindLoadMore(resource, load) {
+    const moreBtn = document.getElementById(`${resource}LoadMoreBtn`);
+    if (moreBtn) moreBtn.addEventListener("click", async () => load(state.pages[resource].filters, true));
+  }
+
   async function loadJSON(path) {
     const response = await fetch(path);
     if (!response.ok) throw new Error(`No se puede cargar ${path}`);
@@ -340,25 +375,33 @@
     setText("kpi30", summary.due_in_30_days);
     setText("kpi60", summary.due_in_60_days);
     setText("kpi90", summary.due_in_90_days);
-    const missingDocs = await api("/documents?missing_pdf=true");
-    const docs = await api("/documents?expiration_status=expired");
-    setText("kpiMissing", missingDocs.length);
-    setText("kpiExpired", docs.length);
+    setText("kpiMissing", summary.documents_missing_pdf);
+    setText("kpiExpired", summary.documents_expired);
+  }
+
+  function renderStatusBadge(client) {
+    const styles = {
+      red: ["text-bg-danger", "Alerta vencida"],
+      yellow: ["text-bg-warning", "Alerta pendiente"],
+      green: ["text-bg-success", "Sin alertas"],
+    };
+    const [cls, label] = styles[client.status_color] || styles.green;
+    return `<span class="badge ${cls}" title="${client.alert_count ?? 0} alertas">${label}</span>`;
   }
 
-  async function loadClients(filters = "") {
-    state.clients = await api(`/clients${filters ? `?${filters}` : ""}`);
+  async function loadClients(filters = "", append = false) {
+    await loadPage("clients", filters, append);
 
     const bodyEl = document.getElementById("clientsTableBody");
     if (!bodyEl) return;
 
     if (!state.clients.length) {
-      bodyEl.innerHTML = renderEmptyRow(6, "No se encontraron clientes.");
+      bodyEl.innerHTML = renderEmptyRow(7, "No se encontraron clientes.");
       return;
     }
 
     bodyEl.innerHTML = state.clients
-      .map((c) => `<tr data-id="${c.id}"><td>${c.id}</td><td>${c.full_name}</td><td>${c.nif}</td><td>${c.company ?? ""}</td><td>${c.phone}</td><td>${c.email ?? ""}</td></tr>`)
+      .map((c) => `<tr data-id="${c.id}"><td>${c.id}</td><td>${c.full_name}</td><td>${c.nif}</td><td>${c.company ?? ""}</td><td>${c.phone}</td><td>${c.email ?? ""}</td><td>${renderStatusBadge(c)}</td></tr>`)
       .join("");
 
     bodyEl.querySelectorAll("tr[data-id]").forEach((row) => {
@@ -400,8 +443,8 @@
     }
   }
 
-  async function loadDocuments(filters = "") {
-    state.documents = await api(`/documents${filters ? `?${filters}` : ""}`);
+  async function loadDocuments(filters = "", append = false) {
+    await loadPage("documents", filters, append);
     const tbody = document.getElementById("documentsTableBody");
     if (!tbody) return;
 
@@ -470,8 +513,8 @@
       .join("")}</ul>`;
   }
 
-  async function loadAlerts(filters = "") {
-    state.alerts = await api(`/alerts${filters ? `?${filters}` : ""}`);
+  async function loadAlerts(filters = "", append = false) {
+    await loadPage("alerts", filters, append);
     const tbody = document.getElementById("alertsTableBody");
     const dbTbody = document.getElementById("dashboardAlertsBody");
 
@@ -596,6 +639,7 @@
       });
     }
     if (refreshBtn) refreshBtn.addEventListener("click", async () => refreshClientsPage());
+    bindLoadMore("clients", loadClients);
 
     const editForm = document.getElementById("clientEditForm");
     if (editForm) {
@@ -689,6 +733,7 @@
 
     const refreshBtn = document.getElementById("refreshAlertsBtn");
     if (refreshBtn) refreshBtn.addEventListener("click", async () => refreshAlertsPage());
+    bindLoadMore("alerts", loadAlerts);
 
     await refreshAlertsPage();
   }
@@ -832,6 +877,7 @@
     }
 
     if (refreshBtn) refreshBtn.addEventListener("click", async () => refreshDocumentsPage());
+    bindLoadMore("documents", loadDocuments);
     if (refreshRenewalsBtn) refreshRenewalsBtn.addEventListener("click", async () => loadRenewalsReport(state.renewalsFilters));
 
     resetDocumentForm(createForm, docTypeSelect);
@@ -849,6 +895,8 @@
     const importInput = document.getElementById("importFileInput");
     const runImportBtn = document.getElementById("runImportBtn");
     const importResult = document.getElementById("importResult");
+    const cancelImportBtn = document.getElementById("cancelImportBtn");
+    let activeImportJobId = null;
     const generateBulkPdfBtn = document.getElementById("generateBulkPdfBtn");
     const pdfResult = document.getElementById("pdfResult");
     const refreshLogsBtn = document.getElementById("refreshLogsBtn");
@@ -903,12 +951,36 @@
         if (!importInput || !importInput.files || !importInput.files[0]) return;
         const data = new FormData();
         data.append("file", importInput.files[0]);
-        const result = await api("/tools/import/clients", { method: "POST", body: data });
+        runImportBtn.disabled = true;
+        let job = await api("/tools/import/jobs", { method: "POST", body: data });
+        const finished = new Set(["completed", "failed", "cancelled"]);
+        activeImportJobId = job.id;
+        if (cancelImportBtn) cancelImportBtn.disabled = false;
+        try {
+          while (!finished.has(job.status)) {
+            if (importResult) {
+              importResult.textContent = `Importando... filas procesadas: ${job.rows_processed}, errores: ${job.errors.length}`;
+            }
+            await new Promise((resolve) => setTimeout(resolve, 1000));
+            job = await api(`/tools/import/jobs/${job.id}`);
+          }
+        } finally {
+          activeImportJobId = null;
+          runImportBtn.disabled = false;
+          if (cancelImportBtn) cancelImportBtn.disabled = true;
+        }
+        const result = job;
         if (importResult) importResult.textContent = JSON.stringify(result, null, 2);
         const errorsCount = Array.isArray(result?.errors) ? result.errors.length : 0;
+        const statusLabel = {
+          completed: "Importacion completada.",
+          failed: `Importacion fallida: ${result?.error || ""}`,
+          cancelled: "Importacion cancelada.",
+        };
         alert(
           [
-            "Importacion completada.",
+            statusLabel[result.status] || result.status,
+            `Filas procesadas: ${result?.rows_processed ?? 0}`,
             `Clientes creados: ${result?.clients_created ?? 0}`,
             `Clientes actualizados: ${result?.clients_updated ?? 0}`,
             `Documentos creados: ${result?.documents_created ?? 0}`,
@@ -920,10 +992,43 @@
       });
     }
 
+    if (cancelImportBtn) {
+      cancelImportBtn.addEventListener("click", async () => {
+        if (!activeImportJobId) return;
+        await api(`/tools/import/jobs/${activeImportJobId}/cancel`, { method: "POST" });
+      });
+    }
+
     if (generateBulkPdfBtn) {
       generateBulkPdfBtn.addEventListener("click", async () => {
-        const result = await api("/tools/pdf/bulk", { method: "POST" });
-        if (pdfResult) pdfResult.textContent = JSON.stringify(result, null, 2);
+        const response = await fetch(`${apiPrefix}/tools/pdf/bulk`, { method: "POST" });
+        if (!response.ok) {
+          const text = await response.text();
+          if (pdfResult) pdfResult.textContent = `${response.status} ${text}`;
+          return;
+        }
+        const disposition = response.headers.get("Content-Disposition") || "";
+        const filename = (disposition.match(/filename="([^"]+)"/) || [])[1] || "bulk_renovaciones.pdf";
+        const url = URL.createObjectURL(await response.blob());
+        const link = document.createElement("a");
+        link.href = url;
+        link.download = filename;
+        document.body.appendChild(link);
+        link.click();
+        link.remove();
+        URL.revokeObjectURL(url);
+        if (pdfResult) {
+          pdfResult.textContent = JSON.stringify(
+            {
+              filename,
+              clients: Number(response.headers.get("X-Report-Clients") || "0"),
+              cache_hits: Number(response.headers.get("X-Cache-Hits") || "0"),
+              cache_misses: Number(response.headers.get("X-Cache-Misses") || "0"),
+            },
+            null,
+            2
+          );
+        }
       });
     }
 
@@ -5,16 +5,41 @@ from httpx import ASGITransport, AsyncClient
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 
 from app.api.deps import get_db_session
+from app.dashboard.metrics import dashboard_metrics
 from app.db.base import Base
+from app.db.sqlite_profile import configure_sqlite
+from app.pdf_generator import cache, thumbnails
+from app.services import audit_log_service, storage_service
 from main import app
 
 
+@pytest.fixture(autouse=True)
+def isolated_storage(tmp_path, monkeypatch):
+    """Point every storage/ directory the app writes to at the test's tmp_path."""
+    storage_dir = tmp_path / "storage"
+    monkeypatch.setattr(storage_service, "BASE_DIR", storage_dir)
+    monkeypatch.setattr(storage_service, "IMPORTS_DIR", storage_dir / "imports")
+    monkeypatch.setattr(storage_service, "BLOBS_DIR", storage_dir / "blobs")
+    monkeypatch.setattr(storage_service, "BLOB_TMP_DIR", storage_dir / "blobs" / "tmp")
+    monkeypatch.setattr("app.api.routers.tools.EXPORTS_DIR", storage_dir / "exports")
+    monkeypatch.setattr(cache.report_cache, "cache_dir", storage_dir / "exports" / "cache")
+    monkeypatch.setattr(thumbnails.thumbnail_cache, "cache_dir", storage_dir / "exports" / "thumbnails")
+
+    # El hilo del log tiene abierto el fichero anterior: se cierra antes y despues de cambiarlo.
+    audit_log_service.audit_log.close()
+    monkeypatch.setattr(audit_log_service, "LOG_FILE", storage_dir / "logs" / "app.log")
+    monkeypatch.setattr(audit_log_service.audit_log, "log_file", storage_dir / "logs" / "app.log")
+    yield storage_dir
+    audit_log_service.audit_log.close()
+
+
 @pytest.fixture
 async def session_factory(tmp_path) -> AsyncGenerator[async_sessionmaker[AsyncSession], None]:
     db_path = tmp_path / "test.db"
     db_url = f"sqlite+aiosqlite:///{db_path}"
 
     engine = create_async_engine(db_url, future=True)
+    configure_sqlite(engine)
     factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
 
     async with engine.begin() as conn:
@@ -34,6 +59,8 @@ async def client(
             yield session
 
     app.dependency_overrides[get_db_session] = _override_get_db_session
+    # Los contadores del panel se cachean en memoria: cada test parte de una BD nueva.
+    dashboard_metrics.invalidate()
 
     transport = ASGITransport(app=app)
     async with AsyncClient(transport=transport, base_url="http://testserver") as test_client:
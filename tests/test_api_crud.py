@@ -103,6 +103,109 @@ async def test_client_finder_supports_name_nif_phone_company_and_cap_course(clie
     assert len(set(found_ids)) == 2
 
 
+@pytest.mark.anyio
+async def test_search_index_is_accent_insensitive_and_follows_writes(client):
+    response = await client.post(
+        "/api/v1/clients",
+        json={"full_name": "José Núñez", "company": "Logística Ávila", "nif": "44556677C", "phone": "600300300"},
+    )
+    client_id = response.json()["id"]
+    response = await client.post(
+        "/api/v1/documents",
+        json={
+            "client_id": client_id,
+            "doc_type": "cap",
+            "expiry_date": (date.today() + timedelta(days=120)).isoformat(),
+            "course_number": "CURSO-ÑANDÚ-9",
+        },
+    )
+    document_id = response.json()["id"]
+
+    async def _client_ids(term: str) -> list[int]:
+        response = await client.get("/api/v1/clients", params={"q": term})
+        assert response.status_code == 200
+        return [item["id"] for item in response.json()]
+
+    assert await _client_ids("nunez") == [client_id]
+    assert await _client_ids("NÚÑ") == [client_id]
+    assert await _client_ids("logistica avi") == [client_id]
+    assert await _client_ids("nandu") == [client_id]
+    assert await _client_ids("Jo") == [client_id]
+
+    response = await client.get("/api/v1/documents", params={"q": "jose nu"})
+    assert [item["id"] for item in response.json()] == [document_id]
+    response = await client.get("/api/v1/documents", params={"q": "nandu-9"})
+    assert [item["id"] for item in response.json()] == [document_id]
+
+    await client.patch(f"/api/v1/clients/{client_id}", json={"full_name": "Jose Martin"})
+    assert await _client_ids("nunez") == []
+    assert await _client_ids("martin") == [client_id]
+
+    await client.delete(f"/api/v1/documents/{document_id}")
+    assert await _client_ids("nandu") == []
+
+    await client.delete(f"/api/v1/clients/{client_id}")
+    assert await _client_ids("martin") == []
+
+
+@pytest.mark.anyio
+async def test_missing_search_index_is_reported_and_rebuilt(client, session_factory):
+    from sqlalchemy import text
+
+    await client.post("/api/v1/clients", json={"full_name": "Elena Indice", "nif": "55667700F", "phone": "600400402"})
+    async with session_factory() as session:
+        await session.execute(text("DROP TABLE client_search"))
+        await session.commit()
+
+    status = (await client.get("/api/v1/tools/search-index")).json()
+    assert (status["in_sync"], status["clients"], status["indexed_clients"]) == (False, 1, None)
+
+    response = await client.post("/api/v1/tools/search-index/rebuild")
+    assert response.status_code == 200
+    assert (response.json()["in_sync"], response.json()["indexed_clients"]) == (True, 1)
+    found = (await client.get("/api/v1/clients", params={"q": "indice"})).json()
+    assert [item["full_name"] for item in found] == ["Elena Indice"]
+
+
+@pytest.mark.anyio
+async def test_client_status_summary_tracks_alert_writes(client):
+    response = await client.post("/api/v1/clients", json={"full_name": "Irene Sanz", "nif": "55667788D", "phone": "600400400"})
+    client_id = response.json()["id"]
+    assert response.json()["status_color"] == "green"
+
+    async def _colors() -> dict[str, set[int]]:
+        result = {}
+        for color in ("red", "yellow", "green"):
+            response = await client.get("/api/v1/clients", params={"status_color": color})
+            result[color] = {item["id"] for item in response.json()}
+        return result
+
+    response = await client.post(
+        "/api/v1/documents",
+        json={"client_id": client_id, "doc_type": "other", "expiry_date": (date.today() + timedelta(days=120)).isoformat()},
+    )
+    later_document_id = response.json()["id"]
+    detail = (await client.get(f"/api/v1/clients/{client_id}")).json()
+    assert (detail["status_color"], detail["alert_count"]) == ("yellow", 1)
+    assert await _colors() == {"red": set(), "yellow": {client_id}, "green": set()}
+
+    response = await client.post(
+        "/api/v1/documents",
+        json={"client_id": client_id, "doc_type": "other", "expiry_date": (date.today() + timedelta(days=20)).isoformat()},
+    )
+    soon_document_id = response.json()["id"]
+    detail = (await client.get(f"/api/v1/clients/{client_id}")).json()
+    assert (detail["status_color"], detail["alert_count"]) == ("red", 2)
+    assert detail["earliest_alert_date"] == (date.today() - timedelta(days=30)).isoformat()
+    assert await _colors() == {"red": {client_id}, "yellow": {client_id}, "green": set()}
+
+    await client.delete(f"/api/v1/documents/{soon_document_id}")
+    await client.delete(f"/api/v1/documents/{later_document_id}")
+    detail = (await client.get(f"/api/v1/clients/{client_id}")).json()
+    assert (detail["status_color"], detail["alert_count"], detail["earliest_alert_date"]) == ("green", 0, None)
+    assert await _colors() == {"red": set(), "yellow": set(), "green": {client_id}}
+
+
 @pytest.mark.anyio
 async def test_power_of_attorney_creates_and_updates_alerts(client):
     response = await client.post(
@@ -287,3 +390,208 @@ async def test_alerts_include_doc_type(client):
     alerts = response.json()
     assert alerts
     assert alerts[0]["doc_type"] == "cap"
+
+
+async def _collect_pages(client, path: str, limit: int) -> list[list[int]]:
+    pages: list[list[int]] = []
+    cursor = None
+    while True:
+        params = {"limit": limit, **({"cursor": cursor} if cursor else {})}
+        response = await client.get(path, params=params)
+        assert response.status_code == 200
+        pages.append([item["id"] for item in response.json()])
+        cursor = response.headers.get("x-next-cursor")
+        if cursor is None:
+            return pages
+
+
+@pytest.mark.anyio
+async def test_list_endpoints_use_keyset_pagination(client):
+    for index in range(5):
+        response = await client.post(
+            "/api/v1/clients",
+            json={"full_name": f"Cliente Pagina {index}", "nif": f"6000000{index}P", "phone": "600000000"},
+        )
+        assert response.status_code == 201
+        response = await client.post(
+            "/api/v1/documents",
+            json={
+                "client_id": response.json()["id"],
+                "doc_type": "cap",
+                "expiry_date": (date.today() + timedelta(days=40 + index % 2)).isoformat(),
+            },
+        )
+        assert response.status_code == 201
+
+    for path in ("/api/v1/clients", "/api/v1/documents", "/api/v1/alerts"):
+        full = await client.get(path, params={"limit": 500})
+        assert "x-next-cursor" not in full.headers
+        expected = [item["id"] for item in full.json()]
+        assert len(expected) == 5
+
+        pages = await _collect_pages(client, path, limit=2)
+        assert [len(page) for page in pages] == [2, 2, 1]
+        assert [item for page in pages for item in page] == expected
+
+    response = await client.get("/api/v1/clients", params={"limit": 501})
+    assert response.status_code == 422
+    response = await client.get("/api/v1/alerts", params={"cursor": "no-es-un-cursor"})
+    assert response.status_code == 400
+
+
+@pytest.mark.anyio
+async def test_document_uploads_are_deduplicated_and_released(client, monkeypatch, tmp_path):
+    import hashlib
+
+    from app.services import storage_service
+
+    monkeypatch.setattr(storage_service, "BLOBS_DIR", tmp_path / "blobs")
+    monkeypatch.setattr(storage_service, "BLOB_TMP_DIR", tmp_path / "blobs" / "tmp")
+    monkeypatch.setattr(storage_service, "BLOB_GRACE_SECONDS", 0)
+    monkeypatch.setattr(storage_service, "UPLOAD_CHUNK_SIZE", 1024)
+    monkeypatch.setattr(storage_service.settings, "upload_max_mb", 1)
+
+    response = await client.post(
+        "/api/v1/clients",
+        json={"full_name": "Subida Grande", "nif": "90000001S", "phone": "690000001"},
+    )
+    client_id = response.json()["id"]
+    document_ids = []
+    for _ in range(2):
+        response = await client.post(
+            "/api/v1/documents",
+            json={"client_id": client_id, "doc_type": "other", "expiry_date": "2031-01-01"},
+        )
+        document_ids.append(response.json()["id"])
+
+    content = b"%PDF-1.4\n" + b"0" * 5000
+    digest = hashlib.sha256(content).hexdigest()
+    shared = tmp_path / "blobs" / digest[:2] / f"{digest}.pdf"
+    first_mtime = None
+    for document_id in document_ids:
+        response = await client.post(
+            f"/api/v1/documents/{document_id}/file",
+            files={"document_file": ("escaneo.pdf", content, "application/pdf")},
+        )
+        assert response.status_code == 200
+        assert response.json()["pdf_path"] == shared.as_posix()
+        first_mtime = first_mtime or shared.stat().st_mtime_ns
+    assert shared.read_bytes() == content
+    assert [path for path in (tmp_path / "blobs").glob("*/*.pdf")] == [shared]
+    # Reutilizar el contenido no cambia la mtime del blob (clave de la cache de informes y miniaturas).
+    assert shared.stat().st_mtime_ns == first_mtime
+    assert (tmp_path / "blobs" / "tmp" / f"{shared.name}.reused").exists()
+
+    response = await client.post(
+        f"/api/v1/documents/{document_ids[0]}/file",
+        files={"document_file": ("grande.pdf", b"1" * (1024 * 1024 + 1), "application/pdf")},
+    )
+    assert response.status_code == 413
+    assert list((tmp_path / "blobs" / "tmp").glob("*.upload")) == []
+
+    response = await client.post(
+        f"/api/v1/documents/{document_ids[0]}/file",
+        files={"document_file": ("otro.pdf", b"%PDF-1.4\notro", "application/pdf")},
+    )
+    assert response.status_code == 200
+    assert shared.exists()
+
+    response = await client.delete(f"/api/v1/documents/{document_ids[1]}")
+    assert response.status_code == 204
+    assert not shared.exists()
+
+    response = await client.delete(f"/api/v1/clients/{client_id}")
+    assert response.status_code == 204
+    assert [path for path in (tmp_path / "blobs").rglob("*") if path.is_file()] == []
+
+
+def test_reused_blob_keeps_its_grace_period_without_touching_its_mtime(isolated_storage):
+    import io
+    import os
+    import time
+    from pathlib import Path
+
+    from app.services import storage_service
+
+    stored = storage_service.write_blob(io.BytesIO(b"%PDF-1.4\nreutilizado"), ".pdf")
+    blob = Path(stored.path)
+    old = time.time() - storage_service.BLOB_GRACE_SECONDS - 60
+    os.utime(blob, (old, old))
+
+    storage_service.write_blob(io.BytesIO(b"%PDF-1.4\nreutilizado"), ".pdf")
+    assert blob.stat().st_mtime == old
+    assert storage_service.delete_blobs([stored.path]) == 0
+
+    marker = storage_service.BLOB_TMP_DIR / f"{blob.name}.reused"
+    os.utime(marker, (old, old))
+    assert storage_service.delete_blobs([stored.path]) == 1
+    assert not blob.exists() and not marker.exists()
+
+
+@pytest.mark.anyio
+async def test_legacy_files_migrate_to_blob_store(session_factory, monkeypatch, tmp_path):
+    from sqlalchemy import select
+
+    from app.models.client import Client
+    from app.models.document import Document, DocumentType
+    from app.services import storage_service
+
+    base_dir = tmp_path / "storage"
+    monkeypatch.setattr(storage_service, "BASE_DIR", base_dir)
+    monkeypatch.setattr(storage_service, "BLOBS_DIR", base_dir / "blobs")
+    monkeypatch.setattr(storage_service, "BLOB_TMP_DIR", base_dir / "blobs" / "tmp")
+    monkeypatch.setattr(storage_service, "BLOB_GRACE_SECONDS", 0)
+
+    legacy_pdf = base_dir / "documentos" / "A" / "cap" / "A_cap.pdf"
+    legacy_photo = base_dir / "clientes" / "B" / "B_foto_cliente.pdf"
+    for path in (legacy_pdf, legacy_photo):
+        path.parent.mkdir(parents=True)
+        path.write_bytes(b"%PDF-1.4\nmismo escaneo")
+    orphan = base_dir / "blobs" / "ff" / ("f" * 64 + ".pdf")
+    orphan.parent.mkdir(parents=True)
+    orphan.write_bytes(b"huerfano")
+
+    async with session_factory() as session:
+        client = Client(full_name="Legado", nif="90000002T", phone="690000002", photo_path=legacy_photo.as_posix())
+        session.add(client)
+        await session.flush()
+        session.add(Document(client_id=client.id, doc_type=DocumentType.CAP, pdf_path=legacy_pdf.as_posix()))
+        await session.commit()
+
+    async with session_factory() as session:
+        legacy_files = await session.run_sync(lambda sync: storage_service.migrate_files_to_blobs(sync.connection()))
+        await session.commit()
+        assert sorted(legacy_files) == sorted([legacy_pdf, legacy_photo])
+        deleted = await session.run_sync(lambda sync: storage_service.collect_garbage(sync.connection()))
+        assert deleted == 1
+
+        document = (await session.scalars(select(Document))).one()
+        client = (await session.scalars(select(Client))).one()
+        assert document.pdf_path == client.photo_path
+        assert document.pdf_path.startswith((base_dir / "blobs").as_posix())
+
+    blobs = [path for path in (base_dir / "blobs").rglob("*") if path.is_file()]
+    assert [path.as_posix() for path in blobs] == [document.pdf_path]
+
+
+@pytest.mark.anyio
+async def test_client_status_color_turns_red_when_the_alert_date_arrives(client, session_factory):
+    from sqlalchemy import update
+
+    from app.models.client import Client
+
+    response = await client.post("/api/v1/clients", json={"full_name": "Rosa Plazo", "nif": "55667799E", "phone": "600400401"})
+    client_id = response.json()["id"]
+    await client.post(
+        "/api/v1/documents",
+        json={"client_id": client_id, "doc_type": "other", "expiry_date": (date.today() + timedelta(days=120)).isoformat()},
+    )
+    # Como si la fecha de alerta hubiera llegado despues de medianoche, antes del job diario.
+    async with session_factory() as session:
+        await session.execute(update(Client).where(Client.id == client_id).values(earliest_alert_date=date.today()))
+        await session.commit()
+
+    detail = (await client.get(f"/api/v1/clients/{client_id}")).json()
+    assert detail["status_color"] == "red"
+    listed = (await client.get("/api/v1/clients", params={"status_color": "red"})).json()
+    assert [item["status_color"] for item in listed] == ["red"]
@@ -0,0 +1,121 @@
+import os
+import time
+from datetime import datetime
+
+import pytest
+
+from app.services import audit_log_service
+from app.services.audit_log_service import AuditLogWriter
+
+
+def test_audit_log_writes_in_background_and_flushes_on_close(tmp_path):
+    writer = AuditLogWriter(tmp_path / "logs" / "app.log")
+    for index in range(1000):
+        writer.write(f"evento {index}\n")
+    assert writer.flush() is True
+    assert writer.log_file.read_text(encoding="utf-8").splitlines()[-1] == "evento 999"
+
+    writer.write("ultimo\n")
+    writer.close()
+    assert writer.running is False
+    assert writer.log_file.read_text(encoding="utf-8").endswith("ultimo\n")
+
+
+def test_audit_log_rotates_by_size_and_age_keeping_newest(tmp_path, monkeypatch):
+    monkeypatch.setattr(audit_log_service.settings, "log_max_mb", 1)
+    monkeypatch.setattr(audit_log_service.settings, "log_rotate_hours", 24)
+    monkeypatch.setattr(audit_log_service.settings, "log_keep_files", 2)
+    log_file = tmp_path / "app.log"
+    log_file.write_text("de ayer\n", encoding="utf-8")
+    two_days_ago = time.time() - 2 * 86400
+    os.utime(log_file, (two_days_ago, two_days_ago))
+
+    writer = AuditLogWriter(log_file)
+    writer.write("hoy\n")
+    writer.flush()
+    rotated = writer.rotated_files()
+    assert [path.read_text(encoding="utf-8") for path in rotated] == ["de ayer\n"]
+    assert log_file.read_text(encoding="utf-8") == "hoy\n"
+
+    line = "x" * 1023 + "\n"
+    for _ in range(3):
+        for _ in range(1024):
+            writer.write(line)
+        writer.flush()
+    writer.write("fin\n")
+    writer.close()
+
+    rotated = writer.rotated_files()
+    assert len(rotated) == 2
+    assert all(path.stat().st_size >= 1024 * 1024 for path in rotated)
+    assert log_file.read_text(encoding="utf-8").endswith("fin\n")
+
+
+def test_search_logs_seeks_backwards_and_paginates_across_rotated_files(tmp_path, monkeypatch):
+    monkeypatch.setattr(audit_log_service, "READ_CHUNK_SIZE", 100)
+    monkeypatch.setattr(audit_log_service, "INDEX_STEP_BYTES", 500)
+    monkeypatch.setattr(audit_log_service.settings, "log_keep_files", 5)
+    log_file = tmp_path / "app.log"
+    log_file.write_text("[2024-01-01T09:00:00] create_client: client_id=1, nif=LEGACY\n", encoding="utf-8")
+
+    writer = AuditLogWriter(log_file)
+    for index in range(60):
+        entry = {"ts": f"2024-01-02T10:{index:02d}:00", "action": "update_client", "client_id": index % 3}
+        writer.write(audit_log_service.json.dumps(entry) + "\n")
+        if index == 29:
+            writer.flush()
+            writer._rotate()
+    writer.close()
+
+    assert len(writer.rotated_files()) == 1
+    offsets = audit_log_service.read_index(log_file)
+    assert len(offsets) > 1
+    assert [audit_log_service._read_line_at(log_file, offset) is not None for offset in offsets] == [True] * len(offsets)
+    lines = [raw for _, raw in audit_log_service.reverse_lines(log_file)]
+    assert lines == log_file.read_bytes().splitlines()[::-1]
+
+    seen = []
+    position = None
+    while True:
+        page = audit_log_service.search_logs(7, client_id=1, position=position, log_file=log_file)
+        seen.extend(page.entries)
+        position = page.next_position
+        if position is None:
+            break
+    assert [entry["ts"][-5:-3] for entry in seen] == [f"{minute:02d}" for minute in range(58, -1, -3)] + ["00"]
+    assert seen[-1]["client_id"] == 1 and seen[-1]["details"] == "client_id=1, nif=LEGACY"
+
+    page = audit_log_service.search_logs(
+        100,
+        since=datetime(2024, 1, 2, 10, 20),
+        until=datetime(2024, 1, 2, 10, 40),
+        log_file=log_file,
+    )
+    assert [entry["ts"] for entry in page.entries] == [f"2024-01-02T10:{minute:02d}:00" for minute in range(40, 19, -1)]
+    assert audit_log_service.search_logs(10, action="create_client", log_file=log_file).entries[0]["client_id"] == 1
+
+
+@pytest.mark.anyio
+async def test_logs_endpoint_filters_by_client_and_paginates(client):
+    since = datetime.utcnow().replace(microsecond=0).isoformat()
+    response = await client.post("/api/v1/clients", json={"full_name": "Cliente Log", "nif": "70000001A", "phone": "600"})
+    client_id = response.json()["id"]
+    for phone in ("601", "602", "603"):
+        response = await client.patch(f"/api/v1/clients/{client_id}", json={"phone": phone})
+        assert response.status_code == 200
+
+    response = await client.get("/api/v1/tools/logs", params={"client_id": client_id, "since": since, "limit": 2})
+    assert response.status_code == 200
+    body = response.json()
+    assert [entry["action"] for entry in body["entries"]] == ["update_client", "update_client"]
+    assert body["lines"][-1].endswith(f"update_client: client_id={client_id}")
+    assert "next_cursor" not in body
+
+    response = await client.get(
+        "/api/v1/tools/logs",
+        params={"client_id": client_id, "since": since, "limit": 2, "cursor": response.headers["x-next-cursor"]},
+    )
+    assert [entry["action"] for entry in response.json()["entries"]] == ["update_client", "create_client"]
+
+    response = await client.get("/api/v1/tools/logs", params={"cursor": "no-es-un-cursor"})
+    assert response.status_code == 400
@@ -0,0 +1,26 @@
+import pytest
+
+from app.models.document import DocumentType
+from benchmarks.data import generate_rows, parse_scale
+from benchmarks.run import run_benchmarks
+
+
+def test_benchmark_data_is_seeded_and_covers_every_document_type():
+    rows = generate_rows(300, seed=7)
+    assert rows == generate_rows(300, seed=7)
+    assert {row["document_type"] for row in rows} == {doc_type.value for doc_type in DocumentType}
+    assert any(row.get("flag_fran") == "1" or row.get("flag_ciusaba") == "1" for row in rows)
+    assert (parse_scale("1k"), parse_scale("100k"), parse_scale("250")) == (1_000, 100_000, 250)
+
+
+@pytest.mark.anyio
+async def test_benchmark_suite_runs_every_hot_path():
+    report = await run_benchmarks(["20"], repeat=1)
+    results = report["scales"]["20"]
+
+    assert results["import_clients_csv"]["result"]["clients_created"] == 20
+    assert results["import_clients_xlsx"]["result"] == results["import_clients_csv"]["result"]
+    assert results["import_clients_csv"]["result"]["errors"] == 0
+    for name in ("create_deadline_alerts", "list_clients_q", "reporting_renewals", "reporting_dashboard"):
+        assert results[name]["seconds_median"] >= 0 and results[name]["queries"] >= 1
+    assert results["generate_bulk_pdf_cached"]["result"]["cache_hits"] == 20
@@ -0,0 +1,64 @@
+import sqlite3
+
+import pytest
+
+from app.services import database_backup_service
+from app.services.database_backup_service import BackupState, DatabaseBackupService
+
+
+@pytest.fixture
+def sqlite_db(tmp_path, monkeypatch):
+    monkeypatch.setattr(database_backup_service, "log_event", lambda action, details: None)
+    monkeypatch.setattr(database_backup_service.settings, "backup_pages_per_step", 2)
+    monkeypatch.setattr(database_backup_service.settings, "backup_step_sleep_ms", 0)
+    db_path = tmp_path / "renovaciones.db"
+    with sqlite3.connect(db_path) as conn:
+        conn.execute("CREATE TABLE filas (id INTEGER PRIMARY KEY, valor TEXT)")
+        conn.executemany("INSERT INTO filas (valor) VALUES (?)", [("x" * 500,) for _ in range(200)])
+    return db_path
+
+
+def test_database_backup_copies_in_steps_in_background(sqlite_db):
+    service = DatabaseBackupService(f"sqlite+aiosqlite:///{sqlite_db}")
+    assert service.start("startup") is True
+    status = service.join(timeout=30)
+
+    assert status.state == BackupState.COMPLETED
+    assert status.pages_total > 2
+    assert status.pages_copied == status.pages_total
+    assert status.last_duration_seconds is not None
+
+    backups = list((sqlite_db.parent / "backups").glob("renovaciones_*.db"))
+    assert [path.as_posix() for path in backups] == [status.last_backup_path]
+    with sqlite3.connect(backups[0]) as conn:
+        assert conn.execute("SELECT COUNT(*) FROM filas").fetchone()[0] == 200
+
+
+def test_database_backup_cancel_discards_partial_copy(sqlite_db):
+    service = DatabaseBackupService(f"sqlite+aiosqlite:///{sqlite_db}")
+    service._begin("manual")
+    service.cancel()
+
+    assert service._copy(sqlite_db) is None
+    assert service.status.state == BackupState.CANCELLED
+    assert list((sqlite_db.parent / "backups").iterdir()) == []
+
+
+@pytest.mark.anyio
+async def test_database_backup_status_endpoints(client, sqlite_db, monkeypatch):
+    service = DatabaseBackupService(f"sqlite+aiosqlite:///{sqlite_db}")
+    monkeypatch.setattr("app.api.routers.tools.database_backup", service)
+
+    response = await client.get("/api/v1/tools/backup/database")
+    assert response.json()["state"] == "idle"
+
+    response = await client.post("/api/v1/tools/backup/database")
+    assert response.status_code == 202
+    assert response.json()["trigger"] == "manual"
+
+    service.join(timeout=30)
+    response = await client.get("/api/v1/tools/backup/database")
+    body = response.json()
+    assert body["state"] == "completed"
+    assert body["progress"] == 1
+    assert body["last_backup_path"].endswith(".db")
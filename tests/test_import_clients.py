@@ -0,0 +1,178 @@
+import pytest
+
+CSV_HEADER = "full_name,nif,phone,company,document_type,expiry_date,flag_permiso_c,flag_permiso_d,renewed_with_us\n"
+
+
+@pytest.mark.anyio
+async def test_import_clients_counts_created_updated_merged_and_skipped_rows(client, isolated_storage):
+    content = CSV_HEADER + (
+        "Eva Ruiz,10000001A,600000001,Trans Sur,cap,2031-05-10,,,\n"
+        "Eva Ruiz,10000001A,600000001,,cap,2031-05-10,,,\n"
+        "Eva Ruiz,10000001A,,,driving_license,,1,0,\n"
+        "Eva Ruiz,10000001A,,,driving_license,,0,1,\n"
+        "Eva Ruiz,10000001A,,,driving_license,,1,1,\n"
+        ",10000002B,600000002,,,,,,\n"
+        "Pablo Gil,10000003C,600000003,,cap,,,,\n"
+        "Pablo Gil,10000003C,600000003,,tachograph_card,2030-01-01,,,1\n"
+    )
+    response = await client.post(
+        "/api/v1/tools/import/clients",
+        files={"file": ("clientes_import_test.csv", content.encode("utf-8"), "text/csv")},
+    )
+    assert response.status_code == 200
+    result = response.json()
+
+    assert result["clients_created"] == 2
+    assert result["clients_updated"] == 5
+    assert result["documents_created"] == 2
+    assert result["documents_skipped_existing"] == 2
+    assert result["documents_updated_existing"] == 1
+    assert result["errors"] == [
+        "Fila 7: faltan campos obligatorios.",
+        "Fila 8: falta la fecha de caducidad del documento.",
+        "Fila 9: renovado con nosotros requiere forma de pago.",
+    ]
+
+    response = await client.get("/api/v1/documents?doc_type=driving_license")
+    licenses = response.json()
+    assert len(licenses) == 1
+    assert licenses[0]["flag_permiso_c"] is True
+    assert licenses[0]["flag_permiso_d"] is True
+
+    response = await client.get("/api/v1/alerts")
+    assert len(response.json()) == 1
+
+    response = await client.get("/api/v1/clients?q=trans sur")
+    assert [item["nif"] for item in response.json()] == ["10000001A"]
+
+    response = await client.post(
+        "/api/v1/tools/import/clients",
+        files={"file": ("clientes_import_test.csv", content.encode("utf-8"), "text/csv")},
+    )
+    again = response.json()
+    assert again["clients_created"] == 0
+    assert again["documents_created"] == 0
+    assert again["documents_skipped_existing"] == 5
+    assert list((isolated_storage / "imports").iterdir()) == []
+
+
+@pytest.mark.anyio
+async def test_import_job_commits_in_chunks_and_reports_progress(session_factory, tmp_path):
+    from app.services.import_job_service import ImportJobManager, ImportJobStatus
+
+    path = tmp_path / "clientes.csv"
+    rows = "".join(f"Cliente {idx},2000000{idx}A,60000000{idx},,cap,2031-01-0{idx + 1},,,\n" for idx in range(5))
+    path.write_text(CSV_HEADER + rows + ",,,,,,,,\n", encoding="utf-8")
+
+    manager = ImportJobManager(session_factory=session_factory, chunk_size=2)
+    job = manager.submit(path, filename=path.name)
+    await manager.wait(job.id)
+
+    assert job.status == ImportJobStatus.COMPLETED
+    assert job.rows_processed == 6
+    assert job.chunks_committed == 3
+    assert job.result.clients_created == 5
+    assert job.result.documents_created == 5
+    assert job.result.errors == ["Fila 7: faltan campos obligatorios."]
+    assert not path.exists()
+
+
+@pytest.mark.anyio
+async def test_import_job_cancel_and_status_endpoints(client, session_factory, monkeypatch, isolated_storage):
+    from app.services.import_job_service import import_job_manager
+
+    monkeypatch.setattr(import_job_manager, "session_factory", session_factory)
+    content = CSV_HEADER + "Eva Ruiz,10000001A,600000001,,cap,2031-05-10,,,\n"
+
+    response = await client.post(
+        "/api/v1/tools/import/jobs",
+        files={"file": ("clientes_job_test.csv", content.encode("utf-8"), "text/csv")},
+    )
+    assert response.status_code == 202
+    job_id = response.json()["id"]
+    assert response.json()["filename"] == "clientes_job_test.csv"
+    # Cada subida tiene su propio fichero aunque el nombre coincida.
+    uploaded = import_job_manager.get(job_id).path
+    assert uploaded.parent == isolated_storage / "imports"
+    assert uploaded.name.endswith("_clientes_job_test.csv")
+
+    response = await client.post(f"/api/v1/tools/import/jobs/{job_id}/cancel")
+    assert response.status_code == 200
+    assert response.json()["cancel_requested"] is True
+
+    await import_job_manager.wait(job_id)
+    response = await client.get(f"/api/v1/tools/import/jobs/{job_id}")
+    assert response.status_code == 200
+    assert response.json()["status"] == "cancelled"
+    assert response.json()["rows_processed"] == 0
+    assert not uploaded.exists()
+
+    response = await client.get("/api/v1/tools/import/jobs/unknown")
+    assert response.status_code == 404
+
+
+@pytest.mark.anyio
+async def test_import_replays_a_failing_batch_row_by_row(session_factory, monkeypatch):
+    from sqlalchemy import func, select
+
+    from app.models.client import Client
+    from app.services import client_import_service
+    from app.services.client_import_service import ClientImportEngine
+    from app.services.importer_service import ImportedRow
+
+    async with session_factory() as session:
+        session.add(Client(full_name="Ya Guardada", nif="30000002B", phone="600000002"))
+        await session.commit()
+
+    # La busqueda no ve el cliente, como si otra importacion lo hubiera guardado despues de leer:
+    # el INSERT del lote choca con el NIF unico.
+    original_load_clients = ClientImportEngine._load_clients
+
+    async def _stale_load_clients(self, nifs):
+        clients = await original_load_clients(self, nifs)
+        clients.pop("30000002B", None)
+        return clients
+
+    monkeypatch.setattr(ClientImportEngine, "_load_clients", _stale_load_clients)
+    monkeypatch.setattr(client_import_service, "APPLY_CHUNK_SIZE", 2)
+    rows = (
+        ImportedRow(row_number=idx + 2, data={"full_name": f"Cliente {idx}", "nif": f"3000000{idx}B", "phone": "600000000"})
+        for idx in range(5)
+    )
+
+    async with session_factory() as session:
+        result = await ClientImportEngine(session).apply(rows)
+        await session.commit()
+
+    assert result.clients_created == 4
+    assert result.clients_updated == 0
+    assert len(result.errors) == 1
+    assert result.errors[0].startswith("Fila 4: no se pudo guardar (UNIQUE constraint failed: clients.nif")
+
+    async with session_factory() as session:
+        assert await session.scalar(select(func.count(Client.id))) == 5
+        assert await session.scalar(select(Client.full_name).where(Client.nif == "30000002B")) == "Ya Guardada"
+
+
+@pytest.mark.anyio
+async def test_import_batches_stay_in_the_callers_transaction(session_factory, monkeypatch):
+    from sqlalchemy import func, select
+
+    from app.models.client import Client
+    from app.services import client_import_service
+    from app.services.client_import_service import ClientImportEngine
+    from app.services.importer_service import ImportedRow
+
+    monkeypatch.setattr(client_import_service, "APPLY_CHUNK_SIZE", 2)
+    rows = [
+        ImportedRow(row_number=idx + 2, data={"full_name": f"Cliente {idx}", "nif": f"3100000{idx}C", "phone": "600000000"})
+        for idx in range(3)
+    ]
+
+    async with session_factory() as session:
+        result = await ClientImportEngine(session).apply(rows)
+        assert result.clients_created == 3
+        await session.rollback()
+
+    async with session_factory() as session:
+        assert await session.scalar(select(func.count(Client.id))) == 0
@@ -77,3 +77,23 @@ def test_import_cap_skips_date_subtable_header_rows(tmp_path):
     cap_row = next(row for row in data_rows if row.get("document_type") == "cap")
     assert cap_row["issue_date"] == date(2025, 1, 9)
     assert cap_row["expiry_date"] == date(2030, 1, 9)
+
+
+def test_iter_file_streams_generic_xlsx_rows(tmp_path):
+    from openpyxl import Workbook
+
+    file_path = tmp_path / "clientes.xlsx"
+    workbook = Workbook()
+    sheet = workbook.active
+    sheet.append(["full_name", "nif", "phone", "document_type", "expiry_date"])
+    for idx in range(3):
+        sheet.append([f"Cliente {idx}", f"0000000{idx}A", "600000000", "cap", "2030-01-15"])
+    sheet.append([None, None, None, None, None])
+    workbook.save(file_path)
+
+    rows = SpreadsheetImporter().iter_file(file_path)
+    first = next(rows)
+    assert first.row_number == 2
+    assert first.data["nif"] == "00000000A"
+    assert first.data["expiry_date"] == date(2030, 1, 15)
+    assert [row.data["nif"] for row in rows] == ["00000001A", "00000002A"]
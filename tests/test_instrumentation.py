@@ -0,0 +1,60 @@
+import pytest
+
+from app.core import instrumentation
+from app.core.instrumentation import instrument_engine, metrics
+from app.services import audit_log_service
+
+
+def _sample(text: str, prefix: str) -> float:
+    for line in text.splitlines():
+        if line.startswith(prefix + " "):
+            return float(line.rsplit(" ", 1)[1])
+    raise AssertionError(f"{prefix} no aparece en /metrics")
+
+
+@pytest.mark.anyio
+async def test_metrics_report_route_latency_and_queries_per_request(client, session_factory, monkeypatch):
+    logged = []
+    monkeypatch.setattr(instrumentation.settings, "slow_query_ms", 0)
+    monkeypatch.setattr(audit_log_service, "log_event", lambda action, details: logged.append((action, details)))
+    instrument_engine(session_factory.kw["bind"])
+    metrics.reset()
+
+    response = await client.post("/api/v1/clients", json={"full_name": "Cliente Metricas", "nif": "80000001A", "phone": "600"})
+    client_id = response.json()["id"]
+    for _ in range(2):
+        assert (await client.get(f"/api/v1/clients/{client_id}")).status_code == 200
+    assert (await client.get("/api/v1/clients/99999")).status_code == 404
+
+    text = (await client.get("/metrics")).text
+    route = 'method="GET",route="/api/v1/clients/{client_id}"'
+    assert _sample(text, f'http_request_duration_seconds_count{{{route},status="200"}}') == 2
+    assert _sample(text, f'http_request_duration_seconds_count{{{route},status="404"}}') == 1
+    assert _sample(text, f"http_request_db_queries_count{{{route}}}") == 3
+    assert _sample(text, f'http_request_db_queries_bucket{{{route},le="1"}}') == 3
+    assert _sample(text, f'http_request_db_queries_bucket{{{route},le="0"}}') == 0
+    assert _sample(text, "db_query_duration_seconds_count") >= 4
+    assert _sample(text, "db_slow_queries_total") == 0
+    assert logged == []
+
+    monkeypatch.setattr(instrumentation.settings, "slow_query_ms", 0.000001)
+    await client.get(f"/api/v1/clients/{client_id}")
+    assert logged and logged[0][0] == "slow_query"
+    assert f"path=/api/v1/clients/{client_id}" in logged[0][1] and "SELECT" in logged[0][1]
+
+
+@pytest.mark.anyio
+async def test_failed_statement_does_not_leave_a_query_timer_behind(session_factory):
+    from sqlalchemy import text
+    from sqlalchemy.exc import IntegrityError
+
+    engine = session_factory.kw["bind"]
+    instrument_engine(engine)
+    async with engine.connect() as conn:
+        await conn.execute(text("CREATE TEMP TABLE unicos (valor INTEGER UNIQUE)"))
+        await conn.execute(text("INSERT INTO unicos VALUES (1)"))
+        with pytest.raises(IntegrityError):
+            await conn.execute(text("INSERT INTO unicos VALUES (1)"))
+        await conn.execute(text("SELECT 1"))
+        starts = await conn.run_sync(lambda sync_conn: sync_conn.info.get(instrumentation._QUERY_START_KEY))
+    assert starts == []
@@ -0,0 +1,222 @@
+from datetime import date, timedelta
+
+import pytest
+from sqlalchemy import event, inspect, select, text
+
+from app.db import migrations
+from app.db.migrations import LATEST_VERSION, Migration, SchemaVersionError, apply_migrations, read_version
+from app.db.search_index import matching_client_ids
+from app.models.alert import Alert
+from app.models.client import Client
+from app.models.document import Document, DocumentType
+
+STATUS_COLUMNS = ("earliest_alert_date", "latest_alert_date", "alert_count")
+MIGRATED_INDEXES = (
+    "ix_clients_earliest_alert_date",
+    "ix_clients_latest_alert_date",
+    "ix_clients_alert_count",
+    "ix_clients_created_at_id",
+    "ix_documents_client_id_doc_type",
+    "ix_alerts_alert_date_id",
+    "ix_clients_photo_path",
+    "ix_documents_pdf_path",
+)
+
+
+async def _downgrade_to_legacy(engine) -> None:
+    """Turn a current database into one from before versioning, status columns and FTS."""
+
+    def downgrade(connection) -> None:
+        for name in MIGRATED_INDEXES:
+            connection.exec_driver_sql(f"DROP INDEX IF EXISTS {name}")
+        for name in STATUS_COLUMNS:
+            connection.exec_driver_sql(f"ALTER TABLE clients DROP COLUMN {name}")
+        connection.exec_driver_sql("DROP TABLE client_search")
+        connection.exec_driver_sql("DROP TABLE document_search")
+        connection.exec_driver_sql("DROP TABLE schema_version")
+        # Indices de una columna que tenian las primeras tablas y que los compuestos hacen redundantes.
+        for name in migrations.REDUNDANT_INDEXES:
+            table, column = name.removeprefix("ix_").split("_", 1)
+            connection.exec_driver_sql(f"CREATE INDEX {name} ON {table} ({column})")
+
+    async with engine.begin() as conn:
+        await conn.run_sync(downgrade)
+
+
+@pytest.mark.anyio
+async def test_legacy_database_is_migrated_in_place(session_factory):
+    engine = session_factory.kw["bind"]
+    await _downgrade_to_legacy(engine)
+
+    expiry = date.today() + timedelta(days=30)
+    async with engine.begin() as conn:
+        await conn.execute(
+            text(
+                "INSERT INTO clients (id, full_name, nif, phone, created_at) "
+                "VALUES (1, 'Ramon Legado', '72000001A', '600000001', CURRENT_TIMESTAMP)"
+            )
+        )
+        await conn.execute(
+            text(
+                "INSERT INTO documents (id, client_id, doc_type, expiry_date, renewed_with_us, fundae, flag_fran, "
+                "flag_ciusaba, flag_permiso_c, flag_permiso_d, created_at) "
+                "VALUES (1, 1, 'CAP', :expiry, 0, 0, 0, 0, 0, 0, CURRENT_TIMESTAMP)"
+            ),
+            {"expiry": expiry},
+        )
+        await conn.execute(
+            text(
+                "INSERT INTO alerts (client_id, document_id, expiry_date, alert_date, created_at) "
+                "VALUES (1, 1, :expiry, :today, CURRENT_TIMESTAMP)"
+            ),
+            {"expiry": expiry, "today": date.today() - timedelta(days=1)},
+        )
+        assert await conn.run_sync(read_version) is None
+
+    applied = await apply_migrations(engine, 0)
+    assert [migration.version for migration in applied] == list(range(1, LATEST_VERSION + 1))
+
+    async with engine.connect() as conn:
+        assert await conn.run_sync(read_version) == LATEST_VERSION
+        indexes = await conn.run_sync(
+            lambda sync_conn: {
+                index["name"] for table in ("clients", "documents", "alerts") for index in inspect(sync_conn).get_indexes(table)
+            }
+        )
+    assert set(MIGRATED_INDEXES) <= indexes
+    assert not set(migrations.REDUNDANT_INDEXES) & indexes
+
+    async with session_factory() as session:
+        client = await session.get(Client, 1)
+        assert client.full_name == "Ramon Legado"
+        assert client.alert_count == 1
+        assert client.earliest_alert_date == date.today() - timedelta(days=1)
+        assert list(await session.scalars(matching_client_ids("legado"))) == [1]
+        assert await session.scalar(select(Alert.id)) is not None
+
+
+@pytest.mark.anyio
+async def test_current_database_only_reads_the_schema_version(session_factory):
+    engine = session_factory.kw["bind"]
+    async with engine.begin() as conn:
+        await conn.run_sync(migrations.stamp, LATEST_VERSION)
+
+    statements: list[str] = []
+
+    def _record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine.sync_engine, "before_cursor_execute", _record)
+    try:
+        async with engine.connect() as conn:
+            version = await conn.run_sync(read_version)
+        assert await apply_migrations(engine, version) == []
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", _record)
+
+    assert version == LATEST_VERSION
+    # Un PRAGMA y un SELECT sobre schema_version, sin recorrer las columnas de cada tabla.
+    assert len(statements) == 2
+    assert all("schema_version" in statement for statement in statements)
+
+
+@pytest.mark.anyio
+async def test_failed_migration_is_rolled_back(session_factory, monkeypatch):
+    engine = session_factory.kw["bind"]
+    async with engine.begin() as conn:
+        await conn.run_sync(migrations.stamp, LATEST_VERSION)
+
+    def broken(connection) -> None:
+        connection.exec_driver_sql("ALTER TABLE clients ADD COLUMN notes VARCHAR(255)")
+        raise RuntimeError("fallo a mitad de la migracion")
+
+    next_version = LATEST_VERSION + 1
+    monkeypatch.setattr(migrations, "MIGRATIONS", [*migrations.MIGRATIONS, Migration(next_version, "rota", broken)])
+    monkeypatch.setattr(migrations, "LATEST_VERSION", next_version)
+
+    with pytest.raises(RuntimeError, match="fallo a mitad"):
+        await apply_migrations(engine, LATEST_VERSION)
+
+    async with engine.connect() as conn:
+        assert await conn.run_sync(read_version) == LATEST_VERSION
+        columns = await conn.run_sync(lambda sync_conn: {column["name"] for column in inspect(sync_conn).get_columns("clients")})
+    assert "notes" not in columns
+
+
+@pytest.mark.anyio
+async def test_database_from_a_newer_version_is_rejected(session_factory):
+    with pytest.raises(SchemaVersionError):
+        await apply_migrations(session_factory.kw["bind"], LATEST_VERSION + 1)
+
+
+@pytest.mark.anyio
+async def test_migrations_tolerate_a_database_that_already_has_the_changes(session_factory):
+    async with session_factory() as session:
+        client = Client(full_name="Poder Conservado", nif="72000002B", phone="600000002")
+        session.add(client)
+        await session.flush()
+        session.add(Document(client_id=client.id, doc_type=DocumentType.POWER_OF_ATTORNEY, flag_fran=True))
+        await session.commit()
+
+    assert len(await apply_migrations(session_factory.kw["bind"], 0)) == LATEST_VERSION
+
+    async with session_factory() as session:
+        document = await session.scalar(select(Document))
+        assert document.doc_type == DocumentType.POWER_OF_ATTORNEY
+        assert document.flag_fran is True
+        assert list(await session.scalars(matching_client_ids("conservado"))) == [client.id]
+
+
+@pytest.mark.anyio
+async def test_legacy_files_move_to_blobs_once_as_a_migration(session_factory, isolated_storage):
+    engine = session_factory.kw["bind"]
+    legacy_photo = isolated_storage / "clientes" / "C" / "C_foto_cliente.pdf"
+    legacy_photo.parent.mkdir(parents=True)
+    legacy_photo.write_bytes(b"%PDF-1.4\nfoto antigua")
+    async with session_factory() as session:
+        session.add(Client(full_name="Foto Antigua", nif="72000003C", phone="600000003", photo_path=legacy_photo.as_posix()))
+        await session.commit()
+
+    applied = await apply_migrations(engine, 4)
+
+    assert [migration.version for migration in applied] == list(range(5, LATEST_VERSION + 1))
+    assert not legacy_photo.exists()
+    async with session_factory() as session:
+        photo_path = await session.scalar(select(Client.photo_path))
+    assert photo_path.startswith((isolated_storage / "blobs").as_posix())
+    assert await apply_migrations(engine, LATEST_VERSION) == []
+
+
+@pytest.mark.anyio
+async def test_stored_status_color_column_is_dropped(session_factory):
+    engine = session_factory.kw["bind"]
+    async with engine.begin() as conn:
+        # Base en la version 5, que aun guardaba el color con su indice.
+        await conn.exec_driver_sql("ALTER TABLE clients ADD COLUMN status_color VARCHAR(8) NOT NULL DEFAULT 'green'")
+        await conn.exec_driver_sql("CREATE INDEX ix_clients_status_color ON clients (status_color)")
+        await conn.run_sync(migrations.stamp, 5)
+
+    assert [migration.version for migration in await apply_migrations(engine, 5)] == list(range(6, LATEST_VERSION + 1))
+
+    async with engine.connect() as conn:
+        columns = await conn.run_sync(lambda sync_conn: {column["name"] for column in inspect(sync_conn).get_columns("clients")})
+        indexes = await conn.run_sync(lambda sync_conn: {index["name"] for index in inspect(sync_conn).get_indexes("clients")})
+    assert "status_color" not in columns
+    assert "ix_clients_status_color" not in indexes
+
+
+@pytest.mark.anyio
+async def test_alert_listing_index_is_rebuilt_with_descending_id(session_factory):
+    engine = session_factory.kw["bind"]
+    async with engine.begin() as conn:
+        # Base en la version 6, con el indice en orden ascendente.
+        await conn.exec_driver_sql("DROP INDEX ix_alerts_alert_date_id")
+        await conn.exec_driver_sql("CREATE INDEX ix_alerts_alert_date_id ON alerts (alert_date, id)")
+        await conn.run_sync(migrations.stamp, 6)
+
+    assert [migration.version for migration in await apply_migrations(engine, 6)] == [7]
+
+    async with engine.connect() as conn:
+        key = (await conn.exec_driver_sql("PRAGMA index_xinfo(ix_alerts_alert_date_id)")).all()
+    # (seqno, cid, name, desc, coll, key): solo las columnas clave del indice.
+    assert [(row[2], row[3]) for row in key if row[5]] == [("alert_date", 0), ("id", 1)]
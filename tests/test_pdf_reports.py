@@ -0,0 +1,323 @@
+from datetime import date, timedelta
+from io import BytesIO
+from pathlib import Path
+
+import pytest
+from pypdf import PdfReader
+
+
+async def _create_client_with_documents(client, nif: str, full_name: str) -> int:
+    response = await client.post("/api/v1/clients", json={"full_name": full_name, "nif": nif, "phone": "600700700"})
+    assert response.status_code == 201
+    client_id = response.json()["id"]
+
+    response = await client.post(
+        "/api/v1/documents",
+        json={
+            "client_id": client_id,
+            "doc_type": "cap",
+            "expiry_date": (date.today() + timedelta(days=40)).isoformat(),
+            "course_number": f"CURSO-{nif}",
+        },
+    )
+    assert response.status_code == 201
+    return client_id
+
+
+def _pdf_text(content: bytes) -> str:
+    return "".join(page.extract_text() for page in PdfReader(BytesIO(content)).pages)
+
+
+@pytest.mark.anyio
+async def test_bulk_pdf_renders_clients_in_parallel_and_keeps_order(client, monkeypatch):
+    from app.pdf_generator import bulk
+
+    monkeypatch.setattr(bulk.settings, "pdf_workers", 2)
+    await _create_client_with_documents(client, "50000001A", "Primer Cliente")
+    await _create_client_with_documents(client, "50000002B", "Segundo Cliente")
+
+    response = await client.post("/api/v1/tools/pdf/bulk")
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/pdf"
+    assert response.headers["x-report-clients"] == "2"
+    assert 'filename="bulk_renovaciones_' in response.headers["content-disposition"]
+
+    text = _pdf_text(response.content)
+    assert text.index("Primer Cliente") < text.index("Segundo Cliente")
+
+
+@pytest.mark.anyio
+async def test_bulk_pdf_reuses_one_worker_pool_across_batches_and_requests(client, monkeypatch):
+    from app.pdf_generator import bulk, cache
+
+    monkeypatch.setattr(bulk.settings, "pdf_workers", 2)
+    monkeypatch.setattr(bulk.settings, "pdf_batch_size", 2)
+    monkeypatch.setattr(cache.settings, "pdf_cache_enabled", False)
+    for index in range(4):
+        await _create_client_with_documents(client, f"5100000{index}A", f"Cliente Pool {index}")
+
+    created: list[object] = []
+    original = bulk.ProcessPoolExecutor
+
+    def _tracking_pool(*args, **kwargs):
+        created.append(original(*args, **kwargs))
+        return created[-1]
+
+    monkeypatch.setattr(bulk, "ProcessPoolExecutor", _tracking_pool)
+    bulk.shutdown_report_pool()
+    try:
+        for _ in range(2):
+            response = await client.post("/api/v1/tools/pdf/bulk")
+            assert response.headers["x-report-clients"] == "4"
+        assert len(created) == 1
+    finally:
+        bulk.shutdown_report_pool()
+
+
+@pytest.mark.anyio
+async def test_bulk_pdf_loads_clients_in_batches_with_constant_queries(client, session_factory, monkeypatch):
+    from sqlalchemy import event
+
+    from app.pdf_generator import bulk, cache
+
+    monkeypatch.setattr(bulk.settings, "pdf_workers", 1)
+    monkeypatch.setattr(bulk.settings, "pdf_batch_size", 2)
+    monkeypatch.setattr(cache.settings, "pdf_cache_enabled", False)
+    for index in range(5):
+        await _create_client_with_documents(client, f"5100000{index}A", f"Cliente Lote {index}")
+
+    statements: list[str] = []
+    engine = session_factory.kw["bind"].sync_engine
+
+    def _record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", _record)
+    try:
+        response = await client.post("/api/v1/tools/pdf/bulk")
+    finally:
+        event.remove(engine, "before_cursor_execute", _record)
+
+    assert response.status_code == 200
+    assert response.headers["x-report-clients"] == "5"
+    # Tres lotes (2 + 2 + 1), tres consultas por lote.
+    assert sum("FROM documents" in statement for statement in statements) == 3
+    assert sum("FROM alerts" in statement for statement in statements) == 3
+    assert len(statements) == 9
+
+
+@pytest.mark.anyio
+async def test_client_pdf_endpoint(client):
+    client_id = await _create_client_with_documents(client, "50000003C", "Cliente Unico")
+
+    response = await client.post(f"/api/v1/tools/pdf/client/{client_id}")
+    assert response.status_code == 200
+    path = Path(response.json()["path"])
+    assert "50000003C" in "".join(page.extract_text() for page in PdfReader(path).pages)
+    path.unlink()
+
+    response = await client.post("/api/v1/tools/pdf/client/9999")
+    assert response.status_code == 404
+
+
+@pytest.mark.anyio
+async def test_bulk_pdf_reuses_cached_reports_until_client_changes(client, monkeypatch, tmp_path):
+    from app.pdf_generator import cache
+
+    monkeypatch.setattr(cache.report_cache, "cache_dir", tmp_path / "cache")
+    monkeypatch.setattr(cache.settings, "pdf_cache_enabled", True)
+    first_id = await _create_client_with_documents(client, "50000004D", "Cliente Cache Uno")
+    await _create_client_with_documents(client, "50000005E", "Cliente Cache Dos")
+
+    def _cache_counts(response) -> tuple[int, int]:
+        assert response.status_code == 200
+        return int(response.headers["x-cache-hits"]), int(response.headers["x-cache-misses"])
+
+    assert _cache_counts(await client.post("/api/v1/tools/pdf/bulk")) == (0, 2)
+
+    second = await client.post("/api/v1/tools/pdf/bulk")
+    assert _cache_counts(second) == (2, 0)
+    assert "Cliente Cache Dos" in _pdf_text(second.content)
+
+    response = await client.patch(f"/api/v1/clients/{first_id}", json={"phone": "611222333"})
+    assert response.status_code == 200
+    assert _cache_counts(await client.post("/api/v1/tools/pdf/bulk")) == (1, 1)
+
+
+def test_report_digest_changes_with_the_printed_report_date(monkeypatch):
+    import datetime as real_datetime
+
+    from app.pdf_generator import cache
+
+    documents = [{"id": 1, "doc_type": "cap", "expiry_date": date.today() + timedelta(days=100)}]
+    digest = cache.report_digest({"id": 1, "nif": "50000009J"}, documents, [])
+    assert cache.report_digest({"id": 1, "nif": "50000009J"}, documents, []) == digest
+
+    # Al dia siguiente (UTC, como la fecha impresa en el informe) el informe se vuelve a generar.
+    class _Tomorrow(real_datetime.datetime):
+        @classmethod
+        def utcnow(cls):
+            return real_datetime.datetime.utcnow() + timedelta(days=1)
+
+    monkeypatch.setattr(cache, "datetime", _Tomorrow)
+    assert cache.report_digest({"id": 1, "nif": "50000009J"}, documents, []) != digest
+
+
+@pytest.mark.anyio
+async def test_cached_render_keeps_disk_access_off_the_event_loop(monkeypatch, tmp_path):
+    import threading
+
+    from app.pdf_generator import bulk, cache
+
+    monkeypatch.setattr(bulk.settings, "pdf_workers", 1)
+    report_cache = cache.ReportCache(cache_dir=tmp_path / "cache")
+    loop_thread = threading.get_ident()
+    threads: set[int] = set()
+    for method in ("get", "put"):
+        original = getattr(report_cache, method)
+
+        def _recording(*args, _original=original, **kwargs):
+            threads.add(threading.get_ident())
+            return _original(*args, **kwargs)
+
+        monkeypatch.setattr(report_cache, method, _recording)
+
+    jobs = [bulk.ClientReportJob(client={"id": idx, "nif": f"5200000{idx}K", "full_name": f"Cliente {idx}"}) for idx in range(3)]
+    assert (await bulk.render_client_reports(jobs, report_cache)).cache_misses == 3
+    assert (await bulk.render_client_reports(jobs, report_cache)).cache_hits == 3
+    assert threads and loop_thread not in threads
+
+
+def test_report_cache_tracks_its_size_and_evicts_least_recently_used(tmp_path, monkeypatch):
+    import os
+    from concurrent.futures import ThreadPoolExecutor
+
+    from app.pdf_generator.cache import ReportCache
+
+    # Varios hilos guardando el mismo informe no comparten fichero temporal.
+    shared = ReportCache(cache_dir=tmp_path / "cache", max_bytes=1000)
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(lambda _: shared.put("mismo", b"a" * 100), range(32)))
+    assert [path.name for path in shared.cache_dir.iterdir()] == ["mismo.pdf"]
+
+    report_cache = ReportCache(cache_dir=tmp_path / "cache", max_bytes=1000)
+
+    scans = 0
+    original_evict = report_cache._evict
+
+    def _counting_evict():
+        nonlocal scans
+        scans += 1
+        return original_evict()
+
+    monkeypatch.setattr(report_cache, "_evict", _counting_evict)
+    for idx in range(8):
+        report_cache.put(f"informe{idx}", b"b" * 100)
+        os.utime(report_cache.path_for(f"informe{idx}"), (idx + 10, idx + 10))
+    os.utime(report_cache.path_for("mismo"), (1, 1))
+    assert scans == 0
+
+    hit = report_cache.get("informe0")
+    report_cache.put("informe8", b"c" * 200)
+
+    assert scans == 1
+    assert hit == b"b" * 100
+    assert report_cache.get("mismo") is None
+    assert report_cache.get("informe0") is not None
+    assert sum(path.stat().st_size for path in report_cache.cache_dir.glob("*.pdf")) <= 900
+
+
+@pytest.mark.anyio
+async def test_bulk_pdf_appends_photo_pdf_after_client_report(client, session_factory, tmp_path):
+    from reportlab.pdfgen.canvas import Canvas
+
+    from app.models.client import Client
+
+    photo_path = tmp_path / "foto.pdf"
+    canvas = Canvas(str(photo_path))
+    canvas.drawString(100, 700, "FOTO ADJUNTA")
+    canvas.save()
+
+    first_id = await _create_client_with_documents(client, "50000006F", "Cliente Con Foto")
+    await _create_client_with_documents(client, "50000007G", "Cliente Sin Foto")
+    async with session_factory() as session:
+        (await session.get(Client, first_id)).photo_path = str(photo_path)
+        await session.commit()
+
+    response = await client.post("/api/v1/tools/pdf/bulk")
+    assert response.status_code == 200
+    text = _pdf_text(response.content)
+    assert text.index("Cliente Con Foto") < text.index("FOTO ADJUNTA") < text.index("Cliente Sin Foto")
+
+
+@pytest.mark.anyio
+async def test_client_photo_thumbnail_is_built_on_upload_and_reused(client, monkeypatch, tmp_path):
+    import os
+
+    from PIL import Image
+
+    from app.pdf_generator import thumbnails
+    from app.services import storage_service
+
+    monkeypatch.setattr(storage_service, "BLOBS_DIR", tmp_path / "blobs")
+    monkeypatch.setattr(storage_service, "BLOB_TMP_DIR", tmp_path / "blobs" / "tmp")
+    monkeypatch.setattr(thumbnails.thumbnail_cache, "cache_dir", tmp_path / "thumbnails")
+    client_id = await _create_client_with_documents(client, "50000008H", "Cliente Foto Grande")
+
+    photo = BytesIO()
+    Image.frombytes("RGB", (1600, 1600), os.urandom(1600 * 1600 * 3)).save(photo, format="PNG")
+    response = await client.post(
+        f"/api/v1/clients/{client_id}/photo",
+        files={"photo": ("foto.png", photo.getvalue(), "image/png")},
+    )
+    assert response.status_code == 200
+
+    cached = list((tmp_path / "thumbnails").rglob("*.jpg"))
+    assert len(cached) == 1
+    assert cached[0].stat().st_size < len(photo.getvalue()) / 4
+    with Image.open(cached[0]) as thumbnail:
+        assert max(thumbnail.size) <= max(thumbnails.thumbnail_cache.pixel_box(*thumbnails.CLIENT_PHOTO_BOX))
+
+    def _fail(*args, **kwargs):
+        raise AssertionError("la miniatura deberia salir de la cache")
+
+    monkeypatch.setattr(Image, "open", _fail)
+    response = await client.post(f"/api/v1/tools/pdf/client/{client_id}")
+    assert response.status_code == 200
+    path = Path(response.json()["path"])
+    assert PdfReader(path).pages[0].images
+    path.unlink()
+
+
+def test_thumbnail_cache_evicts_least_recently_used_idle_thumbnails(tmp_path):
+    import os
+    import time
+
+    from PIL import Image
+
+    from app.pdf_generator.thumbnails import EVICT_GRACE_SECONDS, ThumbnailCache
+
+    thumbnail_cache = ThumbnailCache(cache_dir=tmp_path / "thumbnails", dpi=72, max_bytes=10**9)
+    sources = []
+    for idx in range(4):
+        source = tmp_path / f"foto{idx}.png"
+        Image.frombytes("RGB", (64, 64), os.urandom(64 * 64 * 3)).save(source, format="PNG")
+        sources.append(source)
+    thumbnails = [thumbnail_cache.get(source, 64, 64) for source in sources]
+    sizes = [thumbnail.stat().st_size for thumbnail in thumbnails]
+
+    # Las tres primeras llevan tiempo sin usarse; la ultima se acaba de generar.
+    idle = time.time() - EVICT_GRACE_SECONDS - 60
+    for idx, thumbnail in enumerate(thumbnails[:3]):
+        os.utime(thumbnail, (idle + idx, idle + idx))
+    # Un acierto la marca como usada ahora.
+    assert thumbnail_cache.get(sources[0], 64, 64) == thumbnails[0]
+
+    thumbnail_cache.max_bytes = sum(sizes) - 1
+    assert thumbnail_cache.evict() == 1
+    assert [thumbnail.exists() for thumbnail in thumbnails] == [True, False, True, True]
+
+    # Lo que sigue por encima del limite esta en uso: no se borra.
+    thumbnail_cache.max_bytes = 1
+    assert thumbnail_cache.evict() == 1
+    assert [thumbnail.exists() for thumbnail in thumbnails] == [True, False, False, True]
@@ -0,0 +1,177 @@
+import re
+from datetime import date, timedelta
+
+import pytest
+from sqlalchemy import event
+
+from app.db.base import Base
+
+# Filtros por subcadena (ILIKE '%x%') y busqueda corta sin FTS no pueden usar un indice b-tree:
+# quedan fuera a proposito.
+SCAN_LINE = re.compile(r"^SCAN (\w+)$")
+EXPLAINED_STATEMENTS = ("SELECT", "UPDATE", "DELETE", "WITH")
+
+
+async def _seed(client) -> dict[str, int]:
+    response = await client.post(
+        "/api/v1/clients",
+        json={"full_name": "Marta Plan", "nif": "70000001A", "phone": "600700001", "company": "Trans Plan"},
+    )
+    client_id = response.json()["id"]
+    await client.post(
+        "/api/v1/clients",
+        json={"full_name": "Jorge Plan", "nif": "70000002B", "phone": "600700002"},
+    )
+
+    response = await client.post(
+        "/api/v1/documents",
+        json={
+            "client_id": client_id,
+            "doc_type": "cap",
+            "expiry_date": (date.today() + timedelta(days=40)).isoformat(),
+            "course_number": "CAP-PLAN-1",
+            "renewed_with_us": True,
+            "payment_method": "visa",
+        },
+    )
+    document_id = response.json()["id"]
+    await client.post(
+        "/api/v1/documents",
+        json={"client_id": client_id, "doc_type": "driving_license", "flag_permiso_c": True},
+    )
+    response = await client.get(f"/api/v1/alerts?client_id={client_id}")
+    return {"client_id": client_id, "document_id": document_id, "alert_id": response.json()[0]["id"]}
+
+
+async def _endpoint_calls(client, ids: dict[str, int]) -> None:
+    client_id, document_id, alert_id = ids["client_id"], ids["document_id"], ids["alert_id"]
+    calls = [
+        ("GET", "/api/v1/clients", None),
+        ("GET", "/api/v1/clients?limit=1", None),
+        ("GET", "/api/v1/clients?q=plan", None),
+        ("GET", "/api/v1/clients?course_number=CAP", None),
+        ("GET", "/api/v1/clients?status_color=red", None),
+        ("GET", "/api/v1/clients?status_color=yellow", None),
+        ("GET", "/api/v1/clients?status_color=green", None),
+        ("GET", f"/api/v1/clients/{client_id}", None),
+        ("PATCH", f"/api/v1/clients/{client_id}", {"phone": "600700009"}),
+        ("GET", "/api/v1/documents", None),
+        ("GET", "/api/v1/documents?limit=1", None),
+        ("GET", f"/api/v1/documents?client_id={client_id}&doc_type=cap", None),
+        ("GET", "/api/v1/documents?doc_type=driving_license", None),
+        ("GET", "/api/v1/documents?expiration_status=expiring", None),
+        ("GET", "/api/v1/documents?expires_within_days=60", None),
+        ("GET", "/api/v1/documents?q=plan", None),
+        ("GET", f"/api/v1/documents/{document_id}", None),
+        ("GET", "/api/v1/alerts", None),
+        ("GET", "/api/v1/alerts?limit=1", None),
+        ("GET", f"/api/v1/alerts?client_id={client_id}", None),
+        ("GET", "/api/v1/alerts?urgent_only=true", None),
+        ("GET", "/api/v1/alerts?window_days=60", None),
+        ("GET", f"/api/v1/alerts/{alert_id}", None),
+        ("PATCH", f"/api/v1/alerts/{alert_id}", {"alert_date": date.today().isoformat()}),
+        (
+            "PATCH",
+            f"/api/v1/documents/{document_id}",
+            {"expiry_date": (date.today() + timedelta(days=50)).isoformat()},
+        ),
+        ("GET", "/api/v1/reporting/dashboard", None),
+        ("GET", "/api/v1/reporting/renewals", None),
+        ("GET", "/api/v1/reporting/renewals?doc_type=cap&payment_method=visa", None),
+        ("POST", f"/api/v1/tools/pdf/client/{client_id}", None),
+        ("POST", "/api/v1/tools/pdf/bulk", None),
+    ]
+    for method, url, payload in calls:
+        response = await client.request(method, url, json=payload)
+        assert response.status_code < 400, (method, url, response.text)
+
+    content = (
+        "full_name,nif,phone,company,document_type,expiry_date,flag_permiso_c,flag_permiso_d,renewed_with_us\n"
+        "Marta Plan,70000001A,600700001,,driving_license,,0,1,\n"
+        "Nuevo Plan,70000003C,600700003,,tachograph_card,2031-01-01,,,\n"
+    )
+    response = await client.post(
+        "/api/v1/tools/import/clients",
+        files={"file": ("plan.csv", content.encode("utf-8"), "text/csv")},
+    )
+    assert response.status_code == 200
+
+    response = await client.delete(f"/api/v1/documents/{document_id}")
+    assert response.status_code == 204
+    response = await client.delete(f"/api/v1/clients/{client_id}")
+    assert response.status_code == 204
+
+
+def _full_scans(plan_rows, tables: set[str]) -> list[str]:
+    scans = []
+    for row in plan_rows:
+        match = SCAN_LINE.match(row[-1])
+        if match and match.group(1) in tables:
+            scans.append(row[-1])
+    return scans
+
+
+@pytest.mark.anyio
+async def test_endpoint_queries_do_not_scan_whole_tables(client, session_factory):
+    ids = await _seed(client)
+
+    statements: list[tuple[str, tuple]] = []
+    engine = session_factory.kw["bind"]
+
+    def _record(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith(EXPLAINED_STATEMENTS) and not executemany:
+            statements.append((statement, parameters))
+
+    event.listen(engine.sync_engine, "before_cursor_execute", _record)
+    try:
+        await _endpoint_calls(client, ids)
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", _record)
+
+    assert statements
+    tables = set(Base.metadata.tables)
+    offenders: dict[str, list[str]] = {}
+    async with engine.connect() as conn:
+        for statement, parameters in statements:
+            plan = (await conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters)).all()
+            scans = _full_scans(plan, tables)
+            if scans:
+                offenders[statement] = scans
+
+    assert offenders == {}
+
+
+@pytest.mark.anyio
+async def test_alert_pages_walk_the_listing_index_without_sorting(client, session_factory):
+    ids = await _seed(client)
+    seeded = (await client.get(f"/api/v1/alerts/{ids['alert_id']}")).json()
+    # Misma alert_date: la segunda pagina desempata por id.
+    response = await client.post(
+        "/api/v1/alerts",
+        json={"client_id": ids["client_id"], "expiry_date": seeded["expiry_date"], "alert_date": seeded["alert_date"]},
+    )
+    assert response.status_code == 201
+    tied_id = response.json()["id"]
+    first = await client.get("/api/v1/alerts?limit=1")
+    cursor = first.headers["X-Next-Cursor"]
+
+    statements: list[tuple[str, tuple]] = []
+    engine = session_factory.kw["bind"]
+
+    def _record(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT") and "FROM alerts" in statement:
+            statements.append((statement, parameters))
+
+    event.listen(engine.sync_engine, "before_cursor_execute", _record)
+    try:
+        response = await client.get("/api/v1/alerts", params={"limit": 1, "cursor": cursor})
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", _record)
+    assert response.status_code == 200
+    assert [first.json()[0]["id"], response.json()[0]["id"]] == [tied_id, ids["alert_id"]]
+
+    statement, parameters = statements[0]
+    async with engine.connect() as conn:
+        plan = [row[-1] for row in (await conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters)).all()]
+    assert any("USING INDEX ix_alerts_alert_date_id (alert_date" in line for line in plan), plan
+    assert not any("TEMP B-TREE" in line for line in plan), plan
@@ -37,6 +37,75 @@ async def test_dashboard_summary(client):
     assert summary["due_in_90_days"] == 3
     assert summary["documents_total"] == 3
     assert summary["alerts_total"] == 3
+    assert summary["documents_missing_pdf"] == 3
+    assert summary["documents_expired"] == 0
+
+
+@pytest.mark.anyio
+async def test_dashboard_summary_is_cached_until_documents_change(client, session_factory):
+    from sqlalchemy import event
+
+    response = await client.post(
+        "/api/v1/clients",
+        json={"full_name": "Luis Cache", "nif": "87654322Z", "phone": "622222223"},
+    )
+    client_id = response.json()["id"]
+
+    statements: list[str] = []
+    engine = session_factory.kw["bind"].sync_engine
+
+    def _record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", _record)
+    try:
+        for _ in range(3):
+            response = await client.get("/api/v1/reporting/dashboard")
+            assert response.json()["documents_total"] == 0
+        assert len(statements) == 1
+
+        response = await client.get("/dashboard")
+        assert response.status_code == 200
+        assert len(statements) == 1
+
+        response = await client.post(
+            "/api/v1/documents",
+            json={
+                "client_id": client_id,
+                "doc_type": "other",
+                "expiry_date": (date.today() - timedelta(days=3)).isoformat(),
+            },
+        )
+        assert response.status_code == 201
+    finally:
+        event.remove(engine, "before_cursor_execute", _record)
+
+    summary = (await client.get("/api/v1/reporting/dashboard")).json()
+    assert summary["documents_total"] == 1
+    assert summary["documents_expired"] == 1
+
+
+@pytest.mark.anyio
+async def test_dashboard_result_computed_across_an_invalidation_is_not_cached(session_factory):
+    from app.dashboard.metrics import DashboardMetricsCache
+
+    metrics = DashboardMetricsCache(ttl_seconds=60)
+    async with session_factory() as session:
+        original_execute = session.execute
+
+        async def _execute_with_concurrent_commit(statement, *args, **kwargs):
+            result = await original_execute(statement, *args, **kwargs)
+            # Otra peticion confirma cambios en documentos mientras se calculan los contadores.
+            metrics.invalidate()
+            return result
+
+        session.execute = _execute_with_concurrent_commit
+        await metrics.get(session)
+        assert metrics._summary is None
+
+        session.execute = original_execute
+        await metrics.get(session)
+        assert metrics._summary is not None
 
 
 @pytest.mark.anyio
@@ -60,3 +60,77 @@ async def test_scheduler_creates_alerts_for_power_of_attorney_windows(session_fa
 
         alerts = list(await session.scalars(select(Alert).order_by(Alert.id.asc())))
         assert len(alerts) == 2
+
+
+@pytest.mark.anyio
+async def test_scheduler_skips_existing_alerts_and_duplicate_power_of_attorney_dates(session_factory):
+    due = date.today() + timedelta(days=60)
+    async with session_factory() as session:
+        client = Client(full_name="Irene Campos", nif="33334444Z", phone="655555555")
+        session.add(client)
+        await session.flush()
+
+        session.add(
+            Document(
+                client_id=client.id,
+                doc_type=DocumentType.POWER_OF_ATTORNEY,
+                flag_fran=True,
+                expiry_fran=due,
+                flag_ciusaba=True,
+                expiry_ciusaba=due,
+            )
+        )
+        session.add(Document(client_id=client.id, doc_type=DocumentType.CAP, expiry_date=date.today() + timedelta(days=45)))
+        await session.commit()
+
+    async with session_factory() as session:
+        assert await create_deadline_alerts(session) == 1
+
+    async with session_factory() as session:
+        assert await create_deadline_alerts(session) == 0
+
+        alerts = list(await session.scalars(select(Alert)))
+        assert len(alerts) == 1
+        assert alerts[0].expiry_date == due
+        assert alerts[0].alert_date == due - timedelta(days=50)
+
+
+@pytest.mark.anyio
+async def test_client_status_follows_scheduler_alerts_and_date_rollover(session_factory, monkeypatch):
+    import datetime as real_datetime
+
+    from app.schemas import client as client_schema
+    from app.schemas.client import ClientRead
+
+    async with session_factory() as session:
+        expiring = Client(full_name="Rosa Vidal", nif="11114444Z", phone="633333336")
+        upcoming = Client(full_name="Tomas Vidal", nif="11115555Z", phone="633333337")
+        session.add_all([expiring, upcoming])
+        await session.flush()
+        session.add(Document(client_id=expiring.id, doc_type=DocumentType.OTHER, expiry_date=date.today() + timedelta(days=30)))
+        session.add(
+            Alert(
+                client_id=upcoming.id,
+                expiry_date=date.today() + timedelta(days=51),
+                alert_date=date.today() + timedelta(days=1),
+            )
+        )
+        await session.commit()
+        assert (ClientRead.model_validate(upcoming).status_color, upcoming.alert_count) == ("yellow", 1)
+        assert ClientRead.model_validate(expiring).status_color == "green"
+
+    async with session_factory() as session:
+        assert await create_deadline_alerts(session) == 1
+        client = await session.scalar(select(Client).where(Client.nif == "11114444Z"))
+        assert (ClientRead.model_validate(client).status_color, client.alert_count) == ("red", 1)
+        assert client.earliest_alert_date == date.today() - timedelta(days=20)
+
+        # Al dia siguiente llega la fecha de aviso: el color cambia sin que ningun job toque la BD.
+        class _Tomorrow(real_datetime.date):
+            @classmethod
+            def today(cls):
+                return real_datetime.date.today() + timedelta(days=1)
+
+        monkeypatch.setattr(client_schema, "date", _Tomorrow)
+        client = await session.scalar(select(Client).where(Client.nif == "11115555Z"))
+        assert ClientRead.model_validate(client).status_color == "red"
@@ -0,0 +1,35 @@
+import subprocess
+import sys
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+# Se cargan con el primer PDF, la primera miniatura o la primera importacion .xlsx, no al arrancar.
+LAZY_MODULES = {"reportlab", "pypdf", "PIL", "openpyxl"}
+# Medido en ~1 s en un portatil de la oficina; el margen absorbe maquinas lentas y CI cargado.
+STARTUP_BUDGET_SECONDS = 2.0
+
+
+def _import_times(module: str) -> dict[str, int]:
+    """Cumulative import time in microseconds per module, from ``python -X importtime``."""
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=PROJECT_ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    times: dict[str, int] = {}
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        if cumulative.strip().isdigit():
+            times[name.strip()] = int(cumulative)
+    return times
+
+
+def test_app_startup_skips_heavy_libraries_and_stays_within_budget():
+    times = _import_times("main")
+
+    assert not {name.split(".")[0] for name in times} & LAZY_MODULES
+    assert times["main"] / 1_000_000 < STARTUP_BUDGET_SECONDS
@@ -0,0 +1,111 @@
+import json
+import os
+
+from app.services import storage_backup_service
+from app.services.storage_backup_service import StorageBackupRunner, StorageBackupStore
+
+
+def _write(path, content: bytes) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(content)
+
+
+def test_storage_snapshots_are_incremental_and_deduplicated(tmp_path):
+    storage = tmp_path / "storage"
+    _write(storage / "clientes" / "A" / "foto.jpg", b"foto-a")
+    _write(storage / "documentos" / "A" / "cap" / "cap.pdf", b"pdf-cap")
+    _write(storage / "documentos" / "B" / "cap" / "cap.pdf", b"pdf-cap")
+    store = StorageBackupStore(storage)
+
+    first = store.create_snapshot()
+    assert (first.files, first.reused, first.new_objects) == (3, 0, 2)
+
+    second = store.create_snapshot()
+    assert (second.files, second.reused, second.new_objects, second.bytes_copied) == (3, 3, 0, 0)
+
+    _write(storage / "clientes" / "A" / "foto.jpg", b"foto-a-nueva")
+    _write(storage / "clientes" / "C" / "foto.jpg", b"foto-a")
+    third = store.create_snapshot()
+    assert (third.files, third.reused, third.new_objects) == (4, 2, 1)
+
+    manifest = json.loads(third.path.read_text(encoding="utf-8"))["files"]
+    assert manifest["clientes/C/foto.jpg"]["sha256"] == store.load_manifest(first.path)["clientes/A/foto.jpg"]["sha256"]
+    assert not any(name.startswith("backups/") for name in manifest)
+
+
+def test_storage_restore_and_prune(tmp_path):
+    storage = tmp_path / "storage"
+    _write(storage / "clientes" / "A" / "foto.jpg", b"foto-a")
+    store = StorageBackupStore(storage)
+    original = store.create_snapshot()
+
+    _write(storage / "clientes" / "A" / "foto.jpg", b"foto-cambiada")
+    _write(storage / "clientes" / "B" / "foto.jpg", b"foto-b")
+    rollback = store.restore(original.path)
+
+    assert (storage / "clientes" / "A" / "foto.jpg").read_bytes() == b"foto-a"
+    assert not (storage / "clientes" / "B").exists()
+    assert store.latest() == original.path
+    assert store.load_manifest(rollback.path)["clientes/B/foto.jpg"]["size"] == len(b"foto-b")
+
+    store.restore(rollback.path)
+    assert (storage / "clientes" / "B" / "foto.jpg").read_bytes() == b"foto-b"
+
+    store.prune(keep_last=1)
+    remaining = store.snapshots()
+    assert len(remaining) == 1
+    referenced = {entry["sha256"] for entry in store.load_manifest(remaining[0]).values()}
+    stored = {path.name for path in store.objects_dir.rglob("*") if path.is_file()}
+    assert stored == referenced
+
+
+def test_prune_keeps_the_newest_snapshots_including_rollbacks(tmp_path):
+    storage = tmp_path / "storage"
+    _write(storage / "clientes" / "A" / "foto.jpg", b"foto-a")
+    store = StorageBackupStore(storage)
+    original = store.create_snapshot()
+    rollback = store.restore(original.path)
+    newer = [store.create_snapshot().path for _ in range(2)]
+    for age, path in enumerate(reversed([original.path, rollback.path, *newer])):
+        os.utime(path, ns=(path.stat().st_mtime_ns - age * 10**9,) * 2)
+
+    assert store.snapshots() == [original.path, rollback.path, *newer]
+    assert store.prune(keep_last=2) == [original.path, rollback.path]
+    assert store.snapshots() == newer
+    assert store.latest() == newer[-1]
+
+
+def test_storage_snapshots_skip_exports_caches_and_imports(tmp_path):
+    storage = tmp_path / "storage"
+    _write(storage / "blobs" / "ab" / "ab12.pdf", b"pdf")
+    _write(storage / "exports" / "cliente_1.pdf", b"export")
+    _write(storage / "exports" / "cache" / "digest.pdf", b"informe")
+    _write(storage / "exports" / "thumbnails" / "ab" / "ab12.jpg", b"miniatura")
+    _write(storage / "imports" / "id_clientes.csv", b"csv")
+    store = StorageBackupStore(storage)
+
+    snapshot = store.create_snapshot()
+    assert list(store.load_manifest(snapshot.path)) == ["blobs/ab/ab12.pdf"]
+
+    # Restaurar no borra las caches ni los exportes, aunque la copia no los tenga.
+    _write(storage / "exports" / "cache" / "otro.pdf", b"informe-nuevo")
+    store.restore(snapshot.path)
+    assert (storage / "exports" / "cache" / "digest.pdf").exists()
+    assert (storage / "exports" / "cache" / "otro.pdf").exists()
+    assert (storage / "exports" / "thumbnails" / "ab" / "ab12.jpg").exists()
+    assert (storage / "imports" / "id_clientes.csv").exists()
+
+
+def test_storage_backup_runs_in_background(tmp_path, monkeypatch):
+    storage = tmp_path / "storage"
+    _write(storage / "clientes" / "A" / "foto.jpg", b"foto-a")
+    monkeypatch.setattr(storage_backup_service.settings, "storage_backup_on_startup", True)
+    monkeypatch.setattr(storage_backup_service, "log_event", lambda action, details: None)
+
+    runner = StorageBackupRunner(StorageBackupStore(storage))
+    assert runner.start() is True
+    snapshot = runner.join(timeout=10)
+
+    assert runner.running is False
+    assert snapshot is not None and snapshot.files == 1
+    assert runner.last_error is None